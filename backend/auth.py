@@ -0,0 +1,148 @@
+"""Admin token verification with local JWT validation and a verified-token cache.
+
+Supabase access tokens are JWTs, so most admin requests can be verified
+locally instead of calling ``supabase.auth.get_user`` over the network:
+
+- HS256 tokens are checked against ``SUPABASE_JWT_SECRET``.
+- RS256/ES256 tokens are checked against the project's JWKS
+  (``SUPABASE_JWKS_URL``, default ``<SUPABASE_URL>/auth/v1/.well-known/jwks.json``).
+
+When no key is available for a token, the remote ``get_user`` call is used
+as a fallback. Verified tokens are kept in a bounded LRU cache (size
+``AUTH_CACHE_SIZE``, default 256) until their own ``exp``. Like any local
+JWT check, a token revoked by signing out stays valid until it expires.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import jwt
+
+import db
+
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{os.getenv('SUPABASE_URL', '').rstrip('/')}/auth/v1/.well-known/jwks.json"
+    if os.getenv("SUPABASE_URL") else None
+)
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "256"))
+
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
+
+_jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_keys=True) if SUPABASE_JWKS_URL else None
+
+
+class TokenCache:
+    """LRU cache of verified tokens, each entry expiring with its token"""
+
+    def __init__(self, max_size: int = AUTH_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> str:
+        # Never keep raw bearer tokens around in memory longer than needed
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, expires_at: float, user: dict) -> None:
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+def _user_from_claims(claims: dict) -> dict:
+    # The anon and service_role keys are signed with the same secret but
+    # carry no subject; only real user sessions may act as admin
+    if not claims.get("sub"):
+        raise jwt.InvalidTokenError("Token has no subject")
+    return {"id": claims["sub"], "email": claims.get("email"), "role": claims.get("role")}
+
+
+async def _verify_locally(token: str) -> Optional[dict]:
+    """Return the verified claims, or None if no key is available for this token"""
+    algorithm = jwt.get_unverified_header(token).get("alg")
+    options = {"require": ["exp", "sub"]}
+
+    if algorithm == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None
+        return jwt.decode(
+            token, SUPABASE_JWT_SECRET, algorithms=["HS256"],
+            audience=SUPABASE_JWT_AUDIENCE, options=options,
+        )
+
+    if algorithm in ASYMMETRIC_ALGORITHMS and _jwks_client:
+        try:
+            # The JWK set is cached by the client; only the first call (or a
+            # key rotation) goes to the network
+            signing_key = await db.call(_jwks_client.get_signing_key_from_jwt, token)
+        except jwt.PyJWKClientError as e:
+            print(f"JWKS lookup failed, falling back to remote auth: {e}")
+            return None
+        return jwt.decode(
+            token, signing_key.key, algorithms=ASYMMETRIC_ALGORITHMS,
+            audience=SUPABASE_JWT_AUDIENCE, options=options,
+        )
+
+    return None
+
+
+async def prefetch_keys() -> None:
+    """Load the JWK set ahead of the first admin request (no-op without JWKS)"""
+    if _jwks_client:
+        await db.call(_jwks_client.get_jwk_set)
+
+
+async def _verify_remotely(token: str) -> Tuple[float, dict]:
+    if db.supabase is None:
+        raise jwt.InvalidTokenError("No key configured to verify this token")
+    response = await db.call(db.supabase.auth.get_user, token)
+    if not response or not response.user:
+        raise jwt.InvalidTokenError("Invalid token")
+    # Supabase has already verified the token; only its expiry is needed here
+    claims = jwt.decode(token, options={"verify_signature": False})
+    user = {"id": response.user.id, "email": response.user.email, "role": response.user.role}
+    return float(claims.get("exp", 0)), user
+
+
+async def verify_token(token: str) -> dict:
+    """Verify a Supabase access token and return the user it belongs to"""
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    claims = await _verify_locally(token)
+    if claims is not None:
+        expires_at, user = float(claims["exp"]), _user_from_claims(claims)
+    else:
+        expires_at, user = await _verify_remotely(token)
+
+    token_cache.put(token, expires_at, user)
+    return user
@@ -0,0 +1,449 @@
+"""Load-test and micro-benchmark suite for the Portfolio API.
+
+Runs ``main.app`` in-process (through httpx's ASGI transport, so no network
+or server is involved) against the local SQLite backend, seeded with a
+deterministic synthetic portfolio. Three traffic mixes run concurrently:
+
+- public: visitors loading the site (``/api/portfolio``, revalidated with
+  If-None-Match, plus the per-section list routes and project detail)
+- admin: dashboard sessions (stats, message inbox, reading and marking
+  messages, editing projects) with a locally signed admin JWT
+- contact: bursts of contact-form posts from many senders
+
+For every endpoint it reports p50/p95/p99 latency and requests/sec from the
+load runs (median of ``--rounds``), and peak bytes allocated per request from a separate sequential
+pass under ``tracemalloc``. Results are compared against a stored baseline
+(``benchmarks/baseline.json``) and regressions are flagged.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/run.py                  # run and compare with the baseline
+    python benchmarks/run.py --save-baseline  # run and store a new baseline
+    python benchmarks/run.py --check          # exit 1 on any regression (CI)
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+JWT_SECRET = "benchmark-secret-not-for-production"
+
+# Latency/allocation growth tolerated before a route counts as regressed,
+# and the absolute floor below which differences are treated as noise
+DEFAULT_TOLERANCE = 0.5
+NOISE_FLOOR_MS = 1.0
+NOISE_FLOOR_BYTES = 4096
+
+
+def seed_data(rng: random.Random) -> dict:
+    """A deterministic portfolio roughly the size of a busy real one"""
+    technologies = ["Python", "FastAPI", "React", "PostgreSQL", "Docker", "AWS", "TypeScript", "Go", "Redis", "Kafka"]
+    categories = ["Languages", "Frameworks", "Cloud", "Databases", "Tools", "Archived"]
+    lorem = "Built and shipped a production system with measurable impact. " * 4
+    return {
+        "projects": [
+            {
+                "title": f"Project {i}",
+                "description": lorem,
+                "technologies": rng.sample(technologies, 4),
+                "github_url": f"https://github.com/example/project-{i}",
+                "featured": i % 5 == 0,
+                "is_hidden": i % 11 == 0,
+            }
+            for i in range(40)
+        ],
+        "skill_categories": [{"name": c, "is_hidden": c == "Archived"} for c in categories],
+        "skills": [
+            {"name": f"Skill {i}", "category": categories[i % len(categories)], "level": rng.randint(40, 100)}
+            for i in range(80)
+        ],
+        "experience": [
+            {"title": f"Engineer {i}", "company": f"Company {i}", "date": f"{2015 + i} - {2016 + i}", "description": lorem}
+            for i in range(8)
+        ],
+        "education": [
+            {"institution": f"University {i}", "degree": "B.Sc.", "date": f"{2010 + i}", "description": lorem}
+            for i in range(3)
+        ],
+        "certificates": [
+            {"title": f"Certificate {i}", "issuer": f"Issuer {i % 4}", "date": "2023", "description": lorem}
+            for i in range(12)
+        ],
+        "site_settings": [{
+            "id": 1, "full_name": "Bench Mark", "title": "Engineer", "titles": ["Engineer", "Builder"],
+            "tagline": "Benchmarks all the way down", "bio": lorem,
+            "social_links": [{"name": "GitHub", "url": "https://github.com/example"}],
+            "years_experience": "8+", "projects_completed": "40", "lines_of_code": "1M", "site_title": "Portfolio",
+        }],
+        "about_me": [{
+            "id": 1, "journey_title": "My Journey", "journey_text": lorem,
+            "highlights": [{"title": f"Highlight {i}", "text": lorem} for i in range(4)],
+        }],
+        "contact_messages": [
+            {
+                "name": f"Sender {i}", "email": f"sender{i}@example.com", "subject": f"Hello {i}",
+                "message": lorem, "read": i % 3 == 0,
+                "timestamp": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:{i % 60:02d}+00:00",
+            }
+            for i in range(500)
+        ],
+    }
+
+
+def configure_environment(workdir: str, rng: random.Random) -> None:
+    """Point the app at a fresh seeded SQLite file; must run before ``import main``"""
+    seed_path = os.path.join(workdir, "seed.json")
+    with open(seed_path, "w", encoding="utf-8") as f:
+        json.dump(seed_data(rng), f)
+    os.environ.pop("SUPABASE_URL", None)
+    os.environ.update({
+        "DB_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(workdir, "bench.sqlite3"),
+        "SQLITE_SEED": seed_path,
+        "SNAPSHOT_PATH": os.path.join(workdir, "snapshots.json"),
+        "CONTACT_JOURNAL": os.path.join(workdir, "contact_journal.jsonl"),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        # Contact bursts come from many senders behind one proxy
+        "TRUSTED_PROXY_HOPS": "1",
+    })
+
+
+class Recorder:
+    """Latency samples and status counts per endpoint label"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+
+    async def request(self, client, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples.setdefault(label, []).append(time.perf_counter() - started)
+        by_status = self.statuses.setdefault(label, {})
+        by_status[response.status_code] = by_status.get(response.status_code, 0) + 1
+        # The ASGI transport never suspends on a request served from memory,
+        # so without this one session would run many requests back to back
+        # and hold up every other request on the loop (a real client yields
+        # on network I/O)
+        await asyncio.sleep(0)
+        return response
+
+
+# Traffic mixes
+
+async def public_visit(client, recorder: Recorder, rng: random.Random, etags: dict) -> None:
+    headers = {}
+    if etags.get("portfolio") and rng.random() < 0.5:
+        headers["If-None-Match"] = etags["portfolio"]
+    response = await recorder.request(client, "GET /api/portfolio", "GET", "/api/portfolio", headers=headers)
+    if response.status_code == 200:
+        etags["portfolio"] = response.headers.get("etag")
+    # Older clients and crawlers still hit the per-section routes
+    if rng.random() < 0.3:
+        await recorder.request(client, "GET /api/projects", "GET", "/api/projects")
+        await recorder.request(client, "GET /api/skills", "GET", "/api/skills")
+        await recorder.request(client, "GET /api/experience", "GET", "/api/experience")
+        await recorder.request(client, "GET /api/site-settings", "GET", "/api/site-settings")
+    if rng.random() < 0.2:
+        await recorder.request(client, "GET /api/projects?featured", "GET", "/api/projects?featured=true")
+        await recorder.request(client, "GET /api/skills?category", "GET", "/api/skills?category=Languages")
+    if rng.random() < 0.2:
+        project_id = rng.randint(1, 40)
+        await recorder.request(client, "GET /api/projects/{id}", "GET", f"/api/projects/{project_id}")
+
+
+async def admin_session(client, recorder: Recorder, rng: random.Random, headers: dict) -> None:
+    await recorder.request(client, "GET /api/admin/stats", "GET", "/api/admin/stats", headers=headers)
+    response = await recorder.request(
+        client, "GET /api/admin/messages", "GET", "/api/admin/messages?limit=50", headers=headers
+    )
+    items = response.json().get("items", []) if response.status_code == 200 else []
+    cursor = response.json().get("next_cursor") if response.status_code == 200 else None
+    if cursor and rng.random() < 0.5:
+        await recorder.request(
+            client, "GET /api/admin/messages?cursor", "GET", f"/api/admin/messages?limit=50&cursor={cursor}",
+            headers=headers,
+        )
+    if rng.random() < 0.3:
+        await recorder.request(
+            client, "GET /api/admin/messages?q", "GET", "/api/admin/messages?q=Hello&status=unread", headers=headers
+        )
+    for message in items[:3]:
+        await recorder.request(
+            client, "GET /api/admin/messages/{id}", "GET", f"/api/admin/messages/{message['id']}", headers=headers
+        )
+        await recorder.request(
+            client, "PATCH /api/admin/messages/{id}/read", "PATCH", f"/api/admin/messages/{message['id']}/read",
+            headers=headers,
+        )
+    response = await recorder.request(client, "GET /api/admin/projects", "GET", "/api/admin/projects", headers=headers)
+    projects = response.json() if response.status_code == 200 else []
+    if projects and rng.random() < 0.5:
+        project = rng.choice(projects)
+        update = {k: project[k] for k in ("title", "description", "technologies", "featured", "is_hidden")}
+        update["description"] = project["description"][:200] + f" (edited {rng.randint(0, 999)})"
+        await recorder.request(
+            client, "PUT /api/admin/projects/{id}", "PUT", f"/api/admin/projects/{project['id']}",
+            headers=headers, json=update,
+        )
+
+
+async def contact_burst(client, recorder: Recorder, rng: random.Random, burst: int) -> None:
+    sender = rng.randint(0, 10 ** 6)
+    for i in range(burst):
+        await recorder.request(
+            client, "POST /api/contact", "POST", "/api/contact",
+            headers={"X-Forwarded-For": f"10.{sender % 256}.{sender // 256 % 256}.{i % 4}"},
+            json={
+                "name": f"Visitor {sender}", "email": f"visitor{sender}@example.com",
+                "subject": "Project enquiry", "message": f"Hello, message {i} from {sender}",
+            },
+        )
+
+
+def build_workload(args, rng: random.Random, admin_headers: dict):
+    """Session coroutine factories, shuffled into one arrival order.
+
+    Each session gets its own RNG so the traffic is identical between runs
+    however the sessions interleave.
+    """
+    etags: dict = {}
+    sessions = (
+        [(public_visit, etags)] * args.visitors
+        + [(admin_session, admin_headers)] * args.admin_sessions
+        + [(contact_burst, args.burst_size)] * args.contact_bursts
+    )
+    rng.shuffle(sessions)
+
+    def bind(fn, session_rng, extra):
+        return lambda client, recorder: fn(client, recorder, session_rng, extra)
+
+    return [bind(fn, random.Random(rng.getrandbits(32)), extra) for fn, extra in sessions]
+
+
+async def run_load(client, sessions, concurrency: int) -> Tuple[Recorder, float]:
+    recorder = Recorder()
+    queue: asyncio.Queue = asyncio.Queue()
+    for session in sessions:
+        queue.put_nowait(session)
+
+    async def worker():
+        while not queue.empty():
+            session = queue.get_nowait()
+            await session(client, recorder)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+async def run_allocations(client, sessions) -> Dict[str, int]:
+    """Peak bytes allocated per request, measured one request at a time"""
+    peaks: Dict[str, List[int]] = {}
+
+    class AllocationRecorder(Recorder):
+        async def request(self, client, label, method, url, **kwargs):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            response = await client.request(method, url, **kwargs)
+            peaks.setdefault(label, []).append(tracemalloc.get_traced_memory()[1] - before)
+            return response
+
+    tracemalloc.start()
+    try:
+        recorder = AllocationRecorder()
+        for session in sessions:
+            await session(client, recorder)
+    finally:
+        tracemalloc.stop()
+    return {label: sorted(values)[len(values) // 2] for label, values in peaks.items()}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float, allocations: Dict[str, int]) -> dict:
+    endpoints = {}
+    for label in sorted(recorder.samples):
+        samples = sorted(recorder.samples[label])
+        endpoints[label] = {
+            "requests": len(samples),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+            "req_per_sec": round(len(samples) / elapsed, 1),
+            "alloc_bytes": allocations.get(label),
+            "statuses": {str(k): v for k, v in sorted(recorder.statuses[label].items())},
+        }
+    total = sum(len(s) for s in recorder.samples.values())
+    return {
+        "total_requests": total,
+        "elapsed_sec": round(elapsed, 3),
+        "req_per_sec": round(total / elapsed, 1),
+        "endpoints": endpoints,
+    }
+
+
+def median_of(results) -> dict:
+    """Per-endpoint median of every timing metric over several rounds"""
+    results = list(results)
+    merged = results[len(results) // 2]
+    for key in ("elapsed_sec", "req_per_sec"):
+        merged[key] = sorted(r[key] for r in results)[len(results) // 2]
+    for label, stats in merged["endpoints"].items():
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "req_per_sec"):
+            values = sorted(r["endpoints"][label][metric] for r in results if label in r["endpoints"])
+            stats[metric] = values[len(values) // 2]
+    return merged
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of p50/p95 latency or allocations versus the baseline"""
+    regressions = []
+    for label, current in result["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(label)
+        if not previous:
+            continue
+        # p99 of a few dozen samples is too noisy to gate on; it is reported only
+        for metric, floor in (("p50_ms", NOISE_FLOOR_MS), ("p95_ms", NOISE_FLOOR_MS), ("alloc_bytes", NOISE_FLOOR_BYTES)):
+            old, new = previous.get(metric), current.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append(f"{label}: {metric} {old} -> {new} (+{(new / old - 1) * 100 if old else 100:.0f}%)")
+    return regressions
+
+
+def print_report(result: dict, baseline: Optional[dict]) -> None:
+    previous = (baseline or {}).get("endpoints", {})
+    header = f"{'endpoint':42} {'reqs':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'alloc KiB':>10} {'Δp95':>7}"
+    print(header)
+    print("-" * len(header))
+    for label, stats in result["endpoints"].items():
+        delta = ""
+        if label in previous and previous[label].get("p95_ms"):
+            delta = f"{(stats['p95_ms'] / previous[label]['p95_ms'] - 1) * 100:+.0f}%"
+        alloc = f"{stats['alloc_bytes'] / 1024:.1f}" if stats["alloc_bytes"] is not None else "-"
+        print(
+            f"{label:42} {stats['requests']:>6} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+            f"{stats['p99_ms']:>8.2f} {stats['req_per_sec']:>8.1f} {alloc:>10} {delta:>7}"
+        )
+    print(f"\n{result['total_requests']} requests in {result['elapsed_sec']}s ({result['req_per_sec']} req/s)")
+
+
+async def reset_state(main) -> None:
+    """Start a run from the same state: empty caches, nothing queued, no rate-limit history.
+
+    Every round replays the same traffic, so senders left rate-limited (and
+    messages remembered as duplicates) by the previous round would turn the
+    whole contact mix into 429s.
+    """
+    from contact_queue import ContactGuard
+
+    await main.contact_queue.close()
+    main.contact_guard = ContactGuard()
+    main.cache.clear()
+
+
+async def benchmark(args) -> dict:
+    import httpx
+    import jwt
+
+    import main
+
+    token = jwt.encode(
+        {"sub": "benchmark", "email": "bench@example.com", "role": "authenticated",
+         "aud": "authenticated", "exp": int(time.time()) + 3600},
+        JWT_SECRET, algorithm="HS256",
+    )
+    admin_headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        rounds = []
+        for _ in range(args.rounds):
+            await reset_state(main)
+            # Warm-up: first-hit costs (schema, caches, JWT) are not what we measure
+            await run_load(client, build_workload(args, random.Random(args.seed + 1), admin_headers)[:20], 4)
+            rounds.append(await run_load(
+                client, build_workload(args, random.Random(args.seed), admin_headers), args.concurrency
+            ))
+
+        await reset_state(main)
+        alloc_args = argparse.Namespace(**{**vars(args), "visitors": 20, "admin_sessions": 4, "contact_bursts": 4})
+        allocations = await run_allocations(client, build_workload(alloc_args, random.Random(args.seed + 2), admin_headers))
+
+    await main.contact_queue.close()
+    return median_of(summarize(recorder, elapsed, allocations) for recorder, elapsed in rounds)
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--visitors", type=int, default=300, help="public page-load sessions")
+    parser.add_argument("--admin-sessions", type=int, default=30, help="admin dashboard sessions")
+    parser.add_argument("--contact-bursts", type=int, default=40, help="contact-form bursts")
+    parser.add_argument("--burst-size", type=int, default=5, help="posts per contact burst")
+    parser.add_argument("--concurrency", type=int, default=32, help="sessions in flight at once")
+    parser.add_argument("--rounds", type=int, default=3, help="measured runs; the median of each metric is kept")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for data and traffic")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare with / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if any route regressed")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed growth (0.5 = 50%%)")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the app's own log output")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, BACKEND_DIR)
+    with tempfile.TemporaryDirectory(prefix="portfolio-bench-") as workdir:
+        configure_environment(workdir, random.Random(args.seed))
+        app_output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with app_output:
+            result = asyncio.run(benchmark(args))
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(result, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.save_baseline:
+        result["config"] = {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline", "check", "json", "verbose")}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("No baseline yet; run with --save-baseline to store one")
+        return 0
+    regressions = compare(result, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions versus baseline:")
+        for line in regressions:
+            print(f"  {line}")
+    else:
+        print("\nNo regressions versus baseline")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
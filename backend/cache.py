@@ -0,0 +1,169 @@
+"""In-process read-through cache for the public portfolio endpoints.
+
+Portfolio content only changes when an admin calls one of the
+``/api/admin/*`` mutation routes, so public reads are served from memory
+and the mutation routes invalidate the tables they touch. Entries also
+expire after ``CACHE_TTL`` seconds (default 300) to pick up edits made
+directly in the Supabase dashboard. At most ``CACHE_MAX_ENTRIES`` entries
+are kept, since some keys (e.g. ``category``) come straight from the URL.
+
+A loader that falls back to stale data calls ``mark_stale()``. Such results
+are cached for only ``CACHE_STALE_TTL`` seconds (default 5) before the live
+query is retried, and every read of them marks the enclosing
+``stale_scope()`` (one per request) so the response can be flagged.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "5"))
+
+# Set to a list per request/load; child tasks share it, so a mark made deep
+# inside asyncio.gather is still seen by the caller
+_stale_marks: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("stale_marks", default=None)
+
+
+def mark_stale() -> None:
+    """Record that the current request or load used stale data"""
+    marks = _stale_marks.get()
+    if marks is not None:
+        marks.append(True)
+
+
+@contextmanager
+def stale_scope():
+    """Collect stale marks made inside the block into the yielded list"""
+    marks: list = []
+    token = _stale_marks.set(marks)
+    try:
+        yield marks
+    finally:
+        _stale_marks.reset(token)
+
+
+class TableCache:
+    """TTL cache with entries grouped by table and keyed by query parameters"""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (expires_at, value, is_stale)
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any, bool]] = {}
+        # Load in flight per key: (generation it started at, task)
+        self._loading: Dict[Tuple[str, Hashable], Tuple[int, asyncio.Task]] = {}
+        # Bumped on every invalidation so a load that started before a write
+        # never stores its (now stale) result
+        self._generations: Dict[str, int] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        # Derived entries (e.g. the portfolio snapshot) built from other tables
+        self._dependents: Dict[str, Set[str]] = {}
+        self._listeners: List[Callable[[Set[str]], None]] = []
+
+    def add_dependency(self, name: str, tables: Iterable[str]) -> None:
+        """Invalidate ``name`` whenever any of ``tables`` is invalidated"""
+        for table in tables:
+            self._dependents.setdefault(table, set()).add(name)
+
+    def add_listener(self, listener: Callable[[Set[str]], None]) -> None:
+        """Call ``listener`` with the set of invalidated names after every invalidation"""
+        self._listeners.append(listener)
+
+    async def get_or_load(
+        self, table: str, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """Return the cached value for ``(table, key)``, calling ``loader`` on a miss"""
+        entry_key = (table, key)
+        entry = self._entries.get(entry_key)
+        if entry and entry[0] > time.monotonic():
+            return self._hit(table, entry)
+
+        # One loader per key and content version; concurrent misses share
+        # its result instead of stampeding the database. A miss after an
+        # invalidation starts a new load rather than reusing one begun
+        # before the write, and never queues behind it.
+        generation = self._generations.get(table, 0)
+        loading = self._loading.get(entry_key)
+        if loading is not None and loading[0] == generation:
+            self._hits[table] = self._hits.get(table, 0) + 1
+        else:
+            self._misses[table] = self._misses.get(table, 0) + 1
+            loading = (generation, asyncio.get_running_loop().create_task(
+                self._load(table, entry_key, generation, loader, ttl)
+            ))
+            self._loading[entry_key] = loading
+        # Shielded, so a caller that goes away does not cancel the load for the others
+        value, stale = await asyncio.shield(loading[1])
+        if stale:
+            mark_stale()
+        return value
+
+    async def _load(
+        self, table: str, entry_key: Tuple[str, Hashable], generation: int,
+        loader: Callable[[], Awaitable[Any]], ttl: Optional[float],
+    ) -> Tuple[Any, bool]:
+        try:
+            with stale_scope() as marks:
+                value = await loader()
+            if ttl is None:
+                ttl = self.ttl
+            if marks:
+                # Keep a fallback only briefly so the live query is retried soon
+                ttl = min(ttl, CACHE_STALE_TTL)
+            if self._generations.get(table, 0) == generation:
+                self._store(entry_key, value, ttl, bool(marks))
+            return value, bool(marks)
+        finally:
+            if self._loading.get(entry_key, (None, None))[0] == generation:
+                del self._loading[entry_key]
+
+    def _hit(self, table: str, entry: Tuple[float, Any, bool]) -> Any:
+        self._hits[table] = self._hits.get(table, 0) + 1
+        if entry[2]:
+            mark_stale()
+        return entry[1]
+
+    def _store(self, entry_key: Tuple[str, Hashable], value: Any, ttl: float, stale: bool = False) -> None:
+        self._entries.pop(entry_key, None)
+        while len(self._entries) >= self.max_entries:
+            # Oldest insertion first
+            del self._entries[next(iter(self._entries))]
+        self._entries[entry_key] = (time.monotonic() + ttl, value, stale)
+
+    def invalidate(self, *tables: str) -> None:
+        """Drop every cached entry belonging to the given tables and their dependents"""
+        names = set(tables)
+        for table in tables:
+            names |= self._dependents.get(table, set())
+        for name in names:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            for entry_key in [k for k in self._entries if k[0] == name]:
+                del self._entries[entry_key]
+        for listener in self._listeners:
+            listener(names)
+
+    def clear(self) -> None:
+        self.invalidate(*({k[0] for k in self._entries} | set(self._generations)))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and entry counts per table"""
+        tables = set(self._hits) | set(self._misses) | {k[0] for k in self._entries}
+        result = {}
+        for table in sorted(tables):
+            hits = self._hits.get(table, 0)
+            misses = self._misses.get(table, 0)
+            result[table] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                "entries": sum(1 for k in self._entries if k[0] == table),
+            }
+        return {"ttl_seconds": self.ttl, "max_entries": self.max_entries, "tables": result}
+
+
+cache = TableCache()
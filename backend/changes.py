@@ -0,0 +1,158 @@
+"""Server-Sent Events change feed for the public portfolio content.
+
+After every successful admin mutation, ``ChangeHub.publish`` records one
+compact event per changed row:
+
+    id: 42
+    event: change
+    data: {"table":"skills","id":7,"version":42}
+
+``version`` increases by one per event within a worker process. Open pages
+use the table to refresh only the section that changed. ``id`` is null
+when the change was made through another worker (see
+``content_versions.py``), which only knows the table.
+
+The hub is built to keep thousands of idle connections cheap:
+
+- Each event is encoded once, into bytes shared by every connection.
+- Connections have no queue of their own. They all wait on one shared
+  event, which ``publish`` sets and replaces. Each connection then sends
+  whatever came after the last version it sent, read from a bounded ring
+  buffer of recent events.
+- One timer per process, not one per connection, wakes every connection
+  each ``CHANGES_HEARTBEAT`` seconds (default 25). The wake-up sends a
+  comment line that stops proxies from closing idle streams.
+
+A reconnecting client sends ``Last-Event-ID`` (browsers do this on their
+own) and gets the events it missed. If they have already left the buffer
+(``CHANGES_BUFFER`` events, default 1024), it gets a ``reset`` event
+instead and should refetch everything. Streams close after
+``CHANGES_STREAM_MAX_AGE`` seconds (default 300), so restarts and deploys
+are not held up and clients spread across workers as they reconnect. At
+most ``CHANGES_MAX_CLIENTS`` streams (default 5000) are open per worker.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Iterable, List, Optional, Tuple
+
+import orjson
+
+CHANGES_HEARTBEAT = float(os.getenv("CHANGES_HEARTBEAT", "25"))
+CHANGES_BUFFER = int(os.getenv("CHANGES_BUFFER", "1024"))
+CHANGES_STREAM_MAX_AGE = float(os.getenv("CHANGES_STREAM_MAX_AGE", "300"))
+CHANGES_MAX_CLIENTS = int(os.getenv("CHANGES_MAX_CLIENTS", "5000"))
+
+# Ask browsers to reconnect after 3 s
+STREAM_PREAMBLE = b"retry: 3000\n\n"
+HEARTBEAT = b": ping\n\n"
+
+
+class ChangeHub:
+    """Fan-out of change events to every open stream"""
+
+    def __init__(
+        self,
+        buffer: int = CHANGES_BUFFER,
+        heartbeat: float = CHANGES_HEARTBEAT,
+        max_clients: int = CHANGES_MAX_CLIENTS,
+        max_age: float = CHANGES_STREAM_MAX_AGE,
+    ):
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        self.max_age = max_age
+        self.version = 0
+        # (version, encoded event), oldest first
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=buffer)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._heartbeat_timer: Optional[asyncio.TimerHandle] = None
+        self.closed = False
+        self.clients = 0
+        self.published = 0
+
+    def publish(self, table: str, ids: Iterable[int]) -> None:
+        """Record one change event per id and wake every stream once"""
+        published = self.version
+        for row_id in ids:
+            self.version += 1
+            data = orjson.dumps({"table": table, "id": row_id, "version": self.version})
+            self._events.append((self.version, b"id: %d\nevent: change\ndata: %s\n\n" % (self.version, data)))
+        if self.version != published:
+            self.published += self.version - published
+            self._wake()
+
+    def close(self) -> None:
+        """End every open stream (clients reconnect to another worker)"""
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+            self._wakeup = None
+
+    def _beat(self) -> None:
+        self._heartbeat_timer = None
+        if self.clients:
+            self._wake()
+            self._heartbeat_timer = asyncio.get_running_loop().call_later(self.heartbeat, self._beat)
+
+    def _since(self, version: int) -> Optional[List[bytes]]:
+        """Encoded events after ``version``; None if the buffer no longer has them all"""
+        if version >= self.version:
+            return []
+        if not self._events or self._events[0][0] > version + 1:
+            return None
+        return [data for event_version, data in self._events if event_version > version]
+
+    @property
+    def full(self) -> bool:
+        return self.clients >= self.max_clients
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """SSE bytes for one client, starting after ``last_event_id`` when given"""
+        self.clients += 1
+        if self._heartbeat_timer is None:
+            self._heartbeat_timer = asyncio.get_running_loop().call_later(self.heartbeat, self._beat)
+        try:
+            yield STREAM_PREAMBLE
+            try:
+                position = int(last_event_id) if last_event_id else self.version
+            except ValueError:
+                position = self.version
+            if position > self.version:
+                # Seen on another worker or before a restart (versions are
+                # per process), so what was missed is unknown
+                position = -1
+            closes_at = time.monotonic() + self.max_age
+            while not self.closed and time.monotonic() < closes_at:
+                events = self._since(position) if position >= 0 else None
+                if events is None:
+                    yield b"event: reset\ndata: {\"version\":%d}\n\n" % self.version
+                    position = self.version
+                    continue
+                if events:
+                    yield b"".join(events)
+                    position = self.version
+                    continue
+                if self._wakeup is None:
+                    self._wakeup = asyncio.Event()
+                await self._wakeup.wait()
+                if position == self.version:
+                    # Woken by the heartbeat, not by a change
+                    yield HEARTBEAT
+        finally:
+            self.clients -= 1
+
+    def stats(self) -> dict:
+        return {
+            "clients": self.clients,
+            "max_clients": self.max_clients,
+            "version": self.version,
+            "published": self.published,
+            "buffered": len(self._events),
+        }
+
+
+change_hub = ChangeHub()
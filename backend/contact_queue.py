@@ -0,0 +1,308 @@
+"""Write-behind queue and flood protection for the contact form.
+
+``/api/contact`` acknowledges a message as soon as it is queued; a
+background task writes queued messages to ``contact_messages`` in
+multi-row inserts. Failed batches are retried with backoff and then
+appended to a local JSON-lines journal. The journal is replayed at startup
+and once the database is reachable again. On shutdown, whatever is still
+queued or being written when the flush times out is journaled too.
+
+Every worker process on a host shares the journal. Appends hold an
+exclusive file lock. A replay takes the journal over under the same lock
+by renaming it to a file of its own (``<journal>.<pid>.replay``), so each
+message is replayed by one worker only and appends made meanwhile go to a
+fresh journal. Rows a replay could not write stay in its file for the next
+attempt; files left by workers that have exited are taken over as well.
+
+Before anything is queued, per-IP and per-email token buckets limit how
+often one sender can post. Exact repeats of a recent message are dropped.
+
+Tuning (environment variables):
+    CONTACT_QUEUE_SIZE          max messages waiting to be written (default 1000)
+    CONTACT_BATCH_SIZE          max rows per insert (default 50)
+    CONTACT_BATCH_DELAY         seconds to wait for a batch to fill (default 0.5)
+    CONTACT_RETRIES             insert attempts before journaling (default 3)
+    CONTACT_JOURNAL             journal path (default backend/contact_journal.jsonl)
+    CONTACT_IP_BURST / CONTACT_IP_PER_HOUR        per-IP bucket (default 5 / 20)
+    CONTACT_EMAIL_BURST / CONTACT_EMAIL_PER_HOUR  per-email bucket (default 3 / 10)
+    CONTACT_DUPLICATE_WINDOW    seconds an identical message is suppressed (default 3600)
+"""
+import asyncio
+import contextlib
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+import db
+
+CONTACT_QUEUE_SIZE = int(os.getenv("CONTACT_QUEUE_SIZE", "1000"))
+CONTACT_BATCH_SIZE = int(os.getenv("CONTACT_BATCH_SIZE", "50"))
+CONTACT_BATCH_DELAY = float(os.getenv("CONTACT_BATCH_DELAY", "0.5"))
+CONTACT_RETRIES = int(os.getenv("CONTACT_RETRIES", "3"))
+CONTACT_JOURNAL = os.getenv(
+    "CONTACT_JOURNAL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "contact_journal.jsonl")
+)
+CONTACT_IP_BURST = float(os.getenv("CONTACT_IP_BURST", "5"))
+CONTACT_IP_PER_HOUR = float(os.getenv("CONTACT_IP_PER_HOUR", "20"))
+CONTACT_EMAIL_BURST = float(os.getenv("CONTACT_EMAIL_BURST", "3"))
+CONTACT_EMAIL_PER_HOUR = float(os.getenv("CONTACT_EMAIL_PER_HOUR", "10"))
+CONTACT_DUPLICATE_WINDOW = float(os.getenv("CONTACT_DUPLICATE_WINDOW", "3600"))
+
+# Bound on tracked senders so a flood from many addresses can't grow memory
+MAX_TRACKED_KEYS = 10000
+
+
+class ContactQueueFull(Exception):
+    pass
+
+
+class TokenBucket:
+    """Per-key token buckets, oldest keys evicted past ``MAX_TRACKED_KEYS``"""
+
+    def __init__(self, burst: float, per_hour: float):
+        self.burst = burst
+        self.rate = per_hour / 3600.0
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Consume a token for ``key``; return 0, or seconds until one is available"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate if self.rate else float("inf")
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > MAX_TRACKED_KEYS:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ContactGuard:
+    """Rate limiting and duplicate suppression applied before a message is queued"""
+
+    def __init__(self):
+        self.by_ip = TokenBucket(CONTACT_IP_BURST, CONTACT_IP_PER_HOUR)
+        self.by_email = TokenBucket(CONTACT_EMAIL_BURST, CONTACT_EMAIL_PER_HOUR)
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self.rate_limited = 0
+        self.duplicates = 0
+
+    def retry_after(self, ip: str, email: str) -> float:
+        wait = max(self.by_ip.take(ip), self.by_email.take(email.lower()))
+        if wait:
+            self.rate_limited += 1
+        return wait
+
+    @staticmethod
+    def _fingerprint(data: dict) -> str:
+        return hashlib.sha256(
+            json.dumps([data["email"].lower(), data.get("subject"), data["message"]]).encode()
+        ).hexdigest()
+
+    def is_duplicate(self, data: dict) -> bool:
+        now = time.monotonic()
+        while self._recent and next(iter(self._recent.values())) <= now:
+            self._recent.popitem(last=False)
+        if self._fingerprint(data) in self._recent:
+            self.duplicates += 1
+            return True
+        return False
+
+    def remember(self, data: dict) -> None:
+        """Suppress identical messages for ``CONTACT_DUPLICATE_WINDOW`` seconds"""
+        self._recent[self._fingerprint(data)] = time.monotonic() + CONTACT_DUPLICATE_WINDOW
+        while len(self._recent) > MAX_TRACKED_KEYS:
+            self._recent.popitem(last=False)
+
+
+class ContactQueue:
+    """Bounded in-process queue flushed to Supabase in batched inserts"""
+
+    def __init__(self, on_flush: Optional[Callable[[], None]] = None):
+        self.on_flush = on_flush
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.journaled = 0
+
+    def start(self) -> None:
+        """Start the writer, which first replays messages journaled by an earlier process"""
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue(maxsize=CONTACT_QUEUE_SIZE)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, data: dict) -> None:
+        """Queue a message for writing; raises ContactQueueFull when the queue is full"""
+        self.start()
+        try:
+            self._queue.put_nowait(data)
+        except asyncio.QueueFull:
+            raise ContactQueueFull()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        await self._replay_journal()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + CONTACT_BATCH_DELAY
+                while len(batch) < CONTACT_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                written = await self._flush(batch)
+            except asyncio.CancelledError:
+                # Shutting down mid-batch: keep it. If the insert still
+                # lands, the replay writes it twice; better than losing it
+                self._append_journal(batch)
+                raise
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if written and self.journaled:
+                # The database is reachable again; catch up on anything journaled
+                await self._replay_journal()
+
+    async def _insert(self, rows: List[dict]) -> None:
+        await db.insert("contact_messages", rows)
+        self.written += len(rows)
+        if self.on_flush:
+            self.on_flush()
+
+    async def _flush(self, batch: List[dict]) -> bool:
+        """Insert ``batch`` with retries; False if it had to be journaled instead"""
+        for attempt in range(CONTACT_RETRIES):
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                print(f"Error saving contact messages (attempt {attempt + 1}/{CONTACT_RETRIES}): {e}")
+                if attempt + 1 < CONTACT_RETRIES:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            print(f"✅ Saved {len(batch)} contact message(s)")
+            return True
+        self._append_journal(batch)
+        return False
+
+    @contextlib.contextmanager
+    def _journal_lock(self):
+        # Shared with the other workers; only held for short file operations
+        with open(CONTACT_JOURNAL + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _append_journal(self, rows: List[dict]) -> None:
+        with self._journal_lock(), open(CONTACT_JOURNAL, "a", encoding="utf-8") as journal:
+            for row in rows:
+                journal.write(json.dumps(row) + "\n")
+        self.journaled += len(rows)
+        print(f"Journaled {len(rows)} contact message(s) to {CONTACT_JOURNAL}")
+
+    @staticmethod
+    def _read_rows(path: str) -> List[dict]:
+        with open(path, encoding="utf-8") as journal:
+            return [json.loads(line) for line in journal if line.strip()]
+
+    @staticmethod
+    def _write_rows(path: str, rows: List[dict]) -> None:
+        if not rows:
+            os.remove(path)
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            for row in rows:
+                journal.write(json.dumps(row) + "\n")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _exited(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _claim_journal(self) -> List[dict]:
+        """Move the shared journal, and replays left by exited workers, into this worker's replay file"""
+        claim_path = f"{CONTACT_JOURNAL}.{os.getpid()}.replay"
+        with self._journal_lock():
+            sources = [claim_path, CONTACT_JOURNAL]
+            for path in glob.glob(glob.escape(CONTACT_JOURNAL) + ".*.replay"):
+                pid = path[len(CONTACT_JOURNAL) + 1:-len(".replay")]
+                if pid.isdigit() and int(pid) != os.getpid() and self._exited(int(pid)):
+                    sources.append(path)
+            rows, claimed = [], []
+            for path in sources:
+                if os.path.exists(path):
+                    rows.extend(self._read_rows(path))
+                    claimed.append(path)
+            if claimed != [claim_path] and rows:
+                self._write_rows(claim_path, rows)
+            for path in claimed:
+                if path != claim_path:
+                    os.remove(path)
+        return rows
+
+    async def _replay_journal(self) -> None:
+        rows = await asyncio.to_thread(self._claim_journal)
+        if not rows:
+            return
+        claim_path = f"{CONTACT_JOURNAL}.{os.getpid()}.replay"
+        written = 0
+        try:
+            for start in range(0, len(rows), CONTACT_BATCH_SIZE):
+                chunk = rows[start:start + CONTACT_BATCH_SIZE]
+                await self._insert(chunk)
+                written = start + len(chunk)
+        except Exception as e:
+            print(f"Journal replay failed, will retry later: {e}")
+        finally:
+            # Keep only what is still unwritten so a retry (or another
+            # worker, after a shutdown mid-replay) never duplicates rows
+            if written:
+                self._write_rows(claim_path, rows[written:])
+                print(f"✅ Replayed {written} journaled contact message(s)")
+            self.journaled = len(rows) - written
+
+    async def close(self, timeout: float = 10) -> None:
+        """Flush what is queued, journaling anything left when ``timeout`` runs out"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._task.cancel()
+        try:
+            # Let the writer journal the batch it was holding
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Contact writer failed: {e}")
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            self._append_journal(leftover)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "journaled": self.journaled,
+        }
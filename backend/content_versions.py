@@ -0,0 +1,242 @@
+"""Content versions shared by every worker, for cross-worker cache coherence.
+
+The read cache, pre-encoded responses, portfolio snapshot and search index
+live in each worker's memory. An admin write only invalidates them in the
+worker that handled it. ``ContentVersions`` makes that invalidation reach
+the other workers and instances.
+
+- Every invalidation that must be shared is published as a new random
+  token for each table it touches. It is written to a shared backend.
+  Bursts of writes are coalesced into one backend write.
+- Each worker polls the backend every ``CONTENT_VERSION_POLL`` seconds
+  (default 1) from a background task. Tables whose token changed since the
+  last poll are invalidated locally, which also rebuilds the portfolio
+  snapshot and re-indexes search. Requests never wait on the backend, so
+  other workers pick up a write within one poll interval.
+
+Backends (``CONTENT_VERSION_BACKEND``):
+    none      single process; nothing is shared (default)
+    file      one JSON file (``CONTENT_VERSION_PATH``), for workers on one
+              host; writes are serialized with a POSIX file lock, and polls
+              only re-read it when it changed on disk
+    database  the ``content_versions`` table (name, token), for several hosts;
+              one small select per worker per poll interval
+
+Tokens are random rather than counters, so a write never has to read
+first. A worker that wrote a token does not invalidate again when it sees
+it. Entries still expire after ``CACHE_TTL`` if the backend is unreachable.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Optional, Set
+
+import db
+
+CONTENT_VERSION_BACKEND = os.getenv("CONTENT_VERSION_BACKEND", "none").lower()
+CONTENT_VERSION_PATH = os.getenv(
+    "CONTENT_VERSION_PATH", os.path.join(tempfile.gettempdir(), "portfolio-content-versions.json")
+)
+CONTENT_VERSION_POLL = float(os.getenv("CONTENT_VERSION_POLL", "1"))
+
+
+class FileVersionBackend:
+    """Table -> token in one JSON file shared by the workers on this host"""
+
+    name = "file"
+
+    def __init__(self, path: str = CONTENT_VERSION_PATH):
+        self.path = path
+        self._stamp = None
+        self._versions: Dict[str, str] = {}
+
+    async def read(self) -> Dict[str, str]:
+        # File I/O and the lock run in a thread, off the event loop
+        return await asyncio.to_thread(self._read)
+
+    async def write(self, tables: Set[str], token: str) -> None:
+        await asyncio.to_thread(self._write, tables, token)
+
+    def _read(self) -> Dict[str, str]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return {}
+        # The file is replaced on every write, so this changes with it
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with open(self.path, encoding="utf-8") as f:
+                self._versions = json.load(f)
+            self._stamp = stamp
+        return self._versions
+
+    def _write(self, tables: Set[str], token: str) -> None:
+        import fcntl
+
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    versions = json.load(f)
+            except (FileNotFoundError, ValueError):
+                versions = {}
+            versions.update({table: token for table in tables})
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(versions, f)
+            os.replace(temp_path, self.path)
+
+
+class DatabaseVersionBackend:
+    """Table -> token in the ``content_versions`` table, shared by every host"""
+
+    name = "database"
+    table = "content_versions"
+
+    async def read(self) -> Dict[str, str]:
+        rows = await db.select(self.table, "name,token")
+        return {row["name"]: row["token"] for row in rows}
+
+    async def write(self, tables: Set[str], token: str) -> None:
+        rows = await db.update(self.table, {"token": token}, in_={"name": sorted(tables)})
+        missing = tables - {row["name"] for row in rows}
+        if missing:
+            await db.insert(self.table, [{"name": name, "token": token} for name in sorted(missing)])
+
+
+def _create_backend():
+    if CONTENT_VERSION_BACKEND == "none":
+        return None
+    if CONTENT_VERSION_BACKEND == "file":
+        return FileVersionBackend()
+    if CONTENT_VERSION_BACKEND == "database":
+        return DatabaseVersionBackend()
+    raise ValueError(
+        f"Unknown CONTENT_VERSION_BACKEND: {CONTENT_VERSION_BACKEND!r} (expected 'none', 'file' or 'database')"
+    )
+
+
+class ContentVersions:
+    """Publishes local invalidations and applies the ones made by other workers"""
+
+    def __init__(self, backend=None, poll_interval: float = CONTENT_VERSION_POLL):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        # Tokens already applied (or written) by this worker; None until the
+        # first successful read
+        self._seen: Optional[Dict[str, str]] = None
+        self._pending: Set[str] = set()
+        self._writes = 0
+        self._on_change: Optional[Callable[[Set[str]], None]] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.errors = 0
+        self.published = 0
+        self.applied = 0
+        self._last_poll: Optional[float] = None
+
+    async def start(self, on_change: Callable[[Set[str]], None]) -> None:
+        """Record the current versions and start polling for changes"""
+        if self.backend is None or self._poller is not None:
+            return
+        self._on_change = on_change
+        try:
+            self._seen = dict(await self.backend.read())
+        except Exception as e:
+            # The first successful poll then invalidates everything it lists
+            self.errors += 1
+            print(f"Error reading content versions: {e}")
+        self._poller = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    def publish(self, tables: Iterable[str]) -> None:
+        """Share an invalidation of ``tables`` with the other workers"""
+        if self.backend is None:
+            return
+        self._pending.update(tables)
+        if self._pending and self._writer is None:
+            try:
+                self._writer = asyncio.get_running_loop().create_task(self._write_pending())
+            except RuntimeError:
+                # No running loop; written by the next poll
+                return
+
+    async def _write_pending(self) -> None:
+        try:
+            # Let the rest of this request's invalidations join the write
+            await asyncio.sleep(0)
+            while self._pending:
+                tables, self._pending = self._pending, set()
+                token = uuid.uuid4().hex
+                self._writes += 1
+                try:
+                    await self.backend.write(tables, token)
+                except Exception as e:
+                    self.errors += 1
+                    self._pending |= tables
+                    print(f"Error publishing content versions for {sorted(tables)}: {e}")
+                    return
+                self.published += len(tables)
+                if self._seen is not None:
+                    self._seen.update({table: token for table in tables})
+        finally:
+            self._writer = None
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._pending and self._writer is None:
+                # Retry a write that failed
+                self.publish(())
+            await self.poll()
+
+    async def poll(self) -> None:
+        """Invalidate locally every table another worker changed since the last poll"""
+        writes = self._writes
+        try:
+            versions = await self.backend.read()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error reading content versions: {e}")
+            return
+        self.polls += 1
+        self._last_poll = time.monotonic()
+        if writes != self._writes or self._writer is not None:
+            # Read while this worker was writing; may predate its own token
+            return
+        if self._seen is None:
+            changed = set(versions)
+        else:
+            changed = {table for table, token in versions.items() if self._seen.get(table) != token}
+        self._seen = dict(versions)
+        if changed:
+            self.applied += len(changed)
+            self._on_change(changed)
+
+    async def close(self) -> None:
+        """Stop polling and finish writing pending invalidations"""
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self._writer is not None:
+            await asyncio.shield(self._writer)
+        if self._pending and self.backend is not None:
+            await self._write_pending()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name if self.backend is not None else "none",
+            "poll_interval": self.poll_interval,
+            "polls": self.polls,
+            "last_poll_age": round(time.monotonic() - self._last_poll, 3) if self._last_poll is not None else None,
+            "published": self.published,
+            "applied": self.applied,
+            "pending": sorted(self._pending),
+            "errors": self.errors,
+        }
+
+
+content_versions = ContentVersions(_create_backend())
@@ -0,0 +1,351 @@
+"""Async data-access layer for the Portfolio API.
+
+The Supabase Python client is synchronous, so every call made from an
+``async def`` route would block the event loop for a full network round
+trip. All database, auth and storage access goes through the helpers in
+this module instead, which run the blocking client on a bounded thread
+pool and enforce a timeout on every call. Table operations are timed per
+table and operation (see ``metrics.py``).
+
+A circuit breaker sits in front of every call: after
+``DB_CIRCUIT_FAILURES`` consecutive failures (timeouts, connection errors)
+calls fail fast with ``CircuitOpen`` for ``DB_CIRCUIT_RESET`` seconds, then
+a single trial call decides whether to close it again. Error responses
+from Supabase itself (bad filter, invalid token, ...) do not count, since
+they prove the service is reachable.
+
+Table reads and writes go through a repository selected by ``DB_BACKEND``:
+``supabase`` (default, PostgREST) or ``sqlite`` (a local file, see
+``sqlite_repository.py``) for offline runs and benchmarks. Auth and storage
+always use the Supabase client, which is only created when
+``SUPABASE_URL`` is set for the sqlite backend. All of its HTTP traffic
+goes through the shared connection pool in ``http_pool.py``.
+
+Tuning (environment variables):
+    DB_BACKEND           table storage: supabase or sqlite (default supabase)
+    DB_MAX_CONCURRENCY   max Supabase calls in flight per worker (default 16)
+    DB_TIMEOUT           seconds before a single call is abandoned (default 10)
+    DB_CIRCUIT_FAILURES  consecutive failures that open the circuit (default 5)
+    DB_CIRCUIT_RESET     seconds the circuit stays open (default 30)
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from supabase import create_client, Client, AuthApiError, PostgrestAPIError, StorageException
+from supabase.lib.client_options import SyncClientOptions
+from dotenv import load_dotenv
+
+import http_pool
+from metrics import DB_CIRCUIT_REJECTED, DB_CIRCUIT_TRANSITIONS, db_timer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+DB_BACKEND = os.getenv("DB_BACKEND", "supabase").lower()
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "16"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+DB_CIRCUIT_FAILURES = int(os.getenv("DB_CIRCUIT_FAILURES", "5"))
+DB_CIRCUIT_RESET = float(os.getenv("DB_CIRCUIT_RESET", "30"))
+
+# Uploads may take far longer than a query; give them the pool's full storage budget
+STORAGE_TIMEOUT = http_pool.service_timeout("storage")
+
+# Errors returned by a reachable Supabase; they never trip the circuit
+SERVICE_ERRORS = (AuthApiError, PostgrestAPIError, StorageException)
+
+# Supabase client
+supabase: Optional[Client] = None
+if DB_BACKEND == "supabase" or os.getenv("SUPABASE_URL"):
+    supabase = create_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY"),
+        # PostgREST, Auth and Storage share one pool with per-service
+        # timeouts and retries (see http_pool.py)
+        options=SyncClientOptions(httpx_client=http_pool.client),
+    )
+
+_executor = ThreadPoolExecutor(max_workers=DB_MAX_CONCURRENCY, thread_name_prefix="supabase")
+
+
+class DatabaseTimeout(Exception):
+    """Raised when a Supabase call does not finish within its timeout"""
+
+
+class CircuitOpen(Exception):
+    """Raised without calling Supabase while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open)"""
+
+    def __init__(self, failures: int = DB_CIRCUIT_FAILURES, reset_after: float = DB_CIRCUIT_RESET):
+        self.max_failures = failures
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._trial_running or time.monotonic() - self.opened_at >= self.reset_after:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half-open" and not self._trial_running:
+            # Let exactly one call through to probe the service
+            self._trial_running = True
+            return
+        self.rejected += 1
+        DB_CIRCUIT_REJECTED.inc()
+        raise CircuitOpen("Database unavailable (circuit open)")
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Database reachable again, circuit closed")
+            DB_CIRCUIT_TRANSITIONS.labels("closed").inc()
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_running or self.failures >= self.max_failures:
+            if self.opened_at is None:
+                logger.warning("Database circuit opened after %d consecutive failures", self.failures)
+                DB_CIRCUIT_TRANSITIONS.labels("open").inc()
+            self.opened_at = time.monotonic()
+            self._trial_running = False
+
+    def record_cancelled(self) -> None:
+        # The caller gave up; that says nothing about the service
+        self._trial_running = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+breaker = CircuitBreaker()
+
+
+async def call(fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+    """Run a blocking Supabase call on the worker pool without blocking the event loop"""
+    breaker.before_call()
+    timeout = timeout or DB_TIMEOUT
+    loop = asyncio.get_running_loop()
+    # The HTTP transport stops retrying once this call has been abandoned
+    deadline = time.monotonic() + timeout
+    future = loop.run_in_executor(_executor, partial(http_pool.run_with_deadline, deadline, fn, *args, **kwargs))
+    try:
+        result = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        raise DatabaseTimeout(f"Database call timed out after {timeout}s")
+    except SERVICE_ERRORS:
+        breaker.record_success()
+        raise
+    except asyncio.CancelledError:
+        breaker.record_cancelled()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return result
+
+
+def _quote(value: Any) -> str:
+    # Values inside PostgREST or=(...) filters must be quoted if they contain
+    # reserved characters such as , . : ( )
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_filter(columns: Sequence[str], values: Sequence[Any], desc: bool) -> str:
+    """PostgREST filter for rows strictly after ``values`` in ``columns`` order"""
+    op = "lt" if desc else "gt"
+    branches = []
+    for i, column in enumerate(columns):
+        terms = [f"{c}.eq.{_quote(v)}" for c, v in zip(columns[:i], values[:i])]
+        terms.append(f"{column}.{op}.{_quote(values[i])}")
+        branches.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ",".join(branches)
+
+
+def _build(
+    query,
+    eq: Optional[Dict[str, Any]],
+    order: Union[str, Sequence[str], None],
+    desc: bool,
+    limit: Optional[int],
+    keyset: Optional[Sequence[Any]] = None,
+    search: Optional[Tuple[Sequence[str], str]] = None,
+    in_: Optional[Dict[str, Sequence[Any]]] = None,
+):
+    for column, value in (eq or {}).items():
+        query = query.eq(column, value)
+    for column, values in (in_ or {}).items():
+        query = query.in_(column, list(values))
+    columns = [order] if isinstance(order, str) else list(order or [])
+    branches = []
+    if keyset is not None:
+        branches.append(_keyset_filter(columns, keyset, desc))
+    if search:
+        search_columns, text = search
+        branches.append(",".join(f"{c}.ilike.{_quote(f'*{text}*')}" for c in search_columns))
+    # Both are OR filters; they are ANDed inside one or=(...) parameter
+    # rather than sent as two
+    if len(branches) == 1:
+        query = query.or_(branches[0])
+    elif branches:
+        query = query.or_("and(" + ",".join(f"or({branch})" for branch in branches) + ")")
+    for column in columns:
+        query = query.order(column, desc=desc)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+class SupabaseRepository:
+    """Table access through PostgREST, using the shared ``supabase`` client"""
+
+    name = "supabase"
+
+    async def connect(self) -> None:
+        # The client builds its PostgREST and Storage clients on first use;
+        # do it here, off the event loop, instead of on the first request
+        await call(lambda: (supabase.postgrest, supabase.storage))
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        *,
+        eq: Optional[Dict[str, Any]] = None,
+        order: Union[str, Sequence[str], None] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        keyset: Optional[Sequence[Any]] = None,
+        search: Optional[Tuple[Sequence[str], str]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        query = _build(supabase.table(table).select(columns), eq, order, desc, limit, keyset, search, in_)
+        response = await call(query.execute)
+        return response.data
+
+    async def count(self, table: str, *, eq: Optional[Dict[str, Any]] = None) -> int:
+        query = _build(supabase.table(table).select("*", count="exact", head=True), eq, None, False, None)
+        response = await call(query.execute)
+        return response.count or 0
+
+    async def insert(self, table: str, data: Any) -> List[dict]:
+        response = await call(supabase.table(table).insert(data).execute)
+        return response.data
+
+    async def update(
+        self, table: str, data: dict, *, eq: Optional[Dict[str, Any]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        query = _build(supabase.table(table).update(data), eq, None, False, None, in_=in_)
+        response = await call(query.execute)
+        return response.data
+
+    async def delete(
+        self, table: str, *, eq: Optional[Dict[str, Any]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        query = _build(supabase.table(table).delete(), eq, None, False, None, in_=in_)
+        response = await call(query.execute)
+        return response.data
+
+
+def _create_repository():
+    if DB_BACKEND == "supabase":
+        return SupabaseRepository()
+    if DB_BACKEND == "sqlite":
+        from sqlite_repository import SQLiteRepository
+        return SQLiteRepository()
+    raise ValueError(f"Unknown DB_BACKEND: {DB_BACKEND!r} (expected 'supabase' or 'sqlite')")
+
+
+repository = _create_repository()
+
+
+async def connect() -> None:
+    """Open the table backend's client or connection ahead of the first request"""
+    await repository.connect()
+
+
+async def select(
+    table: str,
+    columns: str = "*",
+    *,
+    eq: Optional[Dict[str, Any]] = None,
+    order: Union[str, Sequence[str], None] = None,
+    desc: bool = False,
+    limit: Optional[int] = None,
+    keyset: Optional[Sequence[Any]] = None,
+    search: Optional[Tuple[Sequence[str], str]] = None,
+    in_: Optional[Dict[str, Sequence[Any]]] = None,
+) -> List[dict]:
+    """Select rows from a table, filtered by column equality.
+
+    ``in_`` maps columns to the values they may take (SQL ``IN``).
+    ``keyset`` holds the ``order`` column values of the last row already
+    seen and returns only rows after it (keyset pagination). ``search`` is
+    a ``(columns, text)`` pair matching rows where any column contains
+    ``text``. All filters given must match.
+    """
+    with db_timer(table, "select"):
+        return await repository.select(
+            table, columns, eq=eq, order=order, desc=desc, limit=limit, keyset=keyset, search=search, in_=in_
+        )
+
+
+async def count(table: str, *, eq: Optional[Dict[str, Any]] = None) -> int:
+    """Count rows in a table, filtered by column equality (no rows are transferred)"""
+    with db_timer(table, "count"):
+        return await repository.count(table, eq=eq)
+
+
+async def insert(table: str, data: Any) -> List[dict]:
+    """Insert one row (dict) or many rows (list of dicts)"""
+    with db_timer(table, "insert"):
+        return await repository.insert(table, data)
+
+
+def _require_filter(eq, in_) -> None:
+    # Never update or delete a whole table by accident
+    if not eq and not in_:
+        raise ValueError("update and delete need an eq or in_ filter")
+
+
+async def update(
+    table: str, data: dict, *, eq: Optional[Dict[str, Any]] = None,
+    in_: Optional[Dict[str, Sequence[Any]]] = None,
+) -> List[dict]:
+    """Update the rows matching ``eq`` and ``in_`` and return them"""
+    _require_filter(eq, in_)
+    with db_timer(table, "update"):
+        return await repository.update(table, data, eq=eq, in_=in_)
+
+
+async def delete(
+    table: str, *, eq: Optional[Dict[str, Any]] = None, in_: Optional[Dict[str, Sequence[Any]]] = None,
+) -> List[dict]:
+    """Delete the rows matching ``eq`` and ``in_`` and return them"""
+    _require_filter(eq, in_)
+    with db_timer(table, "delete"):
+        return await repository.delete(table, eq=eq, in_=in_)
@@ -0,0 +1,160 @@
+"""HTTP caching policy, validators and compression for every response.
+
+``HTTPCacheMiddleware`` applies a declared Cache-Control policy per route
+prefix (see ``CACHE_RULES`` in ``main.py``):
+
+- ``PUBLIC``: public content may be reused for ``CACHE_PUBLIC_MAX_AGE``
+  seconds (default 60). Browsers and CDNs may then serve it for up to
+  ``CACHE_PUBLIC_SWR`` seconds (default 86400) while revalidating, or while
+  the API is failing.
+- ``NO_STORE``: admin, auth-bearing and write routes are never cached.
+
+A route that sets its own Cache-Control keeps it. Only successful GET/HEAD
+responses get the route's policy; anything else is ``no-store``, and data
+served from a stale snapshot is ``no-cache``.
+
+Cacheable responses without an ETag get one, computed from the body, and
+matching If-None-Match requests get a 304. Responses that are not already
+encoded are compressed with brotli or gzip when the client accepts it;
+bodies of ``COMPRESS_THREAD_BYTES`` (default 64 KiB) or more are compressed
+in a worker thread so they do not stall the event loop. The pre-encoded
+public bodies (``responses.py``) pass through untouched.
+"""
+import asyncio
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from responses import COMPRESS_MIN_BYTES, body_tag, choose_encoding, compress, etag_for, etag_matches
+
+CACHE_PUBLIC_MAX_AGE = int(os.getenv("CACHE_PUBLIC_MAX_AGE", "60"))
+CACHE_PUBLIC_SWR = int(os.getenv("CACHE_PUBLIC_SWR", "86400"))
+
+PUBLIC = (
+    f"public, max-age={CACHE_PUBLIC_MAX_AGE}, "
+    f"stale-while-revalidate={CACHE_PUBLIC_SWR}, stale-if-error={CACHE_PUBLIC_SWR}"
+)
+REVALIDATE = "no-cache"
+NO_STORE = "no-store"
+
+# Bodies larger than this are streamed through without an ETag or compression
+BUFFER_MAX_BYTES = 4 * 1024 * 1024
+
+# Bodies at least this large are compressed off the event loop
+COMPRESS_THREAD_BYTES = int(os.getenv("COMPRESS_THREAD_BYTES", str(64 * 1024)))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+class HTTPCacheMiddleware:
+    """Cache-Control per route prefix, ETag/304 and response compression"""
+
+    def __init__(self, app, rules: Sequence[Tuple[str, str]], default: str = REVALIDATE):
+        self.app = app
+        # (path prefix, Cache-Control) pairs; the first matching prefix wins
+        self.rules = list(rules)
+        self.default = default
+
+    def policy_for(self, method: str, path: str) -> str:
+        if method not in ("GET", "HEAD"):
+            return NO_STORE
+        for prefix, policy in self.rules:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return policy
+        return self.default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        policy = self.policy_for(scope["method"], scope["path"])
+        accept_encoding = request_headers.get("accept-encoding")
+        if_none_match = request_headers.get("if-none-match")
+
+        start: Optional[dict] = None
+        chunks: List[bytes] = []
+        buffered = 0
+        streaming = False
+
+        async def cache_send(message):
+            nonlocal start, buffered, streaming
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                self._apply_policy(headers, policy, message["status"])
+                if (
+                    message["status"] != 200
+                    or ("content-encoding" in headers and "etag" in headers)
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                ):
+                    # Nothing to add (errors, 304s, pre-encoded bodies), or
+                    # an event stream that must not be held back
+                    streaming = True
+                    await send(message)
+                else:
+                    start = message
+                return
+
+            if streaming or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            buffered += len(chunks[-1])
+            if message.get("more_body", False):
+                if buffered > BUFFER_MAX_BYTES:
+                    # Too large to hold; send what we have and stream the rest
+                    streaming = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+            await self._finish(start, b"".join(chunks), accept_encoding, if_none_match, send)
+
+        await self.app(scope, receive, cache_send)
+
+    @staticmethod
+    def _apply_policy(headers: MutableHeaders, policy: str, status: int) -> None:
+        if "cache-control" in headers:
+            return
+        if status not in (200, 304):
+            headers["Cache-Control"] = NO_STORE
+        elif headers.get("x-data-stale"):
+            headers["Cache-Control"] = REVALIDATE
+        else:
+            headers["Cache-Control"] = policy
+
+    @staticmethod
+    async def _finish(start: dict, body: bytes, accept_encoding, if_none_match, send) -> None:
+        headers = MutableHeaders(scope=start)
+        content_type = headers.get("content-type", "")
+        encoding = "identity"
+        if (
+            "content-encoding" not in headers
+            and len(body) >= COMPRESS_MIN_BYTES
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        ):
+            headers.add_vary_header("Accept-Encoding")
+            encoding = choose_encoding(accept_encoding, ("br", "gzip"))
+
+        if "etag" not in headers and headers.get("cache-control") != NO_STORE:
+            headers["ETag"] = etag_for(body_tag(body), encoding)
+        if etag_matches(if_none_match, {headers.get("etag")}):
+            for name in ("content-length", "content-type", "content-encoding"):
+                if name in headers:
+                    del headers[name]
+            start["status"] = 304
+            await send(start)
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding != "identity":
+            if len(body) >= COMPRESS_THREAD_BYTES:
+                body = await asyncio.to_thread(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,218 @@
+"""Shared HTTP connection pool for all Supabase traffic.
+
+By default PostgREST, Auth and Storage each build their own httpx client
+with library defaults (a 5 second keep-alive, no retries, one timeout
+each). ``client`` replaces them with one explicitly sized, HTTP/2-capable
+pool, passed to ``create_client`` in ``db.py``. Every service then reuses
+the same warm connections, and with HTTP/2 concurrent calls share them as
+multiplexed streams.
+
+Requests are routed by URL path to a service (``rest``, ``auth``,
+``storage``), which sets their timeouts. Failures are retried with
+exponential backoff and jitter:
+
+- Connection failures are always retried, since nothing was sent yet.
+- Read errors and 502/503/504 responses are retried for idempotent
+  methods only (GET, HEAD, OPTIONS, PUT, DELETE).
+
+Calls made through ``db.call`` carry its deadline (``run_with_deadline``):
+each attempt's timeouts are cut to the time left, and no retry is started
+once the deadline has passed. A worker thread is then freed as soon as
+its caller gives up, instead of retrying for a result nobody awaits.
+
+``stats()`` reports pool utilization (requests in flight and their peak,
+against the pool size) and request, retry and error counts per service.
+It is included in ``/api/admin/cache-stats``; the same numbers are also
+exported at ``/metrics``. The requests are counted here, as they pass
+through; httpx has no public view of the connections inside its pool.
+
+Tuning (environment variables):
+    HTTP2                  negotiate HTTP/2 (default 1)
+    HTTP_POOL_SIZE         max open connections (default 20)
+    HTTP_POOL_KEEPALIVE    max idle connections kept open (default HTTP_POOL_SIZE)
+    HTTP_KEEPALIVE_EXPIRY  seconds an idle connection is kept (default 60)
+    HTTP_CONNECT_TIMEOUT   seconds to establish a connection (default 5)
+    HTTP_POOL_TIMEOUT      seconds to wait for a free connection (default 5)
+    HTTP_TIMEOUT_REST      PostgREST read/write timeout (default DB_TIMEOUT or 10)
+    HTTP_TIMEOUT_AUTH      Auth read/write timeout (default 5)
+    HTTP_TIMEOUT_STORAGE   Storage read/write timeout (default 30)
+    HTTP_RETRIES           retries after the first attempt (default 2)
+    HTTP_RETRY_BACKOFF     first retry delay in seconds, doubled each time (default 0.2)
+"""
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from metrics import HTTP_CLIENT_IN_FLIGHT, HTTP_CLIENT_REQUESTS, HTTP_CLIENT_RETRIES
+
+HTTP2 = os.getenv("HTTP2", "1").lower() not in ("0", "false", "no")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_POOL_KEEPALIVE = int(os.getenv("HTTP_POOL_KEEPALIVE", str(HTTP_POOL_SIZE)))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+
+# Read/write timeout per service; uploads get the most room
+SERVICE_TIMEOUTS = {
+    "rest": float(os.getenv("HTTP_TIMEOUT_REST", os.getenv("DB_TIMEOUT", "10"))),
+    "auth": float(os.getenv("HTTP_TIMEOUT_AUTH", "5")),
+    "storage": float(os.getenv("HTTP_TIMEOUT_STORAGE", "30")),
+}
+
+# URL path prefix -> service
+SERVICE_PATHS = (("/rest/", "rest"), ("/auth/", "auth"), ("/storage/", "storage"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS = {502, 503, 504}
+
+# Nothing reached the server, so any request may be sent again
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# The request may have been processed; only idempotent ones are retried
+READ_ERRORS = (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def service_for(path: str) -> str:
+    for prefix, service in SERVICE_PATHS:
+        if path.startswith(prefix):
+            return service
+    return "rest"
+
+
+# Deadline (time.monotonic()) of the db.call running on this worker thread
+_call = threading.local()
+
+
+def run_with_deadline(deadline: float, fn: Callable, *args, **kwargs) -> Any:
+    """Run ``fn`` with its HTTP requests bounded by ``deadline``"""
+    _call.deadline = deadline
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _call.deadline = None
+
+
+def service_timeout(service: str) -> float:
+    """Longest a single call to ``service`` can take, retries included"""
+    backoff = sum(HTTP_RETRY_BACKOFF * 2 ** attempt for attempt in range(HTTP_RETRIES))
+    return (HTTP_CONNECT_TIMEOUT + SERVICE_TIMEOUTS[service]) * (HTTP_RETRIES + 1) + backoff
+
+
+class PooledTransport(httpx.BaseTransport):
+    """One connection pool for every service, with per-service timeouts and retries"""
+
+    def __init__(self):
+        self.max_connections = HTTP_POOL_SIZE
+        self._transport = httpx.HTTPTransport(
+            http2=HTTP2,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_SIZE,
+                max_keepalive_connections=HTTP_POOL_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+        self._timeouts = {
+            service: httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT, pool=HTTP_POOL_TIMEOUT).as_dict()
+            for service, timeout in SERVICE_TIMEOUTS.items()
+        }
+        # Requests are sent from the database worker threads
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests: Dict[str, int] = {service: 0 for service in SERVICE_TIMEOUTS}
+        self.retries: Dict[str, int] = {service: 0 for service in SERVICE_TIMEOUTS}
+        self.errors: Dict[str, int] = {service: 0 for service in SERVICE_TIMEOUTS}
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        service = service_for(request.url.path)
+        deadline = getattr(_call, "deadline", None)
+        idempotent = request.method in IDEMPOTENT_METHODS
+        with self._lock:
+            self.requests[service] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        HTTP_CLIENT_REQUESTS.labels(service).inc()
+        try:
+            attempt = 0
+            while True:
+                request.extensions["timeout"] = self._timeout_for(service, deadline)
+                # Exponential backoff with jitter, so retries from several threads spread out
+                delay = HTTP_RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.0)
+                try:
+                    response = self._transport.handle_request(request)
+                except CONNECT_ERRORS:
+                    if self._give_up(attempt, delay, deadline):
+                        raise
+                except READ_ERRORS:
+                    if not idempotent or self._give_up(attempt, delay, deadline):
+                        raise
+                else:
+                    if (
+                        response.status_code not in RETRYABLE_STATUS
+                        or not idempotent
+                        or self._give_up(attempt, delay, deadline)
+                    ):
+                        return response
+                    response.close()
+                self._backoff(service, delay)
+                attempt += 1
+        except Exception:
+            with self._lock:
+                self.errors[service] += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _timeout_for(self, service: str, deadline: Optional[float]) -> dict:
+        if deadline is None:
+            return self._timeouts[service]
+        remaining = max(deadline - time.monotonic(), 0.001)
+        return {phase: min(timeout, remaining) for phase, timeout in self._timeouts[service].items()}
+
+    @staticmethod
+    def _give_up(attempt: int, delay: float, deadline: Optional[float]) -> bool:
+        # No retries left, or the caller will have given up before the next one
+        return attempt >= HTTP_RETRIES or (deadline is not None and time.monotonic() + delay >= deadline)
+
+    def _backoff(self, service: str, delay: float) -> None:
+        with self._lock:
+            self.retries[service] += 1
+        HTTP_CLIENT_RETRIES.labels(service).inc()
+        time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "http2_enabled": HTTP2,
+                "max_connections": self.max_connections,
+                # Can exceed 1 when HTTP/2 multiplexes requests on a connection
+                "utilization": round(self.in_flight / self.max_connections, 4) if self.max_connections else 0.0,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "requests": dict(self.requests),
+                "retries": dict(self.retries),
+                "errors": dict(self.errors),
+            }
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+transport = PooledTransport()
+client = httpx.Client(transport=transport, follow_redirects=True)
+
+HTTP_CLIENT_IN_FLIGHT.set_function(lambda: transport.in_flight)
+
+
+def stats() -> dict:
+    return transport.stats()
+
+
+def close() -> None:
+    client.close()
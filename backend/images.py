@@ -0,0 +1,157 @@
+"""Resized image derivatives for uploaded assets.
+
+After an image upload, ``create_variants`` renders WebP (and AVIF, when the
+installed Pillow supports it) copies at the fixed widths in
+``IMAGE_WIDTHS`` (default 320,640,1280). Rendering runs in a process pool
+(``IMAGE_WORKERS`` processes) so it never competes with the event loop.
+Variants are stored next to the original as ``<hash>_w<width>.<ext>``,
+and a srcset-style manifest is returned for the upload response.
+
+Pillow is optional: without it, uploads still work and simply come back
+with an empty manifest.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import db
+from metrics import IMAGE_VARIANT_ERRORS
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+IMAGE_WIDTHS = sorted(int(w) for w in os.getenv("IMAGE_WIDTHS", "320,640,1280").split(",") if w.strip())
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Formats we can decode and resize; SVG, GIF (often animated) and PDF are left alone
+RESIZABLE_TYPES = {"image/png", "image/jpeg", "image/webp", "image/avif"}
+
+# (format name for Pillow, content type, extension, save options)
+OUTPUT_FORMATS = [
+    ("WEBP", "image/webp", ".webp", {"quality": 80, "method": 4}),
+    ("AVIF", "image/avif", ".avif", {"quality": 60}),
+]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _output_formats():
+    if Image is None:
+        return []
+    return [f for f in OUTPUT_FORMATS if f[0] != "AVIF" or features.check("avif")]
+
+
+def _planned_sizes(width: int, height: int) -> List[Tuple[int, int]]:
+    # Never upscale; an image narrower than every target gets one variant at its own width
+    widths = [w for w in IMAGE_WIDTHS if w < width] or [width]
+    return [(w, max(1, round(height * w / width))) for w in widths]
+
+
+def _oriented_size(source_path: str) -> Tuple[int, int]:
+    """Image size after EXIF rotation, read from the header only"""
+    with Image.open(source_path) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in (5, 6, 7, 8):
+            width, height = height, width
+    return width, height
+
+
+def variant_name(original: str, width: int, extension: str) -> str:
+    stem = os.path.splitext(original)[0]
+    return f"{stem}_w{width}{extension}"
+
+
+def _render_variants(source_path: str) -> List[Tuple[int, str]]:
+    """Runs in a worker process: write every variant to a temp file.
+
+    Returns ``(width, temp_path)`` pairs, in the order of ``_output_formats``
+    within each width.
+    """
+    rendered = []
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for width, height in _planned_sizes(image.width, image.height):
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for pil_format, _, extension, options in _output_formats():
+                fd, path = tempfile.mkstemp(prefix="variant-", suffix=extension)
+                with os.fdopen(fd, "wb") as out:
+                    resized.save(out, pil_format, **options)
+                rendered.append((width, path))
+    return rendered
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def _manifest(variants: List[dict]) -> dict:
+    srcset = {}
+    for variant in variants:
+        srcset.setdefault(variant["content_type"], []).append(f"{variant['url']} {variant['width']}w")
+    return {"variants": variants, "srcset": {k: ", ".join(v) for k, v in srcset.items()}}
+
+
+async def create_variants(source_path: str, original: str, content_type: str, bucket, existing: bool = False) -> dict:
+    """Render, store and describe the derivatives of an uploaded image.
+
+    For an ``existing`` (deduplicated) original the variants are only
+    re-rendered if they are missing from the bucket. The original is
+    already stored, so a failure here only leaves the manifest empty.
+    """
+    formats = _output_formats()
+    if content_type not in RESIZABLE_TYPES or not formats:
+        return _manifest([])
+    try:
+        return await _store_variants(source_path, original, bucket, formats, existing)
+    except Exception as e:
+        logger.warning("Image variant error for %s: %s", original, e)
+        IMAGE_VARIANT_ERRORS.inc()
+        return _manifest([])
+
+
+async def _store_variants(source_path: str, original: str, bucket, formats, existing: bool) -> dict:
+    # Opening the file reads its header from disk; keep that off the event loop
+    sizes = _planned_sizes(*await asyncio.to_thread(_oriented_size, source_path))
+    variants = [
+        {
+            "url": bucket.get_public_url(variant_name(original, width, extension)),
+            "path": variant_name(original, width, extension),
+            "width": width,
+            "height": height,
+            "content_type": variant_type,
+        }
+        for width, height in sizes
+        for _, variant_type, extension, _ in formats
+    ]
+    if existing and await db.call(bucket.exists, variants[-1]["path"]):
+        return _manifest(variants)
+
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(_get_pool(), _render_variants, source_path)
+    try:
+        await asyncio.gather(*(
+            db.call(
+                bucket.upload,
+                path=variant["path"],
+                file=path,
+                file_options={"content-type": variant["content_type"], "upsert": "true"},
+                timeout=db.STORAGE_TIMEOUT,
+            )
+            for variant, (_, path) in zip(variants, rendered)
+        ))
+    finally:
+        for _, path in rendered:
+            os.unlink(path)
+    return _manifest(variants)
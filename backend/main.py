@@ -1,18 +1,66 @@
-from fastapi import FastAPI, HTTPException, Depends, Header, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Header, UploadFile, File, Response, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError
+from typing import Awaitable, Dict, List, Literal, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import base64
+import json
+import logging
+import math
 import uvicorn
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+import auth
+import db
+import http_pool
+import metrics
+from http_cache import HTTPCacheMiddleware, NO_STORE, PUBLIC
+from cache import cache
+from changes import change_hub
+from content_versions import content_versions
+from contact_queue import ContactGuard, ContactQueue, ContactQueueFull
+from responses import EncodedBody, encode_body, encoded_response
+from search import SearchIndex
+from snapshots import StaleMarkerMiddleware, snapshot_store
+from uploads import UploadLimitMiddleware, UploadTooLarge, store_upload
+from warmup import warmup
+
 # Load environment variables
 load_dotenv()
 
+# Module loggers (db, snapshots, images) report degraded-mode events
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(levelname)s:     %(name)s: %(message)s")
+# httpx logs every Supabase request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 app = FastAPI(title="Portfolio API with Database", version="2.0.0")
 
+# Reject oversized uploads while they stream in (added first so CORS wraps it)
+app.add_middleware(UploadLimitMiddleware)
+
+# Flag responses served from the local snapshot store (see snapshots.py)
+app.add_middleware(StaleMarkerMiddleware)
+
+# Cache-Control per route (first matching prefix wins), ETag/304 and
+# compression for every response; see http_cache.py
+CACHE_RULES = [
+    ("/api/admin", NO_STORE),
+    ("/api/upload", NO_STORE),
+    ("/api/contact", NO_STORE),
+    ("/health", NO_STORE),
+    ("/ready", NO_STORE),
+    ("/metrics", NO_STORE),
+    ("/api/changes", NO_STORE),
+    ("/api", PUBLIC),
+]
+app.add_middleware(HTTPCacheMiddleware, rules=CACHE_RULES)
+
+# Latency histograms and DB round trips per route, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware, routes=app.routes, streaming_routes=["/api/changes"])
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,12 +72,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
-
-# Supabase client
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
+    expose_headers=["X-Data-Stale"],
 )
 
 # Health check endpoint for uptime monitoring
@@ -42,21 +85,34 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "portfolio-api"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 while a warm-up step has failed or is still running"""
+    warmup.retry_failed()
+    status = warmup.stats()
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=status)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus metrics (requires METRICS_TOKEN as a bearer token when set)"""
+    if metrics.METRICS_TOKEN and authorization != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
 # Admin authentication
-def verify_admin_token(authorization: Optional[str] = Header(None)):
-    """Verify admin authentication token using Supabase Auth"""
+async def verify_admin_token(authorization: Optional[str] = Header(None)):
+    """Verify admin authentication token (locally when possible, else via Supabase Auth)"""
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
     
     try:
         # Extract token from "Bearer <token>"
         token = authorization.split(" ")[1]
-        user = supabase.auth.get_user(token)
+        user = await auth.verify_token(token)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid token")
         return user
-    except Exception as e:
-        print(f"Auth error: {e}")
+    except Exception:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
 
 # Models
@@ -224,6 +280,304 @@ class AdminLogin(BaseModel):
     username: str
     password: str
 
+# Cached public reads
+# Each helper returns the rows a public route serves; results are cached per
+# table and query parameters until an admin mutation invalidates that table.
+# The last good result is also kept in the snapshot store and served (marked
+# stale) if Supabase is down or slow.
+def read_through(table: str, key, loader):
+    return cache.get_or_load(table, key, lambda: snapshot_store.load(table, key, loader))
+
+async def fetch_projects(featured: Optional[bool] = None) -> List[dict]:
+    filters = {}
+    if featured is not None:
+        filters["featured"] = featured
+    
+    # Filter out hidden projects for public API
+    filters["is_hidden"] = False
+    
+    return await read_through(
+        "projects", featured, lambda: db.select("projects", eq=filters, order="id")
+    )
+
+async def fetch_experience() -> List[dict]:
+    return await read_through(
+        "experience", None, lambda: db.select("experience", eq={"is_hidden": False}, order="id", desc=True)
+    )
+
+async def fetch_education() -> List[dict]:
+    return await read_through(
+        "education", None, lambda: db.select("education", eq={"is_hidden": False}, order="id", desc=True)
+    )
+
+async def fetch_certificates() -> List[dict]:
+    return await read_through(
+        "certificates", None, lambda: db.select("certificates", eq={"is_hidden": False}, order="id", desc=True)
+    )
+
+async def fetch_category_index() -> Dict[str, bool]:
+    """Map of skill category name -> is_hidden, kept current by the skill-category admin routes"""
+    async def load():
+        rows = await db.select("skill_categories", "name,is_hidden")
+        return {row["name"]: row["is_hidden"] for row in rows}
+
+    return await read_through("skill_categories", "index", load)
+
+async def fetch_skills(category: Optional[str] = None) -> List[dict]:
+    filters = {}
+    if category:
+        filters["category"] = category
+        
+    # Filter out hidden skills for public API
+    filters["is_hidden"] = False
+    
+    skills, category_index = await asyncio.gather(
+        read_through("skills", category or None, lambda: db.select("skills", eq=filters, order="id")),
+        fetch_category_index(),
+    )
+    
+    # Also filter out skills belonging to hidden categories
+    return [skill for skill in skills if not category_index.get(skill["category"], False)]
+
+async def fetch_skill_category_names() -> List[str]:
+    """Names of visible categories that have at least one visible skill"""
+    skills, category_index = await asyncio.gather(fetch_skills(), fetch_category_index())
+    return list(dict.fromkeys(
+        skill["category"] for skill in skills if skill["category"] in category_index
+    ))
+
+async def fetch_skill_categories() -> List[dict]:
+    # Filter out hidden categories for public API
+    return await read_through(
+        "skill_categories", None, lambda: db.select("skill_categories", eq={"is_hidden": False}, order="name")
+    )
+
+async def fetch_site_settings() -> List[dict]:
+    return await read_through("site_settings", None, lambda: db.select("site_settings", eq={"id": 1}))
+
+async def fetch_about_me() -> List[dict]:
+    return await read_through("about_me", None, lambda: db.select("about_me", eq={"id": 1}))
+
+# Portfolio snapshot
+# The whole visible portfolio as one pre-encoded JSON document, built from the
+# cached reads above and rebuilt in the background after any admin mutation
+PORTFOLIO_TABLES = [
+    "projects", "experience", "education", "certificates",
+    "skills", "skill_categories", "site_settings", "about_me",
+]
+cache.add_dependency("portfolio", PORTFOLIO_TABLES)
+_background_tasks = set()
+
+async def build_portfolio_snapshot() -> EncodedBody:
+    """Encode the current visible portfolio (with compressed variants)"""
+    (projects, experience, education, certificates,
+     skills, skill_categories, settings, about) = await asyncio.gather(
+        fetch_projects(), fetch_experience(), fetch_education(), fetch_certificates(),
+        fetch_skills(), fetch_skill_category_names(), fetch_site_settings(), fetch_about_me(),
+    )
+    snapshot = {
+        "site_settings": SiteSettings(**settings[0]).model_dump() if settings else None,
+        "about_me": AboutMe(**about[0]).model_dump() if about else None,
+        "projects": [Project(**p).model_dump() for p in projects],
+        "experience": [Experience(**e).model_dump() for e in experience],
+        "education": [Education(**e).model_dump() for e in education],
+        "certificates": [Certificate(**c).model_dump() for c in certificates],
+        "skills": [Skill(**s).model_dump() for s in skills],
+        # Same categories as /api/skills/categories
+        "skill_categories": skill_categories,
+    }
+    return encode_body(snapshot)
+
+async def fetch_portfolio_snapshot() -> EncodedBody:
+    return await cache.get_or_load("portfolio", None, build_portfolio_snapshot)
+
+async def _refresh_portfolio_snapshot():
+    try:
+        await fetch_portfolio_snapshot()
+    except Exception as e:
+        print(f"Error rebuilding portfolio snapshot: {e}")
+
+def _schedule_portfolio_rebuild(names):
+    if "portfolio" not in names:
+        return
+    try:
+        task = asyncio.get_running_loop().create_task(_refresh_portfolio_snapshot())
+    except RuntimeError:
+        # No running loop; the next request rebuilds it
+        return
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+cache.add_listener(_schedule_portfolio_rebuild)
+
+@app.on_event("shutdown")
+def save_snapshots():
+    snapshot_store.flush()
+
+# Pre-encoded public responses
+# Validated and JSON-encoded once per content version, with gzip/brotli
+# variants (see responses.py), and served as raw bytes. Each is dropped
+# whenever a table it is built from changes.
+ENCODED_RESPONSE_TABLES = {
+    "projects": ["projects"],
+    "experience": ["experience"],
+    "education": ["education"],
+    "certificates": ["certificates"],
+    "skills": ["skills", "skill_categories"],
+    "skill_categories": ["skill_categories"],
+    "skill_category_names": ["skills", "skill_categories"],
+    "site_settings": ["site_settings"],
+    "about_me": ["about_me"],
+    "technologies": ["projects"],
+}
+for _name, _tables in ENCODED_RESPONSE_TABLES.items():
+    cache.add_dependency(f"encoded:{_name}", _tables)
+
+async def fetch_encoded(name: str, key, fetch) -> Optional[EncodedBody]:
+    """Cached encoding of ``await fetch()``; None (not found) is cached too"""
+    async def build():
+        content = await fetch()
+        return None if content is None else encode_body(content)
+
+    return await cache.get_or_load(f"encoded:{name}", key, build)
+
+async def fetch_validated(model, rows: Awaitable[List[dict]]) -> List[dict]:
+    # The same validation FastAPI's response_model would apply per request
+    return [model(**row).model_dump() for row in await rows]
+
+async def fetch_validated_one(model, rows: Awaitable[List[dict]]) -> Optional[dict]:
+    rows = await rows
+    return model(**rows[0]).model_dump() if rows else None
+
+def send_encoded(request: Request, encoded: EncodedBody, headers: Optional[dict] = None) -> Response:
+    return encoded_response(
+        encoded, request.headers.get("accept-encoding"), request.headers.get("if-none-match"), headers
+    )
+
+# The body each public route serves (also prefetched by the startup warm-up)
+async def encoded_projects(featured: Optional[bool] = None, technology: Optional[str] = None) -> EncodedBody:
+    if technology:
+        return await fetch_encoded(
+            "projects", (featured, technology.lower()), lambda: fetch_projects_using(technology, featured)
+        )
+    return await fetch_encoded("projects", featured, lambda: fetch_validated(Project, fetch_projects(featured)))
+
+async def encoded_technologies() -> EncodedBody:
+    async def fetch():
+        await search_index.ready(["projects"])
+        return [
+            {"technology": technology, "count": count}
+            for technology, count in search_index.facet_counts("projects", "technologies")
+        ]
+
+    return await fetch_encoded("technologies", None, fetch)
+
+async def encoded_experience() -> EncodedBody:
+    return await fetch_encoded("experience", None, lambda: fetch_validated(Experience, fetch_experience()))
+
+async def encoded_education() -> EncodedBody:
+    return await fetch_encoded("education", None, lambda: fetch_validated(Education, fetch_education()))
+
+async def encoded_certificates() -> EncodedBody:
+    return await fetch_encoded("certificates", None, lambda: fetch_validated(Certificate, fetch_certificates()))
+
+async def encoded_skills(category: Optional[str] = None) -> EncodedBody:
+    return await fetch_encoded(
+        "skills", category or None, lambda: fetch_validated(Skill, fetch_skills(category))
+    )
+
+async def encoded_skill_categories() -> EncodedBody:
+    return await fetch_encoded(
+        "skill_categories", None, lambda: fetch_validated(SkillCategory, fetch_skill_categories())
+    )
+
+async def encoded_skill_category_names() -> EncodedBody:
+    async def fetch():
+        return {"categories": await fetch_skill_category_names()}
+
+    return await fetch_encoded("skill_category_names", None, fetch)
+
+async def encoded_site_settings() -> Optional[EncodedBody]:
+    return await fetch_encoded(
+        "site_settings", None, lambda: fetch_validated_one(SiteSettings, fetch_site_settings())
+    )
+
+async def encoded_about_me() -> Optional[EncodedBody]:
+    return await fetch_encoded("about_me", None, lambda: fetch_validated_one(AboutMe, fetch_about_me()))
+
+# Full-text search (see search.py) over the same visible rows the public
+# routes serve; a type is re-indexed when a table it is built from changes
+SEARCH_TABLES = {
+    "projects": ["projects"],
+    "experience": ["experience"],
+    "certificates": ["certificates"],
+    "skills": ["skills", "skill_categories"],
+}
+search_index = SearchIndex(
+    sources={
+        "projects": lambda: fetch_validated(Project, fetch_projects()),
+        "experience": lambda: fetch_validated(Experience, fetch_experience()),
+        "certificates": lambda: fetch_validated(Certificate, fetch_certificates()),
+        "skills": lambda: fetch_validated(Skill, fetch_skills()),
+    },
+    fields={
+        "projects": {"title": 3.0, "technologies": 2.0, "description": 1.0},
+        "experience": {"title": 3.0, "company": 2.0, "description": 1.0},
+        "certificates": {"title": 3.0, "issuer": 2.0, "description": 1.0},
+        "skills": {"name": 3.0, "category": 1.0},
+    },
+    max_age=cache.ttl,
+    # Technology -> project ids, for ?technology= and the per-technology counts
+    facets={"projects": ["technologies"]},
+)
+
+async def fetch_projects_using(technology: str, featured: Optional[bool] = None) -> List[dict]:
+    """Visible projects listing ``technology`` (any case), answered from the facet index"""
+    await search_index.ready(["projects"])
+    projects = search_index.rows("projects", search_index.facet_ids("projects", "technologies", technology))
+    if featured is not None:
+        projects = [project for project in projects if project["featured"] == featured]
+    return projects
+
+def _reindex_search(names):
+    doc_types = [doc_type for doc_type, tables in SEARCH_TABLES.items() if names.intersection(tables)]
+    if not doc_types:
+        return
+    try:
+        search_index.mark_dirty(doc_types)
+    except RuntimeError:
+        # No running loop; the next search reloads them
+        return
+
+cache.add_listener(_reindex_search)
+
+# Startup warm-up (see warmup.py): open the database client and load the
+# public content before the server accepts its first connection
+WARMUP_STEPS = {
+    "database": db.connect,
+    "auth_keys": auth.prefetch_keys,
+    "site_settings": encoded_site_settings,
+    "about_me": encoded_about_me,
+    "projects": encoded_projects,
+    "experience": encoded_experience,
+    "education": encoded_education,
+    "certificates": encoded_certificates,
+    "skills": encoded_skills,
+    "skill_categories": encoded_skill_categories,
+    "skill_category_names": encoded_skill_category_names,
+    "portfolio": fetch_portfolio_snapshot,
+    "search_index": lambda: search_index.ready(list(SEARCH_TABLES)),
+}
+
+@app.on_event("startup")
+async def start_content_versions():
+    # Before the warm-up, so writes made while it loads are not missed
+    await content_versions.start(apply_remote_changes)
+
+@app.on_event("startup")
+async def warm_up():
+    await warmup.run(WARMUP_STEPS)
+
 # Routes
 @app.get("/")
 async def root():
@@ -232,9 +586,11 @@ async def root():
         "version": "2.0.0",
         "database": "Supabase Connected ✅",
         "endpoints": {
+            "portfolio": "/api/portfolio",
             "projects": "/api/projects",
             "skills": "/api/skills",
             "experience": "/api/experience",
+            "search": "/api/search",
             "contact": "/api/contact",
             "admin": "/api/admin/*"
         }
@@ -242,30 +598,31 @@ async def root():
 
 # Projects endpoints
 @app.get("/api/projects", response_model=List[Project])
-async def get_projects(featured: Optional[bool] = None):
-    """Get all projects or filter by featured status"""
+async def get_projects(request: Request, featured: Optional[bool] = None, technology: Optional[str] = None):
+    """Get all projects, optionally only featured ones or those using a technology"""
     try:
-        query = supabase.table("projects").select("*").order("id")
-        if featured is not None:
-            query = query.eq("featured", featured)
-        
-        # Filter out hidden projects for public API
-        query = query.eq("is_hidden", False)
-        
-        response = query.execute()
-        return response.data
+        return send_encoded(request, await encoded_projects(featured, technology))
     except Exception as e:
         print(f"Error fetching projects: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/projects/technologies")
+async def get_project_technologies(request: Request):
+    """Number of visible projects per technology, most used first"""
+    try:
+        return send_encoded(request, await encoded_technologies())
+    except Exception as e:
+        print(f"Error fetching technologies: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/projects/{project_id}", response_model=Project)
 async def get_project(project_id: int):
     """Get a specific project by ID"""
     try:
-        response = supabase.table("projects").select("*").eq("id", project_id).execute()
-        if not response.data:
+        rows = await db.select("projects", eq={"id": project_id})
+        if not rows:
             raise HTTPException(status_code=404, detail="Project not found")
-        return response.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -274,117 +631,258 @@ async def get_project(project_id: int):
 
 # Experience endpoints
 @app.get("/api/experience", response_model=List[Experience])
-async def get_experience():
+async def get_experience(request: Request):
     """Get all experience items"""
     try:
-        # Filter out hidden experience for public API
-        response = supabase.table("experience").select("*").eq("is_hidden", False).order("id", desc=True).execute()
-        return response.data
+        return send_encoded(request, await encoded_experience())
     except Exception as e:
         print(f"Error fetching experience: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Skills endpoints
 @app.get("/api/skills", response_model=List[Skill])
-async def get_skills(category: Optional[str] = None):
+async def get_skills(request: Request, category: Optional[str] = None):
     """Get all skills or filter by category"""
     try:
-        query = supabase.table("skills").select("*").order("id")
-        if category:
-            query = query.eq("category", category)
-            
-        # Filter out hidden skills for public API
-        query = query.eq("is_hidden", False)
-        
-        response = query.execute()
-        
-        # Also filter out skills belonging to hidden categories
-        # Get hidden categories
-        hidden_categories_response = supabase.table("skill_categories").select("name").eq("is_hidden", True).execute()
-        hidden_category_names = [cat["name"] for cat in hidden_categories_response.data]
-        
-        # Filter skills
-        visible_skills = [skill for skill in response.data if skill["category"] not in hidden_category_names]
-        
-        return visible_skills
+        return send_encoded(request, await encoded_skills(category))
     except Exception as e:
         print(f"Error fetching skills: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/skill-categories", response_model=List[SkillCategory])
-async def get_skill_categories():
+async def get_skill_categories(request: Request):
     """Get all skill categories"""
     try:
-        # Filter out hidden categories for public API
-        response = supabase.table("skill_categories").select("*").eq("is_hidden", False).order("name").execute()
-        return response.data
+        return send_encoded(request, await encoded_skill_categories())
     except Exception as e:
         print(f"Error fetching skill categories: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/skills/categories")
-async def get_skill_categories_legacy():
+async def get_skill_categories_legacy(request: Request):
     """Get all unique skill categories"""
     try:
-        # Only get categories from visible skills and visible categories
-        # First get visible categories
-        cat_response = supabase.table("skill_categories").select("name").eq("is_hidden", False).execute()
-        visible_categories = [c["name"] for c in cat_response.data]
-        
-        # Then get skills that are not hidden
-        response = supabase.table("skills").select("category").eq("is_hidden", False).execute()
-        
-        # Filter categories that are both in visible_categories AND have visible skills
-        categories = list(set(skill["category"] for skill in response.data if skill["category"] in visible_categories))
-        return {"categories": categories}
+        # Only categories that are visible AND have visible skills
+        return send_encoded(request, await encoded_skill_category_names())
     except Exception as e:
         print(f"Error fetching categories: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Portfolio snapshot endpoint
+@app.get("/api/portfolio")
+async def get_portfolio(request: Request):
+    """Get the whole visible portfolio in one response (supports If-None-Match)"""
+    try:
+        encoded = await fetch_portfolio_snapshot()
+    except Exception as e:
+        print(f"Error building portfolio snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return send_encoded(request, encoded)
+
+# Search endpoint
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    doc_type: Optional[Literal["projects", "experience", "certificates", "skills"]] = Query(None, alias="type"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Search visible projects, experience, certificates and skills, best matches first"""
+    doc_types = [doc_type] if doc_type else list(SEARCH_TABLES)
+    try:
+        await search_index.ready(doc_types)
+    except Exception as e:
+        print(f"Error loading search index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    total, items = search_index.search(q, doc_types, limit, offset)
+    return {
+        "query": q,
+        "total": total,
+        "items": items,
+        "next_offset": offset + limit if offset + limit < total else None,
+    }
+
+# Change feed
+# Admin mutations go through record_change(s): the cached reads of the
+# changed tables are dropped in every worker (see content_versions.py), and
+# one event per changed row is published to the SSE stream (see changes.py)
+def invalidate_everywhere(*tables: str) -> None:
+    cache.invalidate(*tables)
+    content_versions.publish(tables)
+
+def record_changes(changes: Dict[str, List[dict]]) -> None:
+    invalidate_everywhere(*changes)
+    for table, rows in changes.items():
+        change_hub.publish(table, [row["id"] for row in rows])
+
+def record_change(table: str, rows: List[dict]) -> None:
+    record_changes({table: rows})
+
+# Tables that are not public content and never appear in the change feed
+PRIVATE_TABLES = {"contact_messages"}
+
+def apply_remote_changes(tables):
+    """Invalidate tables changed by another worker and tell this worker's streams"""
+    cache.invalidate(*tables)
+    for table in sorted(tables - PRIVATE_TABLES):
+        # The changed rows are not known here
+        change_hub.publish(table, [None])
+
+@app.get("/api/changes")
+async def stream_changes(last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events stream of {table, id, version} for every admin edit"""
+    if change_hub.closed or change_hub.full:
+        raise HTTPException(status_code=503, detail="Change feed unavailable", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        change_hub.stream(last_event_id),
+        media_type="text/event-stream",
+        # Tell nginx-style proxies not to buffer the stream
+        headers={"X-Accel-Buffering": "no"},
+    )
+
 # Contact endpoint
+# Messages are acknowledged once queued and written to the database in batches
+contact_guard = ContactGuard()
+contact_queue = ContactQueue(on_flush=lambda: invalidate_everywhere("contact_messages"))
+
+# Number of reverse proxies in front of the API whose X-Forwarded-For entries
+# can be trusted (0 = use the socket address)
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+def client_ip(request: Request) -> str:
+    forwarded = request.headers.get("x-forwarded-for")
+    if TRUSTED_PROXY_HOPS and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",")]
+        return hops[-min(TRUSTED_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else "unknown"
+
+@app.on_event("startup")
+def start_contact_queue():
+    # Replays messages journaled during an outage before this process started
+    contact_queue.start()
+
+@app.on_event("shutdown")
+async def flush_contact_queue():
+    await contact_queue.close()
+
+# After the contact queue flush, which may still publish an invalidation
+@app.on_event("shutdown")
+async def close_content_versions():
+    await content_versions.close()
+
+# Registered after the contact queue flush, which still needs the pool
+@app.on_event("shutdown")
+def close_http_pool():
+    http_pool.close()
+
 @app.post("/api/contact")
-async def submit_contact(message: ContactMessage):
+async def submit_contact(message: ContactMessage, request: Request):
     """Handle contact form submission"""
+    retry_after = contact_guard.retry_after(client_ip(request), message.email)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many messages. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    
+    data = {
+        "name": message.name,
+        "email": message.email,
+        "subject": message.subject,
+        "message": message.message,
+        "read": False,
+        # Set here so a batched or journaled write keeps the real arrival time
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+    # Exact repeats are acknowledged but never reach the database
+    if not contact_guard.is_duplicate(data):
+        try:
+            contact_queue.submit(data)
+        except ContactQueueFull:
+            raise HTTPException(status_code=503, detail="Too many messages right now. Please try again later.")
+        contact_guard.remember(data)
+    
+    return {
+        "success": True,
+        "message": "Thank you for your message! I'll get back to you soon.",
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Admin endpoints
+
+
+# Inbox listing leaves out the message body; it is loaded when a message is opened
+MESSAGE_LIST_COLUMNS = "id,name,email,subject,timestamp,read"
+MESSAGE_SEARCH_COLUMNS = ["name", "email", "subject", "message"]
+
+def encode_message_cursor(row: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps([row["timestamp"], row["id"]]).encode()).decode()
+
+def decode_message_cursor(cursor: str) -> list:
     try:
-        data = {
-            "name": message.name,
-            "email": message.email,
-            "subject": message.subject,
-            "message": message.message,
-            "read": False
-        }
-        response = supabase.table("contact_messages").insert(data).execute()
-        
-        print(f"✅ New contact message from {message.name} ({message.email})")
-        print(f"   Subject: {message.subject}")
+        timestamp, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [str(timestamp), int(message_id)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/admin/messages", dependencies=[Depends(verify_admin_token)])
+async def get_all_messages(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[Literal["read", "unread"]] = None,
+    q: Optional[str] = None,
+    include_body: bool = False,
+):
+    """Get contact messages newest first, one page at a time (admin only)"""
+    keyset = decode_message_cursor(cursor) if cursor else None
+    try:
+        filters = {}
+        if status:
+            filters["read"] = status == "read"
         
+        # Keyset pagination on (timestamp, id); fetch one extra row to know if there is a next page
+        rows = await db.select(
+            "contact_messages",
+            "*" if include_body else MESSAGE_LIST_COLUMNS,
+            eq=filters,
+            order=["timestamp", "id"],
+            desc=True,
+            limit=limit + 1,
+            keyset=keyset,
+            search=(MESSAGE_SEARCH_COLUMNS, q) if q else None,
+        )
+        page = rows[:limit]
         return {
-            "success": True,
-            "message": "Thank you for your message! I'll get back to you soon.",
-            "timestamp": datetime.now().isoformat()
+            "items": page,
+            "next_cursor": encode_message_cursor(page[-1]) if len(rows) > limit else None,
         }
     except Exception as e:
-        print(f"Error saving contact message: {e}")
+        print(f"Error fetching messages: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Admin endpoints
-
-
-@app.get("/api/admin/messages", dependencies=[Depends(verify_admin_token)])
-async def get_all_messages():
-    """Get all contact messages (admin only)"""
+@app.get("/api/admin/messages/{message_id}", dependencies=[Depends(verify_admin_token)])
+async def get_message(message_id: int):
+    """Get a single contact message including its body (admin only)"""
     try:
-        response = supabase.table("contact_messages").select("*").order("timestamp", desc=True).execute()
-        return response.data
+        rows = await db.select("contact_messages", eq={"id": message_id})
+        if not rows:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return rows[0]
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error fetching messages: {e}")
+        print(f"Error fetching message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.patch("/api/admin/messages/{message_id}/read", dependencies=[Depends(verify_admin_token)])
 async def mark_message_read(message_id: int):
     """Mark a message as read"""
     try:
-        response = supabase.table("contact_messages").update({"read": True}).eq("id", message_id).execute()
+        await db.update("contact_messages", {"read": True}, eq={"id": message_id})
+        invalidate_everywhere("contact_messages")
         return {"success": True}
     except Exception as e:
         print(f"Error marking message as read: {e}")
@@ -394,7 +892,8 @@ async def mark_message_read(message_id: int):
 async def delete_message(message_id: int):
     """Delete a contact message"""
     try:
-        response = supabase.table("contact_messages").delete().eq("id", message_id).execute()
+        await db.delete("contact_messages", eq={"id": message_id})
+        invalidate_everywhere("contact_messages")
         return {"success": True}
     except Exception as e:
         print(f"Error deleting message: {e}")
@@ -405,8 +904,7 @@ async def delete_message(message_id: int):
 async def get_all_projects_admin():
     """Get all projects including hidden ones (admin only)"""
     try:
-        response = supabase.table("projects").select("*").order("id").execute()
-        return response.data
+        return await db.select("projects", order="id")
     except Exception as e:
         print(f"Error fetching projects: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -415,8 +913,7 @@ async def get_all_projects_admin():
 async def get_all_skills_admin():
     """Get all skills including hidden ones (admin only)"""
     try:
-        response = supabase.table("skills").select("*").order("id").execute()
-        return response.data
+        return await db.select("skills", order="id")
     except Exception as e:
         print(f"Error fetching skills: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -425,8 +922,7 @@ async def get_all_skills_admin():
 async def get_all_experience_admin():
     """Get all experience including hidden ones (admin only)"""
     try:
-        response = supabase.table("experience").select("*").order("id", desc=True).execute()
-        return response.data
+        return await db.select("experience", order="id", desc=True)
     except Exception as e:
         print(f"Error fetching experience: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -435,8 +931,7 @@ async def get_all_experience_admin():
 async def get_all_education_admin():
     """Get all education including hidden ones (admin only)"""
     try:
-        response = supabase.table("education").select("*").order("id", desc=True).execute()
-        return response.data
+        return await db.select("education", order="id", desc=True)
     except Exception as e:
         print(f"Error fetching education: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -445,8 +940,7 @@ async def get_all_education_admin():
 async def get_all_certificates_admin():
     """Get all certificates including hidden ones (admin only)"""
     try:
-        response = supabase.table("certificates").select("*").order("id", desc=True).execute()
-        return response.data
+        return await db.select("certificates", order="id", desc=True)
     except Exception as e:
         print(f"Error fetching certificates: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -455,20 +949,50 @@ async def get_all_certificates_admin():
 async def get_all_skill_categories_admin():
     """Get all skill categories including hidden ones (admin only)"""
     try:
-        response = supabase.table("skill_categories").select("*").order("name").execute()
-        return response.data
+        return await db.select("skill_categories", order="name")
     except Exception as e:
         print(f"Error fetching skill categories: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/admin/site-settings", dependencies=[Depends(verify_admin_token)])
+async def get_site_settings_admin():
+    """Get site settings straight from the database (admin only)"""
+    try:
+        rows = await db.select("site_settings", eq={"id": 1})
+        if not rows:
+            raise HTTPException(status_code=404, detail="Site settings not found")
+        return rows[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching site settings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admin/about-me", dependencies=[Depends(verify_admin_token)])
+async def get_about_me_admin():
+    """Get the About Me section straight from the database (admin only)"""
+    try:
+        rows = await db.select("about_me", eq={"id": 1})
+        if not rows:
+            raise HTTPException(status_code=404, detail="About me not found")
+        return rows[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching about me: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/admin/projects", dependencies=[Depends(verify_admin_token)])
 async def create_project(project: ProjectCreate):
     """Create a new project"""
     try:
         data = project.dict()
-        response = supabase.table("projects").insert(data).execute()
-        return response.data[0]
+        rows = await db.insert("projects", data)
+        record_change("projects", rows)
+        return rows[0]
     except Exception as e:
         print(f"Error creating project: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -478,10 +1002,11 @@ async def update_project(project_id: int, project: ProjectCreate):
     """Update an existing project"""
     try:
         data = project.dict()
-        response = supabase.table("projects").update(data).eq("id", project_id).execute()
-        if not response.data:
+        rows = await db.update("projects", data, eq={"id": project_id})
+        record_change("projects", rows)
+        if not rows:
             raise HTTPException(status_code=404, detail="Project not found")
-        return response.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -492,7 +1017,8 @@ async def update_project(project_id: int, project: ProjectCreate):
 async def delete_project(project_id: int):
     """Delete a project"""
     try:
-        response = supabase.table("projects").delete().eq("id", project_id).execute()
+        rows = await db.delete("projects", eq={"id": project_id})
+        record_change("projects", rows)
         return {"success": True}
     except Exception as e:
         print(f"Error deleting project: {e}")
@@ -503,8 +1029,9 @@ async def create_skill(skill: SkillCreate):
     """Create a new skill"""
     try:
         data = skill.dict()
-        response = supabase.table("skills").insert(data).execute()
-        return response.data[0]
+        rows = await db.insert("skills", data)
+        record_change("skills", rows)
+        return rows[0]
     except Exception as e:
         print(f"Error creating skill: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -514,10 +1041,11 @@ async def update_skill(skill_id: int, skill: SkillCreate):
     """Update an existing skill"""
     try:
         data = skill.dict()
-        response = supabase.table("skills").update(data).eq("id", skill_id).execute()
-        if not response.data:
+        rows = await db.update("skills", data, eq={"id": skill_id})
+        record_change("skills", rows)
+        if not rows:
             raise HTTPException(status_code=404, detail="Skill not found")
-        return response.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -528,7 +1056,8 @@ async def update_skill(skill_id: int, skill: SkillCreate):
 async def delete_skill(skill_id: int):
     """Delete a skill"""
     try:
-        response = supabase.table("skills").delete().eq("id", skill_id).execute()
+        rows = await db.delete("skills", eq={"id": skill_id})
+        record_change("skills", rows)
         return {"success": True}
     except Exception as e:
         print(f"Error deleting skill: {e}")
@@ -539,8 +1068,9 @@ async def create_experience(experience: ExperienceCreate):
     """Create a new experience item"""
     try:
         data = experience.dict()
-        response = supabase.table("experience").insert(data).execute()
-        return response.data[0]
+        rows = await db.insert("experience", data)
+        record_change("experience", rows)
+        return rows[0]
     except Exception as e:
         print(f"Error creating experience: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -550,10 +1080,11 @@ async def update_experience(experience_id: int, experience: ExperienceCreate):
     """Update an existing experience item"""
     try:
         data = experience.dict()
-        response = supabase.table("experience").update(data).eq("id", experience_id).execute()
-        if not response.data:
+        rows = await db.update("experience", data, eq={"id": experience_id})
+        record_change("experience", rows)
+        if not rows:
             raise HTTPException(status_code=404, detail="Experience not found")
-        return response.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -564,7 +1095,8 @@ async def update_experience(experience_id: int, experience: ExperienceCreate):
 async def delete_experience(experience_id: int):
     """Delete an experience item"""
     try:
-        response = supabase.table("experience").delete().eq("id", experience_id).execute()
+        rows = await db.delete("experience", eq={"id": experience_id})
+        record_change("experience", rows)
         return {"success": True}
     except Exception as e:
         print(f"Error deleting experience: {e}")
@@ -572,29 +1104,29 @@ async def delete_experience(experience_id: int):
 
 # Education Endpoints
 @app.get("/api/education", response_model=List[Education])
-async def get_education():
+async def get_education(request: Request):
     try:
-        # Filter out hidden education for public API
-        response = supabase.table("education").select("*").eq("is_hidden", False).order("id", desc=True).execute()
-        return response.data
+        return send_encoded(request, await encoded_education())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/education", response_model=Education, dependencies=[Depends(verify_admin_token)])
 async def create_education(education: EducationCreate):
     try:
-        result = supabase.table("education").insert(education.dict()).execute()
-        return result.data[0]
+        rows = await db.insert("education", education.dict())
+        record_change("education", rows)
+        return rows[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/admin/education/{education_id}", response_model=Education, dependencies=[Depends(verify_admin_token)])
 async def update_education(education_id: int, education: EducationCreate):
     try:
-        result = supabase.table("education").update(education.dict()).eq("id", education_id).execute()
-        if not result.data:
+        rows = await db.update("education", education.dict(), eq={"id": education_id})
+        record_change("education", rows)
+        if not rows:
             raise HTTPException(status_code=404, detail="Education entry not found")
-        return result.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -603,29 +1135,22 @@ async def update_education(education_id: int, education: EducationCreate):
 @app.delete("/api/admin/education/{education_id}", dependencies=[Depends(verify_admin_token)])
 async def delete_education(education_id: int):
     try:
-        result = supabase.table("education").delete().eq("id", education_id).execute()
+        rows = await db.delete("education", eq={"id": education_id})
+        record_change("education", rows)
         return {"message": "Education deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/skill-categories", response_model=List[SkillCategory])
-async def get_skill_categories():
-    """Get all skill categories (public)"""
-    try:
-        # Filter out hidden categories for public API
-        response = supabase.table("skill_categories").select("*").eq("is_hidden", False).order("name").execute()
-        return response.data
-    except Exception as e:
-        print(f"Error fetching skill categories: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
 @app.post("/api/admin/skill-categories", dependencies=[Depends(verify_admin_token)])
 async def create_skill_category(category: SkillCategoryCreate):
     """Create a new skill category"""
     try:
         data = category.dict()
-        response = supabase.table("skill_categories").insert(data).execute()
-        return response.data[0]
+        rows = await db.insert("skill_categories", data)
+        # Skill visibility is read from the category index at request time,
+        # so only the category entries need to go
+        record_change("skill_categories", rows)
+        return rows[0]
     except Exception as e:
         print(f"Error creating skill category: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -635,22 +1160,26 @@ async def update_skill_category(category_id: int, category: SkillCategoryCreate)
     """Update a skill category name"""
     try:
         # Get old name first to update skills if needed
-        old_category = supabase.table("skill_categories").select("name").eq("id", category_id).execute()
-        if not old_category.data:
+        old_category = await db.select("skill_categories", "name", eq={"id": category_id})
+        if not old_category:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        old_name = old_category.data[0]["name"]
+        old_name = old_category[0]["name"]
         new_name = category.name
         
         # Update category with all fields from the request
         update_data = category.dict()
-        response = supabase.table("skill_categories").update(update_data).eq("id", category_id).execute()
+        rows = await db.update("skill_categories", update_data, eq={"id": category_id})
         
         # Update all skills associated with this category if name changed
+        changes = {"skill_categories": rows}
         if old_name != new_name:
-            supabase.table("skills").update({"category": new_name}).eq("category", old_name).execute()
+            changes["skills"] = await db.update("skills", {"category": new_name}, eq={"category": old_name})
+        record_changes(changes)
             
-        return response.data[0]
+        return rows[0]
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error updating skill category: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -660,35 +1189,42 @@ async def delete_skill_category(category_id: int, migrate_to: Optional[int] = No
     """Delete a skill category, optionally migrating skills to another category"""
     try:
         # Check if category has skills
-        category_response = supabase.table("skill_categories").select("name").eq("id", category_id).execute()
-        if not category_response.data:
+        category_rows = await db.select("skill_categories", "name", eq={"id": category_id})
+        if not category_rows:
             raise HTTPException(status_code=404, detail="Category not found")
         
-        category_name = category_response.data[0]["name"]
-        skills_response = supabase.table("skills").select("*").eq("category", category_name).execute()
+        category_name = category_rows[0]["name"]
+        migrated = 0
         
-        if skills_response.data:
-            # Has skills - require migration
-            if not migrate_to:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Category has {len(skills_response.data)} skills. Please specify a target category to migrate to."
-                )
+        if migrate_to:
+            if migrate_to == category_id:
+                raise HTTPException(status_code=400, detail="Cannot migrate skills to the category being deleted")
             
             # Get target category name
-            target_response = supabase.table("skill_categories").select("name").eq("id", migrate_to).execute()
-            if not target_response.data:
+            target_rows = await db.select("skill_categories", "name", eq={"id": migrate_to})
+            if not target_rows:
                 raise HTTPException(status_code=404, detail="Target category not found")
             
-            target_name = target_response.data[0]["name"]
+            target_name = target_rows[0]["name"]
             
-            # Migrate all skills to new category
-            for skill in skills_response.data:
-                supabase.table("skills").update({"category": target_name}).eq("id", skill["id"]).execute()
+            # Migrate all skills to new category in one set-based update
+            migrated_rows = await db.update("skills", {"category": target_name}, eq={"category": category_name})
+            migrated = len(migrated_rows)
+            if migrated:
+                record_change("skills", migrated_rows)
+        else:
+            # Has skills - require migration
+            skill_count = await db.count("skills", eq={"category": category_name})
+            if skill_count:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Category has {skill_count} skills. Please specify a target category to migrate to."
+                )
         
         # Delete category
-        supabase.table("skill_categories").delete().eq("id", category_id).execute()
-        return {"success": True, "migrated": len(skills_response.data) if skills_response.data else 0}
+        rows = await db.delete("skill_categories", eq={"id": category_id})
+        record_change("skill_categories", rows)
+        return {"success": True, "migrated": migrated}
     except HTTPException:
         raise
     except Exception as e:
@@ -697,29 +1233,29 @@ async def delete_skill_category(category_id: int, migrate_to: Optional[int] = No
 
 # Certificate Endpoints
 @app.get("/api/certificates", response_model=List[Certificate])
-async def get_certificates():
+async def get_certificates(request: Request):
     try:
-        # Filter out hidden certificates for public API
-        response = supabase.table("certificates").select("*").eq("is_hidden", False).order("id", desc=True).execute()
-        return response.data
+        return send_encoded(request, await encoded_certificates())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/admin/certificates", response_model=Certificate, dependencies=[Depends(verify_admin_token)])
 async def create_certificate(certificate: CertificateCreate):
     try:
-        result = supabase.table("certificates").insert(certificate.dict()).execute()
-        return result.data[0]
+        rows = await db.insert("certificates", certificate.dict())
+        record_change("certificates", rows)
+        return rows[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/admin/certificates/{certificate_id}", response_model=Certificate, dependencies=[Depends(verify_admin_token)])
 async def update_certificate(certificate_id: int, certificate: CertificateCreate):
     try:
-        result = supabase.table("certificates").update(certificate.dict()).eq("id", certificate_id).execute()
-        if not result.data:
+        rows = await db.update("certificates", certificate.dict(), eq={"id": certificate_id})
+        record_change("certificates", rows)
+        if not rows:
             raise HTTPException(status_code=404, detail="Certificate not found")
-        return result.data[0]
+        return rows[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -728,19 +1264,22 @@ async def update_certificate(certificate_id: int, certificate: CertificateCreate
 @app.delete("/api/admin/certificates/{certificate_id}", dependencies=[Depends(verify_admin_token)])
 async def delete_certificate(certificate_id: int):
     try:
-        result = supabase.table("certificates").delete().eq("id", certificate_id).execute()
+        rows = await db.delete("certificates", eq={"id": certificate_id})
+        record_change("certificates", rows)
         return {"message": "Certificate deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # Site Settings Endpoints
 @app.get("/api/site-settings", response_model=SiteSettings)
-async def get_site_settings():
+async def get_site_settings(request: Request):
     try:
-        response = supabase.table("site_settings").select("*").eq("id", 1).execute()
-        if response.data and len(response.data) > 0:
-            return response.data[0]
+        encoded = await encoded_site_settings()
+        if encoded:
+            return send_encoded(request, encoded)
         raise HTTPException(status_code=404, detail="Site settings not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -750,38 +1289,34 @@ async def update_site_settings(settings: SiteSettingsUpdate):
         # Convert settings to dict and filter out None values
         settings_dict = settings.dict(exclude_none=True)
         
-        print(f"DEBUG: Received settings: {settings_dict}")
-        
         # Ensure titles is properly formatted as a list for JSONB
         if 'titles' in settings_dict and settings_dict['titles'] is not None:
             # Make sure it's a list
             if not isinstance(settings_dict['titles'], list):
                 settings_dict['titles'] = [settings_dict['titles']]
-            print(f"DEBUG: Titles field: {settings_dict['titles']}")
         
-        print(f"DEBUG: Update data being sent to DB: {settings_dict}")
+        rows = await db.update("site_settings", settings_dict, eq={"id": 1})
+        record_change("site_settings", rows)
         
-        result = supabase.table("site_settings").update(settings_dict).eq("id", 1).execute()
-        
-        print(f"DEBUG: Database result: {result.data}")
-        
-        if result.data and len(result.data) > 0:
-            return result.data[0]
+        if rows:
+            return rows[0]
         raise HTTPException(status_code=404, detail="Site settings not found")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"DEBUG: Error updating settings: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"Error updating site settings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # About Me Endpoints
 @app.get("/api/about-me", response_model=AboutMe)
-async def get_about_me():
+async def get_about_me(request: Request):
     try:
-        response = supabase.table("about_me").select("*").eq("id", 1).execute()
-        if response.data and len(response.data) > 0:
-            return response.data[0]
+        encoded = await encoded_about_me()
+        if encoded:
+            return send_encoded(request, encoded)
         raise HTTPException(status_code=404, detail="About me content not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -790,68 +1325,244 @@ async def update_about_me(about: AboutMeUpdate):
     try:
         # Only update fields that are provided
         update_data = {k: v for k, v in about.dict().items() if v is not None}
-        result = supabase.table("about_me").update(update_data).eq("id", 1).execute()
-        if result.data and len(result.data) > 0:
-            return result.data[0]
+        rows = await db.update("about_me", update_data, eq={"id": 1})
+        record_change("about_me", rows)
+        if rows:
+            return rows[0]
         raise HTTPException(status_code=404, detail="About me content not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/admin/stats", dependencies=[Depends(verify_admin_token)])
-async def get_admin_stats():
-    """Get statistics for admin dashboard"""
-    try:
-        projects = supabase.table("projects").select("*", count="exact").execute()
-        featured = supabase.table("projects").select("*", count="exact").eq("featured", True).execute()
-        skills = supabase.table("skills").select("*", count="exact").execute()
+# Batch admin mutations
+# Many edits in one request: auth is checked once and the caches are dropped
+# once at the end. Operations are grouped per table into set-based
+# statements: every create becomes part of one multi-row insert, updates
+# making the same change (hide/show/feature toggles) one update over their
+# ids, and deletes one delete over their ids. Updates with different
+# changes run concurrently, one round trip each. Per table, creates run
+# before updates and updates before deletes.
+BATCH_MAX_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "200"))
+
+BATCH_MODELS = {
+    "projects": ProjectCreate,
+    "skills": SkillCreate,
+    "experience": ExperienceCreate,
+    "education": EducationCreate,
+    "certificates": CertificateCreate,
+}
+
+# Validators for single fields, used for partial updates
+BATCH_FIELDS = {
+    table: {name: TypeAdapter(field.annotation) for name, field in model.model_fields.items()}
+    for table, model in BATCH_MODELS.items()
+}
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    table: Literal["projects", "skills", "experience", "education", "certificates"]
+    id: Optional[int] = None
+    # The full item for create; only the changed fields for update
+    data: Optional[dict] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'data'}: {error['msg']}" for error in e.errors()
+    )
+
+def validate_batch_operation(operation: BatchOperation) -> Optional[dict]:
+    """The row or changes to write, validated like the single-item routes (ValueError if invalid)"""
+    if operation.op == "create":
+        return BATCH_MODELS[operation.table](**(operation.data or {})).model_dump()
+    if operation.id is None:
+        raise ValueError(f"{operation.op} needs an id")
+    if operation.op == "delete":
+        return None
+    if not operation.data:
+        raise ValueError("update needs at least one field in data")
+    fields = BATCH_FIELDS[operation.table]
+    unknown = sorted(set(operation.data) - set(fields))
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {operation.table}: {', '.join(unknown)}")
+    changes = {}
+    for name, value in operation.data.items():
         try:
-            experience = supabase.table("experience").select("*", count="exact").execute()
-            experience_count = experience.count
-        except:
-            experience_count = 0
-
-        messages = supabase.table("contact_messages").select("*", count="exact").execute()
-        unread = supabase.table("contact_messages").select("*", count="exact").eq("read", False).execute()
-        
+            changes[name] = fields[name].validate_python(value)
+        except ValidationError as e:
+            raise ValueError(f"{name}: {e.errors()[0]['msg']}")
+    return changes
+
+def batch_result(operation: BatchOperation, status: int, data=None, error: Optional[str] = None) -> dict:
+    result = {"op": operation.op, "table": operation.table, "id": operation.id, "status": status}
+    if data is not None:
+        result["data"] = data
+    if error is not None:
+        result["error"] = error
+    return result
+
+async def apply_table_batch(table: str, ops: Dict[str, list], results: list) -> List[dict]:
+    """Apply one table's (index, operation, payload) items; returns the changed rows"""
+    changed: List[dict] = []
+
+    creates = ops["create"]
+    if creates:
+        try:
+            rows = await db.insert(table, [payload for _, _, payload in creates])
+            for (index, operation, _), row in zip(creates, rows):
+                results[index] = batch_result(operation, 201, row)
+            changed.extend(rows)
+        except Exception as e:
+            print(f"Error in batch create on {table}: {e}")
+            for index, operation, _ in creates:
+                results[index] = batch_result(operation, 500, error=str(e))
+
+    # Updates making the same change share one statement
+    update_groups: Dict[str, list] = {}
+    for item in ops["update"]:
+        update_groups.setdefault(json.dumps(item[2], sort_keys=True, default=str), []).append(item)
+
+    async def apply_updates(items) -> List[dict]:
+        try:
+            rows = await db.update(table, items[0][2], in_={"id": [operation.id for _, operation, _ in items]})
+        except Exception as e:
+            print(f"Error in batch update on {table}: {e}")
+            for index, operation, _ in items:
+                results[index] = batch_result(operation, 500, error=str(e))
+            return []
+        by_id = {row["id"]: row for row in rows}
+        for index, operation, _ in items:
+            row = by_id.get(operation.id)
+            results[index] = (
+                batch_result(operation, 200, row) if row else batch_result(operation, 404, error="Not found")
+            )
+        return rows
+
+    for rows in await asyncio.gather(*(apply_updates(items) for items in update_groups.values())):
+        changed.extend(rows)
+
+    deletes = ops["delete"]
+    if deletes:
+        try:
+            rows = await db.delete(table, in_={"id": [operation.id for _, operation, _ in deletes]})
+            deleted = {row["id"] for row in rows}
+            for index, operation, _ in deletes:
+                results[index] = (
+                    batch_result(operation, 200) if operation.id in deleted
+                    else batch_result(operation, 404, error="Not found")
+                )
+            changed.extend(rows)
+        except Exception as e:
+            print(f"Error in batch delete on {table}: {e}")
+            for index, operation, _ in deletes:
+                results[index] = batch_result(operation, 500, error=str(e))
+
+    return changed
+
+@app.post("/api/admin/batch", dependencies=[Depends(verify_admin_token)])
+async def apply_batch(batch: BatchRequest):
+    """Apply many create/update/delete operations; results are returned per operation, in order"""
+    if len(batch.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+
+    results: List[Optional[dict]] = [None] * len(batch.operations)
+    groups: Dict[str, Dict[str, list]] = {}
+    for index, operation in enumerate(batch.operations):
+        try:
+            payload = validate_batch_operation(operation)
+        except ValidationError as e:
+            results[index] = batch_result(operation, 422, error=_validation_message(e))
+            continue
+        except ValueError as e:
+            results[index] = batch_result(operation, 422, error=str(e))
+            continue
+        ops = groups.setdefault(operation.table, {"create": [], "update": [], "delete": []})
+        ops[operation.op].append((index, operation, payload))
+
+    changed = await asyncio.gather(*(apply_table_batch(table, ops, results) for table, ops in groups.items()))
+    touched = {table: rows for table, rows in zip(groups, changed) if rows}
+    if touched:
+        record_changes(touched)
+
+    succeeded = sum(1 for result in results if result["status"] < 400)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+# Admin stats are count-only queries run concurrently and cached briefly;
+# writes to any counted table drop the cached result
+STATS_TTL = float(os.getenv("STATS_TTL", "30"))
+cache.add_dependency("admin_stats", ["projects", "skills", "experience", "contact_messages"])
+
+async def _count_experience() -> int:
+    try:
+        return await db.count("experience")
+    except Exception:
+        return 0
+
+async def fetch_admin_stats() -> dict:
+    async def load():
+        projects, featured, skills, experience_count, messages, unread = await asyncio.gather(
+            db.count("projects"),
+            db.count("projects", eq={"featured": True}),
+            db.count("skills"),
+            _count_experience(),
+            db.count("contact_messages"),
+            db.count("contact_messages", eq={"read": False}),
+        )
         return {
-            "total_projects": projects.count,
-            "featured_projects": featured.count,
-            "total_skills": skills.count,
+            "total_projects": projects,
+            "featured_projects": featured,
+            "total_skills": skills,
             "total_experience": experience_count,
-            "total_messages": messages.count,
-            "unread_messages": unread.count
+            "total_messages": messages,
+            "unread_messages": unread
         }
+
+    return await cache.get_or_load("admin_stats", None, load, ttl=STATS_TTL)
+
+@app.get("/api/admin/stats", dependencies=[Depends(verify_admin_token)])
+async def get_admin_stats():
+    """Get statistics for admin dashboard"""
+    try:
+        return await fetch_admin_stats()
     except Exception as e:
         print(f"Error fetching stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-if __name__ == "__main__":
-    print("🚀 Starting Portfolio API with Supabase Database...")
-    print(f"📊 Database URL: {os.getenv('SUPABASE_URL')}")
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+@app.get("/api/admin/cache-stats", dependencies=[Depends(verify_admin_token)])
+async def get_cache_stats():
+    """Get hit/miss counters for the public read and verified-token caches"""
+    return {
+        **cache.stats(),
+        "auth_tokens": auth.token_cache.stats(),
+        "snapshots": snapshot_store.stats(),
+        "warmup": warmup.stats(),
+        "search": search_index.stats(),
+        "changes": change_hub.stats(),
+        "content_versions": content_versions.stats(),
+        "database": db.breaker.stats(),
+        "http_pool": http_pool.stats(),
+        "contact_queue": {
+            **contact_queue.stats(),
+            "rate_limited": contact_guard.rate_limited,
+            "duplicates": contact_guard.duplicates,
+        },
+    }
+
 @app.post("/api/upload", dependencies=[Depends(verify_admin_token)])
 async def upload_file(file: UploadFile = File(...)):
-    """Upload a file to Supabase Storage"""
+    """Upload a file to Supabase Storage (stored under its content hash)"""
     try:
-        # Create unique filename
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        filename = f"{timestamp}_{file.filename}"
-        
-        # Read file content
-        content = await file.read()
-        
-        # Upload to Supabase Storage
-        bucket_name = "portfolio-assets"
-        result = supabase.storage.from_(bucket_name).upload(
-            path=filename,
-            file=content,
-            file_options={"content-type": file.content_type}
-        )
-        
-        # Get public URL
-        public_url = supabase.storage.from_(bucket_name).get_public_url(filename)
-        
-        return {"url": public_url}
+        return await store_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="File too large")
     except Exception as e:
         print(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+if __name__ == "__main__":
+    # Development server with auto-reload; production uses serve.py
+    print("🚀 Starting Portfolio API with Supabase Database...")
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,186 @@
+"""Request and database metrics, exposed in Prometheus format at ``/metrics``.
+
+- ``MetricsMiddleware`` records a latency histogram per route template,
+  method and status code, and how many database round trips each request
+  made. Long-lived streams (``/api/changes``) are left out of the latency
+  histogram, where their connection time would swamp the real requests.
+- ``db_timer`` wraps every table operation in ``db.py`` with a latency
+  histogram per table and operation.
+- The shared Supabase HTTP pool exports request and retry counts per
+  service and its requests in flight.
+- The database circuit breaker exports its state changes and rejected
+  calls, the snapshot store its stale serves per table, and image
+  processing its failed variant renders.
+- Requests slower than ``SLOW_REQUEST_MS`` (default 0 = off) are logged
+  with their database time and round-trip count. A ``TRACE_SAMPLE_RATE``
+  fraction of requests (default 0.1) also keep a per-call trace, which is
+  included in the slow log line.
+
+Set ``METRICS_TOKEN`` to require ``Authorization: Bearer <token>`` on
+``/metrics``. With several worker processes, point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty directory so every worker's
+samples are aggregated.
+"""
+import contextvars
+import os
+import random
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_ROUND_TRIPS = Histogram(
+    "http_request_db_round_trips", "Database round trips made while serving one request",
+    ["method", "route"], buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+DB_LATENCY = Histogram(
+    "db_operation_duration_seconds", "Database operation latency",
+    ["table", "operation"], buckets=LATENCY_BUCKETS,
+)
+DB_ERRORS = Counter("db_operation_errors_total", "Failed database operations", ["table", "operation"])
+
+# Shared Supabase HTTP pool (see http_pool.py); the in-flight gauge is read
+# from the pool at scrape time and is not aggregated across workers
+HTTP_CLIENT_REQUESTS = Counter("http_client_requests_total", "Requests sent to Supabase", ["service"])
+HTTP_CLIENT_RETRIES = Counter("http_client_retries_total", "Supabase requests retried after a failure", ["service"])
+HTTP_CLIENT_IN_FLIGHT = Gauge("http_client_in_flight", "Supabase requests in flight in the shared HTTP pool")
+
+# Degraded-mode signals (see db.py, snapshots.py, images.py)
+DB_CIRCUIT_TRANSITIONS = Counter(
+    "db_circuit_transitions_total", "Database circuit breaker state changes", ["state"],
+)
+DB_CIRCUIT_REJECTED = Counter("db_circuit_rejected_total", "Database calls rejected while the circuit was open")
+SNAPSHOT_STALE_SERVED = Counter(
+    "snapshot_stale_served_total", "Public reads served from a stored snapshot", ["table", "reason"],
+)
+IMAGE_VARIANT_ERRORS = Counter("image_variant_errors_total", "Uploads whose resized variants failed to render")
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+class RequestTrace:
+    """Database calls made while serving one request"""
+
+    __slots__ = ("round_trips", "db_seconds", "calls", "started", "closed")
+
+    def __init__(self, sampled: bool):
+        self.round_trips = 0
+        self.db_seconds = 0.0
+        # (offset ms, table, operation, duration ms) when sampled
+        self.calls: Optional[List[Tuple[float, str, str, float]]] = [] if sampled else None
+        self.started = time.perf_counter()
+        # Background tasks started by a request inherit its trace; stop
+        # counting once the response is done
+        self.closed = False
+
+    def record(self, table: str, operation: str, started: float, elapsed: float) -> None:
+        if self.closed:
+            return
+        self.round_trips += 1
+        self.db_seconds += elapsed
+        if self.calls is not None:
+            self.calls.append((round((started - self.started) * 1000, 1), table, operation, round(elapsed * 1000, 1)))
+
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar("request_trace", default=None)
+
+
+@contextmanager
+def db_timer(table: str, operation: str):
+    """Time one database operation and attribute it to the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_ERRORS.labels(table, operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        DB_LATENCY.labels(table, operation).observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(table, operation, started, elapsed)
+
+
+class MetricsMiddleware:
+    """Per-route latency histograms, DB round-trip counts and the slow-request log"""
+
+    def __init__(self, app, routes: list, streaming_routes=()):
+        self.app = app
+        # The application's live route list; endpoints are mapped to their
+        # path templates lazily because routes are added after middleware
+        self.routes = routes
+        # Route templates whose responses stay open; not timed
+        self.streaming_routes = set(streaming_routes)
+        self._templates = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            # Keep 404s for arbitrary paths from creating new label values
+            return "unmatched"
+        if endpoint not in self._templates:
+            self._templates = {getattr(r, "endpoint", None): r.path for r in self.routes}
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(sampled=random.random() < TRACE_SAMPLE_RATE)
+        token = _current_trace.set(trace)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_trace.reset(token)
+            trace.closed = True
+            elapsed = time.perf_counter() - trace.started
+            route = self._route_template(scope)
+            REQUEST_DB_ROUND_TRIPS.labels(scope["method"], route).observe(trace.round_trips)
+            if route not in self.streaming_routes:
+                REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(elapsed)
+                if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                    _log_slow_request(scope, route, status, elapsed, trace)
+
+
+def _log_slow_request(scope, route: str, status: int, elapsed: float, trace: RequestTrace) -> None:
+    line = (
+        f"Slow request: {scope['method']} {route} -> {status} in {elapsed * 1000:.1f}ms "
+        f"({trace.round_trips} DB round trip(s), {trace.db_seconds * 1000:.1f}ms in DB)"
+    )
+    if trace.calls:
+        line += "\n" + "\n".join(
+            f"    +{offset}ms {table}.{operation} {duration}ms" for offset, table, operation, duration in trace.calls
+        )
+    print(line)
+
+
+def render() -> bytes:
+    """Current metrics in the Prometheus text format"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -0,0 +1,141 @@
+"""Pre-encoded JSON response bodies for the public read routes.
+
+Public content only changes on admin writes, so validating every row with
+Pydantic and JSON-encoding it again on each request is wasted work.
+``encode_body`` does both once per content version and also precomputes
+gzip and brotli variants of the bytes. The result is cached alongside the
+rows it was built from (see ``main.py``). ``encoded_response`` then serves
+the smallest variant the client accepts, with no per-request encoding.
+
+Brotli is optional: without the ``brotli`` package only gzip is offered.
+"""
+import hashlib
+import os
+import zlib
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "512"))
+
+# Built once per content version, but still on a request (or rebuild) path,
+# and ``http_cache.py`` uses the same settings per response. The top levels
+# (gzip 9, brotli 11) cost several times as much for a few percent smaller output
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+
+# Encodings we can produce, most preferred first
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress ``body`` with ``encoding`` ("gzip" or "br")"""
+    # A window no larger than the body keeps the encoders' buffers small
+    window = len(body).bit_length()
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY, lgwin=max(10, min(24, window)))
+    window_bits = max(9, min(15, window))
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + window_bits, max(1, min(8, window_bits - 6)))
+    return compressor.compress(body) + compressor.flush()
+
+
+def body_tag(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def etag_for(tag: str, encoding: str) -> str:
+    # Each representation gets its own strong validator
+    return f'"{tag}"' if encoding == "identity" else f'"{tag}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etags) -> bool:
+    """Weak comparison of an If-None-Match header against any of ``etags``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") in etags for tag in if_none_match.split(","))
+
+
+class EncodedBody:
+    """A JSON body with precomputed compressed variants and their ETags"""
+
+    __slots__ = ("variants", "etags")
+
+    def __init__(self, body: bytes):
+        # Content-Encoding -> bytes; "identity" is always present
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            for encoding in ENCODINGS:
+                self.variants[encoding] = compress(body, encoding)
+        tag = body_tag(body)
+        self.etags = {encoding: etag_for(tag, encoding) for encoding in self.variants}
+
+    @property
+    def body(self) -> bytes:
+        return self.variants["identity"]
+
+    @property
+    def etag(self) -> str:
+        return self.etags["identity"]
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        return etag_matches(if_none_match, set(self.etags.values()))
+
+
+def encode_body(content: Any) -> EncodedBody:
+    """Encode already-validated content (dicts, lists, model dumps) once"""
+    return EncodedBody(orjson.dumps(content))
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> str:
+    """Pick the best of ``available`` (preferring br, then gzip) the client accepts"""
+    accepted = _accepted_encodings(accept_encoding)
+    for encoding in ENCODINGS:
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def encoded_response(
+    encoded: EncodedBody,
+    accept_encoding: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """Serve a pre-encoded body in the best encoding the client accepts (or 304)"""
+    encoding = choose_encoding(accept_encoding, encoded.variants)
+    response_headers = {"ETag": encoded.etags[encoding], **(headers or {})}
+    if len(encoded.variants) > 1:
+        response_headers["Vary"] = "Accept-Encoding"
+    if encoded.matches(if_none_match):
+        return Response(status_code=304, headers=response_headers)
+    if encoding != "identity":
+        response_headers["Content-Encoding"] = encoding
+    return Response(content=encoded.variants[encoding], media_type="application/json", headers=response_headers)
@@ -0,0 +1,240 @@
+"""In-memory full-text search over the public portfolio content.
+
+``SearchIndex`` keeps an inverted index (term -> documents with a weight)
+over the visible projects, experience, certificates and skills, so
+``/api/search`` is answered from memory without a database round trip.
+
+- Each document type has a loader that returns its visible rows and a set
+  of weighted fields. Titles and names count more than descriptions.
+- When an admin mutation invalidates a table, the types built from it are
+  reloaded in the background (usually from the read cache). The new rows
+  are diffed against the index, and only the rows that were added, changed
+  or removed are re-indexed. A search waits for a pending reload of the
+  types it covers, so an admin sees their own edit straight away.
+- A type is also reloaded in the background once it is older than
+  ``max_age`` (the read cache TTL), to pick up edits made outside the API.
+
+Every query term must match; the last one also matches as a prefix, so
+results keep up while the user types. Hits are ranked by summed field
+weight times the term's inverse document frequency.
+
+Facet fields (e.g. a project's ``technologies``) are also indexed as
+value -> document ids, matched case-insensitively, so "projects using X"
+and per-value counts are dictionary lookups. They are kept in sync along
+with the terms.
+"""
+import asyncio
+import bisect
+import math
+import re
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Letters and digits, keeping joined names like "c++", "c#" and "node.js" whole
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+DocKey = Tuple[str, int]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _normalize(value: str) -> str:
+    return " ".join(str(value).split()).lower()
+
+
+class SearchIndex:
+    """Inverted index over several document types, kept in sync incrementally"""
+
+    def __init__(
+        self,
+        sources: Dict[str, Callable[[], Awaitable[List[dict]]]],
+        fields: Dict[str, Dict[str, float]],
+        max_age: float,
+        facets: Optional[Dict[str, Sequence[str]]] = None,
+    ):
+        # Document type -> loader of its visible rows (each with an "id")
+        self.sources = sources
+        # Document type -> {field: weight}; list fields index every element
+        self.fields = fields
+        self.max_age = max_age
+        # Document type -> facet fields (lists of values)
+        self.facets = facets or {}
+        # (type, field) -> normalized value -> {id: value as written}
+        self._facet_values: Dict[Tuple[str, str], Dict[str, Dict[int, str]]] = {
+            (doc_type, field): {} for doc_type, fields in self.facets.items() for field in fields
+        }
+        self._rows: Dict[DocKey, dict] = {}
+        self._doc_terms: Dict[DocKey, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[DocKey, float]] = {}
+        self._vocabulary: Optional[List[str]] = None
+        self._loaded_at: Dict[str, float] = {}
+        self._dirty: Set[str] = set()
+        # Types whose pending reload searches must wait for
+        self._blocking: Set[str] = set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.reindexed = 0
+
+    # Keeping the index current
+
+    def mark_dirty(self, doc_types: Iterable[str], wait: bool = True) -> None:
+        """Reload ``doc_types`` in the background; with ``wait``, searches wait for it"""
+        for doc_type in doc_types:
+            self._dirty.add(doc_type)
+            if wait:
+                self._blocking.add(doc_type)
+            if doc_type not in self._tasks:
+                self._tasks[doc_type] = asyncio.get_running_loop().create_task(self._refresh(doc_type))
+
+    async def _refresh(self, doc_type: str) -> None:
+        try:
+            # A write that lands during a reload marks the type dirty again
+            while doc_type in self._dirty:
+                self._dirty.discard(doc_type)
+                try:
+                    rows = await self.sources[doc_type]()
+                except Exception as e:
+                    print(f"Error reloading {doc_type} for search: {e}")
+                    return
+                self._sync(doc_type, rows)
+                self._loaded_at[doc_type] = time.monotonic()
+        finally:
+            del self._tasks[doc_type]
+            self._blocking.discard(doc_type)
+
+    async def ready(self, doc_types: Sequence[str]) -> None:
+        """Load ``doc_types`` if needed and wait for reloads caused by writes"""
+        now = time.monotonic()
+        self.mark_dirty(t for t in doc_types if t not in self._tasks and (t not in self._loaded_at or t in self._dirty))
+        # Expired types are refreshed without making this search wait
+        self.mark_dirty((t for t in doc_types if now - self._loaded_at.get(t, now) > self.max_age), wait=False)
+        pending = [self._tasks[t] for t in doc_types if t in self._blocking and t in self._tasks]
+        if pending:
+            await asyncio.gather(*(asyncio.shield(task) for task in pending))
+
+    def _terms(self, doc_type: str, row: dict) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for field, weight in self.fields[doc_type].items():
+            value = row.get(field)
+            values = value if isinstance(value, list) else [value]
+            for text in values:
+                if isinstance(text, str):
+                    for term in tokenize(text):
+                        weights[term] = max(weights.get(term, 0.0), weight)
+        return weights
+
+    def _sync(self, doc_type: str, rows: List[dict]) -> None:
+        """Re-index only the rows of ``doc_type`` that were added, changed or removed"""
+        current = {(doc_type, row["id"]): row for row in rows}
+        for key in [k for k in self._rows if k[0] == doc_type and k not in current]:
+            self._remove(key)
+        for key, row in current.items():
+            if self._rows.get(key) != row:
+                self._remove(key)
+                self._add(key, row)
+
+    def _add(self, key: DocKey, row: dict) -> None:
+        terms = self._terms(key[0], row)
+        self._rows[key] = row
+        self._doc_terms[key] = terms
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._vocabulary = None
+            postings[key] = weight
+        for field in self.facets.get(key[0], ()):
+            values = self._facet_values[(key[0], field)]
+            for value in row.get(field) or ():
+                values.setdefault(_normalize(value), {})[key[1]] = value
+        self.reindexed += 1
+
+    def _remove(self, key: DocKey) -> None:
+        if key not in self._rows:
+            return
+        row = self._rows.pop(key)
+        for field in self.facets.get(key[0], ()):
+            values = self._facet_values[(key[0], field)]
+            for value in row.get(field) or ():
+                ids = values.get(_normalize(value))
+                if ids is not None:
+                    ids.pop(key[1], None)
+                    if not ids:
+                        del values[_normalize(value)]
+        for term in self._doc_terms.pop(key):
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                self._vocabulary = None
+
+    # Querying
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [term] if term in self._postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def search(
+        self, query: str, doc_types: Sequence[str], limit: int, offset: int = 0
+    ) -> Tuple[int, List[dict]]:
+        """Total number of hits and one page of them, best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+        allowed = set(doc_types)
+        total_docs = max(1, sum(1 for key in self._rows if key[0] in allowed))
+        scores: Optional[Dict[DocKey, float]] = None
+        for position, term in enumerate(terms):
+            # Score of every document matching this term (or, for the last
+            # term, any word it is a prefix of)
+            matched: Dict[DocKey, float] = {}
+            for word in self._expand(term, prefix=position == len(terms) - 1):
+                postings = self._postings[word]
+                idf = math.log(1 + total_docs / len(postings))
+                for key, weight in postings.items():
+                    if key[0] in allowed:
+                        matched[key] = max(matched.get(key, 0.0), weight * idf)
+            if scores is None:
+                scores = matched
+            else:
+                scores = {key: score + matched[key] for key, score in scores.items() if key in matched}
+            if not scores:
+                return 0, []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        page = [
+            {"type": key[0], "id": key[1], "score": round(score, 4), "item": self._rows[key]}
+            for key, score in ranked[offset:offset + limit]
+        ]
+        return len(ranked), page
+
+    def rows(self, doc_type: str, ids: Iterable[int]) -> List[dict]:
+        """Indexed rows of ``doc_type`` with the given ids, in id order"""
+        return [self._rows[(doc_type, doc_id)] for doc_id in sorted(ids) if (doc_type, doc_id) in self._rows]
+
+    def facet_ids(self, doc_type: str, field: str, value: str) -> List[int]:
+        """Ids of the documents whose ``field`` contains ``value`` (any case)"""
+        return list(self._facet_values[(doc_type, field)].get(_normalize(value), ()))
+
+    def facet_counts(self, doc_type: str, field: str) -> List[Tuple[str, int]]:
+        """(value, number of documents) for every value of ``field``, most used first"""
+        counts = [
+            # Shown as written on the oldest document using it
+            (ids[min(ids)], len(ids)) for ids in self._facet_values[(doc_type, field)].values()
+        ]
+        return sorted(counts, key=lambda item: (-item[1], item[0].lower()))
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._rows),
+            "terms": len(self._postings),
+            "facet_values": {f"{t}.{f}": len(values) for (t, f), values in self._facet_values.items()},
+            "reindexed": self.reindexed,
+            "loading": sorted(self._tasks),
+        }
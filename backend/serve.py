@@ -0,0 +1,199 @@
+"""Production entry point: ``python serve.py`` from the backend directory.
+
+Runs the API in several uvicorn worker processes sharing one listening
+socket, so throughput scales across cores. ``python main.py`` stays the
+single-process development server with auto-reload.
+
+- uvloop and httptools are used when installed (``uvicorn[standard]``),
+  with a fallback to asyncio and h11.
+- Each worker is recycled after ``SERVER_MAX_REQUESTS`` requests, plus a
+  random jitter so they do not all restart at once. This limits the effect
+  of slow memory growth. The supervisor here starts a replacement as soon
+  as a worker exits; uvicorn's own ``--workers`` mode does not.
+- A worker counts as started once its startup hooks have run and it is
+  listening. If ``SERVER_MAX_STARTUP_FAILURES`` workers in a row exit
+  before that (a broken deploy or configuration), the supervisor stops
+  instead of restarting them forever.
+- On SIGTERM/SIGINT, and when a worker is recycled, the worker stops
+  accepting connections. It ends its change-feed streams (clients reconnect
+  to another worker) and drains in-flight requests for up to
+  ``SERVER_GRACEFUL_TIMEOUT`` seconds. Then the shutdown hooks run (snapshot
+  save, contact queue flush, ...).
+- With more than one worker, cache invalidations are shared through the
+  file backend of ``content_versions.py`` unless ``CONTENT_VERSION_BACKEND``
+  is set. Use ``database`` when running several hosts.
+
+Settings (environment variables):
+    HOST                         bind address (default 0.0.0.0)
+    PORT                         bind port (default 8000)
+    WEB_CONCURRENCY              worker processes (default: number of CPUs)
+    SERVER_BACKLOG               listen backlog (default 2048)
+    SERVER_KEEPALIVE             seconds an idle keep-alive connection stays open (default 75,
+                                 above the 60 s idle timeout of common load balancers)
+    SERVER_MAX_REQUESTS          requests before a worker is recycled, 0 = never (default 10000)
+    SERVER_MAX_REQUESTS_JITTER   random extra requests per worker (default 1000)
+    SERVER_GRACEFUL_TIMEOUT      seconds to drain in-flight requests (default 30)
+    SERVER_LIMIT_CONCURRENCY     max connections per worker before 503s (default unlimited)
+    SERVER_MAX_STARTUP_FAILURES  workers in a row that may exit before starting (default 5)
+    FORWARDED_ALLOW_IPS          proxies trusted for X-Forwarded-* (default 127.0.0.1)
+"""
+import importlib.util
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "75"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "1000"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_LIMIT_CONCURRENCY = int(os.getenv("SERVER_LIMIT_CONCURRENCY", "0")) or None
+SERVER_MAX_STARTUP_FAILURES = int(os.getenv("SERVER_MAX_STARTUP_FAILURES", "5"))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Exit code of the supervisor when workers keep failing to start
+STARTUP_FAILURE = 3
+# Seconds between checks for exited workers
+SUPERVISE_INTERVAL = 0.5
+
+# Workers are started fresh rather than forked, and get the listening socket
+# passed to them
+spawn = multiprocessing.get_context("spawn")
+multiprocessing.allow_connection_pickling()
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that reports when it has started and ends change-feed
+    streams before draining"""
+
+    def __init__(self, config: uvicorn.Config, started=None):
+        super().__init__(config)
+        self.started_event = started
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        # should_exit is set when the application's startup hooks failed
+        if not self.should_exit and self.started_event is not None:
+            self.started_event.set()
+
+    async def shutdown(self, sockets=None) -> None:
+        # Open streams would otherwise hold the drain until the timeout
+        from changes import change_hub
+
+        change_hub.close()
+        await super().shutdown(sockets=sockets)
+
+
+def run_worker(config: uvicorn.Config, sockets: list, started) -> None:
+    """Entry point of a worker process"""
+    config.configure_logging()
+    DrainingServer(config, started).run(sockets=sockets)
+
+
+def worker_config() -> uvicorn.Config:
+    max_requests = None
+    if SERVER_MAX_REQUESTS > 0:
+        max_requests = SERVER_MAX_REQUESTS + random.randint(0, max(SERVER_MAX_REQUESTS_JITTER, 0))
+    return uvicorn.Config(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        backlog=SERVER_BACKLOG,
+        timeout_keep_alive=SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+        limit_max_requests=max_requests,
+        limit_concurrency=SERVER_LIMIT_CONCURRENCY,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        access_log=False,
+    )
+
+
+class Supervisor:
+    """Keeps ``workers`` uvicorn processes running on one shared socket"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.config = worker_config()
+        # (process, event set once the worker has started)
+        self.processes: List = []
+        self.socket = None
+        self.should_exit = threading.Event()
+        self.exit_code = 0
+        # Workers in a row that exited before they started
+        self.startup_failures = 0
+
+    def handle_exit(self, sig, frame) -> None:
+        self.should_exit.set()
+
+    def spawn(self):
+        started = spawn.Event()
+        process = spawn.Process(target=run_worker, args=(worker_config(), [self.socket], started))
+        process.start()
+        return process, started
+
+    def run(self) -> int:
+        self.socket = self.config.bind_socket()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.handle_exit)
+        print(
+            f"🚀 Starting Portfolio API on {HOST}:{PORT}: {self.workers} worker(s), "
+            f"{self.config.loop}/{self.config.http}"
+        )
+        self.processes = [self.spawn() for _ in range(self.workers)]
+        while not self.should_exit.wait(SUPERVISE_INTERVAL):
+            for index, (process, started) in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                if started.is_set():
+                    self.startup_failures = 0
+                    print(f"Worker [{process.pid}] exited ({process.exitcode}); starting a replacement")
+                else:
+                    self.startup_failures += 1
+                    if self.startup_failures >= SERVER_MAX_STARTUP_FAILURES:
+                        print(f"{self.startup_failures} workers in a row failed to start; stopping")
+                        self.exit_code = STARTUP_FAILURE
+                        self.should_exit.set()
+                        break
+                    print(f"Worker [{process.pid}] exited ({process.exitcode}) before it started; starting a replacement")
+                self.processes[index] = self.spawn()
+        self.stop()
+        return self.exit_code
+
+    def stop(self) -> None:
+        for process, _ in self.processes:
+            if process.is_alive():
+                process.terminate()
+        # Workers drain for up to SERVER_GRACEFUL_TIMEOUT, then run their shutdown hooks
+        deadline = time.monotonic() + SERVER_GRACEFUL_TIMEOUT + 15
+        for process, _ in self.processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                print(f"Worker [{process.pid}] did not stop in time; killing it")
+                process.kill()
+                process.join()
+        self.socket.close()
+
+
+def main(workers: Optional[int] = None) -> int:
+    workers = max(workers or WEB_CONCURRENCY, 1)
+    if workers > 1:
+        # Inherited by the workers
+        os.environ.setdefault("CONTENT_VERSION_BACKEND", "file")
+    return Supervisor(workers).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Last-known-good snapshots of the public reads, for serving through outages.
+
+Every successful public query is recorded in a ``SnapshotStore``, which is
+persisted to a local JSON file (``SNAPSHOT_PATH``, default
+``backend/snapshot_store.json``) and loaded again at startup. When the live
+query fails, or has not answered within ``SNAPSHOT_LATENCY_BUDGET`` seconds
+(default 1.5), the stored rows are served instead and the response is
+flagged with ``X-Data-Stale: true`` (see ``StaleMarkerMiddleware``). A slow
+query that overruns the budget keeps running and refreshes the snapshot
+when it finishes.
+
+Without a snapshot for a query (e.g. on a fresh install) errors propagate
+as before.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from cache import mark_stale, stale_scope
+from metrics import SNAPSHOT_STALE_SERVED
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = os.getenv(
+    "SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshot_store.json")
+)
+SNAPSHOT_LATENCY_BUDGET = float(os.getenv("SNAPSHOT_LATENCY_BUDGET", "1.5"))
+SNAPSHOT_MAX_ENTRIES = int(os.getenv("SNAPSHOT_MAX_ENTRIES", "256"))
+
+# Coalesce bursts of updates into one file write
+SAVE_DELAY = 1.0
+
+
+class SnapshotStore:
+    """Last good result per ``(table, key)``, persisted as one JSON file"""
+
+    def __init__(self, path: str = SNAPSHOT_PATH, max_entries: int = SNAPSHOT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        # json.dumps([table, key]) -> {"saved_at": epoch seconds, "value": rows}
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._pending_tasks = set()
+        self.served_stale = 0
+        self._load()
+
+    @staticmethod
+    def _key(table: str, key: Hashable) -> str:
+        return json.dumps([table, key])
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._entries.update(json.load(f))
+            logger.info("Loaded %d snapshot(s) from %s", len(self._entries), self.path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable snapshot file %s: %s", self.path, e)
+
+    def get(self, table: str, key: Hashable) -> Optional[dict]:
+        return self._entries.get(self._key(table, key))
+
+    def put(self, table: str, key: Hashable, value: Any) -> None:
+        entry_key = self._key(table, key)
+        current = self._entries.get(entry_key)
+        if current is not None and current["value"] == value:
+            return
+        self._entries.pop(entry_key, None)
+        self._entries[entry_key] = {"saved_at": time.time(), "value": value}
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._schedule_save()
+
+    def _schedule_save(self) -> None:
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_handle = loop.call_later(SAVE_DELAY, self._start_save)
+
+    def _start_save(self) -> None:
+        self._save_handle = None
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.save))
+        self._pending_tasks.add(task)
+        task.add_done_callback(self._pending_tasks.discard)
+
+    def save(self) -> None:
+        """Write all snapshots to disk (atomically)"""
+        data = json.dumps(self._entries, default=str)
+        tmp_path = None
+        try:
+            # A temp file of its own per save: other workers, and a shutdown
+            # flush racing a scheduled save, write the same snapshot file
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.path)),
+                prefix=os.path.basename(self.path) + ".",
+                suffix=".tmp",
+            )
+            with open(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error("Error saving snapshots to %s: %s", self.path, e)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def flush(self) -> None:
+        """Write pending changes now (called at shutdown)"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+            self.save()
+
+    async def load(self, table: str, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``loader``, falling back to the stored snapshot if it fails or is too slow"""
+        snapshot = self.get(table, key)
+        if snapshot is None:
+            value = await loader()
+            self.put(table, key, value)
+            return value
+
+        # Shielded, so a query that overruns the budget still completes and
+        # refreshes the snapshot for the next request
+        task = asyncio.ensure_future(loader())
+        task.add_done_callback(lambda t: self._record_late(table, key, t))
+        try:
+            with stale_scope() as marks:
+                value = await asyncio.wait_for(asyncio.shield(task), SNAPSHOT_LATENCY_BUDGET)
+        except Exception as e:
+            # Counted rather than logged: during an outage this is every read
+            logger.debug("Serving stale %s snapshot (%s: %s)", table, type(e).__name__, e)
+            SNAPSHOT_STALE_SERVED.labels(table, "slow" if isinstance(e, asyncio.TimeoutError) else "error").inc()
+            self.served_stale += 1
+            mark_stale()
+            return snapshot["value"]
+        if marks:
+            # The loader itself already fell back to stale data
+            mark_stale()
+        return value
+
+    def _record_late(self, table: str, key: Hashable, task: asyncio.Task) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.put(table, key, task.result())
+
+    def stats(self) -> dict:
+        oldest = min((e["saved_at"] for e in self._entries.values()), default=None)
+        return {
+            "entries": len(self._entries),
+            "served_stale": self.served_stale,
+            "oldest_age_seconds": round(time.time() - oldest, 1) if oldest else None,
+        }
+
+
+class StaleMarkerMiddleware:
+    """Add ``X-Data-Stale: true`` to responses built from snapshot data"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with stale_scope() as marks:
+            async def marked_send(message):
+                if message["type"] == "http.response.start" and marks:
+                    message = {**message, "headers": [*message.get("headers", []), (b"x-data-stale", b"true")]}
+                await send(message)
+
+            await self.app(scope, receive, marked_send)
+
+
+snapshot_store = SnapshotStore()
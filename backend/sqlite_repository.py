@@ -0,0 +1,351 @@
+"""Local SQLite implementation of the data-access layer.
+
+Selected with ``DB_BACKEND=sqlite`` (see ``db.py``). It stores the same
+tables as the Supabase project in one file (``SQLITE_PATH``, default
+``backend/portfolio.sqlite3``; ``:memory:`` is allowed), with indexes on the
+columns the API filters and orders by, so the API can run offline and be
+benchmarked at local-disk latency.
+
+List and object columns (``technologies``, ``social_links``, ...) are
+stored as JSON text and booleans as integers; both are converted back on
+read, so rows look the same as the ones PostgREST returns. ``SQLITE_SEED``
+may point to a JSON file of ``{table: [rows]}`` that is loaded into an
+empty database.
+
+Needs SQLite 3.35+ (``RETURNING``).
+"""
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+SQLITE_PATH = os.getenv(
+    "SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "portfolio.sqlite3")
+)
+SQLITE_SEED = os.getenv("SQLITE_SEED")
+
+# Column name -> (kind, SQL default); kind is one of int, text, bool, json
+_CREATED_AT = ("text", "(strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))")
+_HIDDEN = ("bool", "0")
+
+SCHEMA: Dict[str, Dict[str, Tuple[str, Optional[str]]]] = {
+    "projects": {
+        "title": ("text", None), "description": ("text", None), "technologies": ("json", "'[]'"),
+        "github_url": ("text", None), "live_url": ("text", None), "image_url": ("text", None),
+        "featured": ("bool", "0"), "in_progress": ("bool", "0"), "future_idea": ("bool", "0"),
+        "is_hidden": _HIDDEN, "created_at": _CREATED_AT,
+    },
+    "skills": {
+        "name": ("text", None), "category": ("text", None), "level": ("int", None),
+        "icon": ("text", None), "is_hidden": _HIDDEN, "created_at": _CREATED_AT,
+    },
+    "skill_categories": {
+        "name": ("text", None), "is_hidden": _HIDDEN, "created_at": _CREATED_AT,
+    },
+    "experience": {
+        "title": ("text", None), "company": ("text", None), "date": ("text", None),
+        "description": ("text", None), "logo_url": ("text", None), "is_hidden": _HIDDEN,
+        "created_at": _CREATED_AT,
+    },
+    "education": {
+        "institution": ("text", None), "degree": ("text", None), "date": ("text", None),
+        "description": ("text", None), "cgpa": ("text", None), "logo_url": ("text", None),
+        "is_hidden": _HIDDEN, "created_at": _CREATED_AT,
+    },
+    "certificates": {
+        "title": ("text", None), "issuer": ("text", None), "date": ("text", None),
+        "description": ("text", None), "credential_url": ("text", None), "logo_url": ("text", None),
+        "is_hidden": _HIDDEN, "created_at": _CREATED_AT,
+    },
+    "site_settings": {
+        "full_name": ("text", None), "title": ("text", None), "titles": ("json", "'[]'"),
+        "tagline": ("text", None), "bio": ("text", None), "profile_image_url": ("text", None),
+        "resume_url": ("text", None), "logo_url": ("text", None), "email": ("text", None),
+        "phone": ("text", None), "location": ("text", None), "social_links": ("json", "'[]'"),
+        "years_experience": ("text", None), "projects_completed": ("text", None),
+        "lines_of_code": ("text", None), "site_title": ("text", None), "site_description": ("text", None),
+    },
+    "about_me": {
+        "journey_title": ("text", None), "journey_text": ("text", None), "highlights": ("json", "'[]'"),
+    },
+    "contact_messages": {
+        "name": ("text", None), "email": ("text", None), "subject": ("text", None),
+        "message": ("text", None), "read": ("bool", "0"), "timestamp": _CREATED_AT,
+    },
+    "content_versions": {
+        "name": ("text", None), "token": ("text", None),
+    },
+}
+
+# Match the filters and orderings used by main.py
+INDEXES = [
+    ("projects", ["is_hidden", "featured", "id"]),
+    ("skills", ["is_hidden", "category", "id"]),
+    ("skills", ["category"]),
+    ("skill_categories", ["name"]),
+    ("experience", ["is_hidden", "id"]),
+    ("education", ["is_hidden", "id"]),
+    ("certificates", ["is_hidden", "id"]),
+    ("contact_messages", ["timestamp", "id"]),
+    ("contact_messages", ["read", "timestamp", "id"]),
+    ("content_versions", ["name"]),
+]
+
+_SQL_TYPES = {"int": "INTEGER", "text": "TEXT", "bool": "INTEGER", "json": "TEXT"}
+
+
+def _ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SQLiteRepository:
+    """Same interface as ``db.SupabaseRepository``, backed by a local SQLite file"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH, seed: Optional[str] = SQLITE_SEED):
+        self.path = path
+        self.seed_path = seed
+        # sqlite3 connections belong to one thread; all statements run on it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    # Connection and schema
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema(connection)
+            self._connection = connection
+            if self.seed_path:
+                self._seed_from_file(self.seed_path)
+        return self._connection
+
+    @staticmethod
+    def _create_schema(connection: sqlite3.Connection) -> None:
+        for table, columns in SCHEMA.items():
+            definitions = ["id INTEGER PRIMARY KEY AUTOINCREMENT"]
+            for column, (kind, default) in columns.items():
+                definition = f"{_ident(column)} {_SQL_TYPES[kind]}"
+                if default is not None:
+                    definition += f" DEFAULT {default}"
+                definitions.append(definition)
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {_ident(table)} ({', '.join(definitions)})")
+        for table, columns in INDEXES:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {_ident('idx_' + table + '_' + '_'.join(columns))} "
+                f"ON {_ident(table)} ({', '.join(_ident(c) for c in columns)})"
+            )
+        connection.commit()
+
+    def _seed_from_file(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        for table, rows in data.items():
+            if rows and not self._execute(f"SELECT 1 FROM {_ident(self._table(table))} LIMIT 1"):
+                self._insert(table, rows)
+                print(f"Seeded {len(rows)} {table} row(s) from {path}")
+
+    async def connect(self) -> None:
+        await self._run(self._connect)
+
+    async def _run(self, fn, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return rows
+
+    # Value conversion
+
+    @staticmethod
+    def _table(table: str) -> str:
+        if table not in SCHEMA:
+            raise ValueError(f"Unknown table: {table}")
+        return table
+
+    @staticmethod
+    def _column_kind(table: str, column: str) -> str:
+        if column == "id":
+            return "int"
+        try:
+            return SCHEMA[table][column][0]
+        except KeyError:
+            raise ValueError(f"Unknown column {table}.{column}")
+
+    def _encode(self, table: str, column: str, value: Any) -> Any:
+        kind = self._column_kind(table, column)
+        if value is None:
+            return None
+        if kind == "json":
+            return json.dumps(value)
+        if kind == "bool":
+            return int(bool(value))
+        return value
+
+    @staticmethod
+    def _decode(table: str, row: sqlite3.Row) -> dict:
+        result = dict(row)
+        for column, value in result.items():
+            if value is None or column == "id":
+                continue
+            kind = SCHEMA[table][column][0]
+            if kind == "json":
+                result[column] = json.loads(value)
+            elif kind == "bool":
+                result[column] = bool(value)
+        return result
+
+    def _where(
+        self, table: str, eq: Optional[Dict[str, Any]], in_: Optional[Dict[str, Sequence[Any]]] = None
+    ) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        for column, value in (eq or {}).items():
+            if value is None:
+                clauses.append(f"{_ident(column)} IS NULL")
+                self._column_kind(table, column)
+            else:
+                clauses.append(f"{_ident(column)} = ?")
+                params.append(self._encode(table, column, value))
+        for column, values in (in_ or {}).items():
+            values = list(values)
+            clauses.append(f"{_ident(column)} IN ({', '.join('?' for _ in values)})")
+            self._column_kind(table, column)
+            params.extend(self._encode(table, column, value) for value in values)
+        return clauses, params
+
+    def _columns(self, table: str, columns: str) -> str:
+        if columns.strip() == "*":
+            return "*"
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        for name in names:
+            self._column_kind(table, name)
+        return ", ".join(_ident(n) for n in names)
+
+    # Statements (run on the SQLite thread)
+
+    def _select(self, table, columns, eq, order, desc, limit, keyset, search, in_=None) -> List[dict]:
+        table = self._table(table)
+        clauses, params = self._where(table, eq, in_)
+        order_columns = [order] if isinstance(order, str) else list(order or [])
+        if keyset is not None:
+            # Row-value comparison gives "strictly after the last row seen"
+            clauses.append(
+                f"({', '.join(_ident(c) for c in order_columns)}) {'<' if desc else '>'} "
+                f"({', '.join('?' for _ in order_columns)})"
+            )
+            params.extend(self._encode(table, c, v) for c, v in zip(order_columns, keyset))
+        if search:
+            search_columns, text = search
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            for column in search_columns:
+                self._column_kind(table, column)
+            clauses.append("(" + " OR ".join(f"{_ident(c)} LIKE ? ESCAPE '\\'" for c in search_columns) + ")")
+            params.extend(pattern for _ in search_columns)
+
+        sql = f"SELECT {self._columns(table, columns)} FROM {_ident(table)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_columns:
+            direction = "DESC" if desc else "ASC"
+            sql += " ORDER BY " + ", ".join(f"{_ident(c)} {direction}" for c in order_columns)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [self._decode(table, row) for row in self._execute(sql, params)]
+
+    def _count(self, table, eq) -> int:
+        table = self._table(table)
+        clauses, params = self._where(table, eq)
+        sql = f"SELECT COUNT(*) FROM {_ident(table)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self._execute(sql, params)[0][0]
+
+    def _insert(self, table, data) -> List[dict]:
+        table = self._table(table)
+        rows = data if isinstance(data, list) else [data]
+        connection = self._connect()
+        inserted = []
+        try:
+            # One transaction for the whole batch, like a multi-row PostgREST insert
+            for row in rows:
+                columns = list(row)
+                values = [self._encode(table, c, row[c]) for c in columns]
+                if columns:
+                    sql = (
+                        f"INSERT INTO {_ident(table)} ({', '.join(_ident(c) for c in columns)}) "
+                        f"VALUES ({', '.join('?' for _ in columns)}) RETURNING *"
+                    )
+                else:
+                    sql = f"INSERT INTO {_ident(table)} DEFAULT VALUES RETURNING *"
+                inserted.extend(connection.execute(sql, values).fetchall())
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return [self._decode(table, row) for row in inserted]
+
+    def _update(self, table, data, eq, in_=None) -> List[dict]:
+        table = self._table(table)
+        clauses, params = self._where(table, eq, in_)
+        assignments = [f"{_ident(c)} = ?" for c in data]
+        values = [self._encode(table, c, v) for c, v in data.items()]
+        sql = f"UPDATE {_ident(table)} SET {', '.join(assignments)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [self._decode(table, row) for row in self._execute(sql + " RETURNING *", values + params)]
+
+    def _delete(self, table, eq, in_=None) -> List[dict]:
+        table = self._table(table)
+        clauses, params = self._where(table, eq, in_)
+        sql = f"DELETE FROM {_ident(table)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [self._decode(table, row) for row in self._execute(sql + " RETURNING *", params)]
+
+    # Public interface
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        *,
+        eq: Optional[Dict[str, Any]] = None,
+        order: Union[str, Sequence[str], None] = None,
+        desc: bool = False,
+        limit: Optional[int] = None,
+        keyset: Optional[Sequence[Any]] = None,
+        search: Optional[Tuple[Sequence[str], str]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        return await self._run(self._select, table, columns, eq, order, desc, limit, keyset, search, in_)
+
+    async def count(self, table: str, *, eq: Optional[Dict[str, Any]] = None) -> int:
+        return await self._run(self._count, table, eq)
+
+    async def insert(self, table: str, data: Any) -> List[dict]:
+        return await self._run(self._insert, table, data)
+
+    async def update(
+        self, table: str, data: dict, *, eq: Optional[Dict[str, Any]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        return await self._run(self._update, table, data, eq, in_)
+
+    async def delete(
+        self, table: str, *, eq: Optional[Dict[str, Any]] = None,
+        in_: Optional[Dict[str, Sequence[Any]]] = None,
+    ) -> List[dict]:
+        return await self._run(self._delete, table, eq, in_)
@@ -0,0 +1,52 @@
+"""Test setup: the app runs on an in-memory SQLite database seeded from
+``seed.json``, with its snapshot store and contact journal in a temporary
+directory. Run from the backend directory with ``python -m pytest``.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMP_DIR = tempfile.mkdtemp(prefix="portfolio-tests-")
+
+# Before the app modules are imported, since they read their settings once
+os.environ.update(
+    DB_BACKEND="sqlite",
+    SQLITE_PATH=":memory:",
+    SQLITE_SEED=os.path.join(TESTS_DIR, "seed.json"),
+    # Empty rather than unset, so a local .env cannot point the tests at Supabase
+    SUPABASE_URL="",
+    SNAPSHOT_PATH=os.path.join(TEMP_DIR, "snapshot_store.json"),
+    CONTACT_JOURNAL=os.path.join(TEMP_DIR, "contact_journal.jsonl"),
+    CONTENT_VERSION_BACKEND="none",
+)
+sys.path.insert(0, os.path.dirname(TESTS_DIR))
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+
+
+# One loop for the whole run: the app keeps loop-bound state (cache loads,
+# the contact writer, locks) between requests
+_loop = asyncio.new_event_loop()
+
+
+def run(coroutine):
+    return _loop.run_until_complete(coroutine)
+
+
+@pytest.fixture
+def app():
+    """The app with admin auth bypassed and empty caches"""
+    main.app.dependency_overrides[main.verify_admin_token] = lambda: {"user": "test"}
+    main.cache.clear()
+    yield main.app
+    main.app.dependency_overrides.clear()
+
+
+def client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
@@ -0,0 +1,44 @@
+from conftest import client, run
+
+
+def test_batch_reports_status_per_operation(app):
+    async def scenario():
+        async with client(app) as c:
+            skill = (await c.post("/api/admin/skills", json={"name": "Go", "category": "Languages", "level": 3})).json()
+            response = await c.post("/api/admin/batch", json={"operations": [
+                {"op": "create", "table": "skills", "data": {"name": "Rust", "category": "Languages", "level": 2}},
+                {"op": "create", "table": "skills", "data": {"name": "Missing level"}},
+                {"op": "update", "table": "skills", "id": skill["id"], "data": {"level": 4}},
+                {"op": "update", "table": "skills", "id": 999999, "data": {"level": 4}},
+                {"op": "delete", "table": "skills", "id": skill["id"]},
+                {"op": "delete", "table": "skills", "id": 999999},
+                {"op": "update", "table": "skills", "data": {"level": 1}},
+            ]})
+            assert response.status_code == 200
+            body = response.json()
+
+            assert [result["status"] for result in body["results"]] == [201, 422, 200, 404, 200, 404, 422]
+            assert body["succeeded"] == 3
+            assert body["failed"] == 4
+            created, invalid, updated = body["results"][:3]
+            assert created["data"]["name"] == "Rust"
+            assert "level" in invalid["error"]
+            assert updated["data"]["level"] == 4
+
+            names = {row["name"] for row in (await c.get("/api/admin/skills")).json()}
+            assert "Rust" in names
+            assert "Go" not in names
+
+    run(scenario())
+
+
+def test_batch_size_is_limited(app):
+    import main
+
+    async def scenario():
+        async with client(app) as c:
+            operations = [{"op": "delete", "table": "skills", "id": 1}] * (main.BATCH_MAX_OPERATIONS + 1)
+            response = await c.post("/api/admin/batch", json={"operations": operations})
+            assert response.status_code == 413
+
+    run(scenario())
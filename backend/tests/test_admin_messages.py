@@ -0,0 +1,88 @@
+from postgrest import SyncPostgrestClient
+
+import db
+from conftest import client, run
+
+
+def add_messages():
+    """Seven messages, two sharing a timestamp so the id breaks the tie"""
+    async def insert():
+        await db.delete("contact_messages", eq={"read": False})
+        await db.delete("contact_messages", eq={"read": True})
+        await db.insert("contact_messages", [
+            {
+                "name": f"Sender {i}",
+                "email": f"sender{i}@example.com",
+                "subject": "Hiring" if i % 2 else "Hello",
+                "message": "text",
+                "timestamp": f"2024-01-0{min(i, 5) + 1}T00:00:00+00:00",
+            }
+            for i in range(7)
+        ])
+
+    run(insert())
+
+
+def read_all_pages(app, **params):
+    async def scenario():
+        items, cursor, pages = [], None, 0
+        async with client(app) as c:
+            while True:
+                query = dict(params, limit=2, **({"cursor": cursor} if cursor else {}))
+                response = await c.get("/api/admin/messages", params=query)
+                assert response.status_code == 200
+                page = response.json()
+                items.extend(page["items"])
+                pages += 1
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return items, pages
+
+    return run(scenario())
+
+
+def newest_first(items):
+    return sorted(items, key=lambda row: (row["timestamp"], row["id"]), reverse=True)
+
+
+def test_cursor_pages_cover_every_message_once(app):
+    add_messages()
+    items, pages = read_all_pages(app)
+    assert len(items) == 7
+    assert pages == 4
+    assert len({row["id"] for row in items}) == 7
+    assert items == newest_first(items)
+
+
+def test_cursor_pages_with_search(app):
+    add_messages()
+    items, _ = read_all_pages(app, q="Hiring")
+    assert len(items) == 3
+    assert {row["subject"] for row in items} == {"Hiring"}
+    assert items == newest_first(items)
+
+
+def test_invalid_cursor_is_rejected(app):
+    async def scenario():
+        async with client(app) as c:
+            response = await c.get("/api/admin/messages", params={"cursor": "not-a-cursor"})
+            assert response.status_code == 400
+
+    run(scenario())
+
+
+def test_cursor_and_search_are_one_postgrest_filter():
+    # PostgREST gets a single or= filter that requires both the cursor and
+    # the search, never two competing or= parameters
+    query = SyncPostgrestClient("http://postgrest.test").from_("contact_messages").select("*")
+    query = db._build(
+        query, {"read": False}, ["timestamp", "id"], True, 3,
+        keyset=["2024-01-02T00:00:00+00:00", 7], search=(["subject", "message"], "hiring"),
+    )
+    params = query.request.params
+    assert params.get_list("or") == [
+        '(and(or(timestamp.lt."2024-01-02T00:00:00+00:00",'
+        'and(timestamp.eq."2024-01-02T00:00:00+00:00",id.lt."7")),'
+        'or(subject.ilike."*hiring*",message.ilike."*hiring*")))'
+    ]
+    assert params["read"] == "eq.False"
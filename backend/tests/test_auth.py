@@ -0,0 +1,82 @@
+import time
+
+import jwt
+import pytest
+
+import auth
+from conftest import run
+
+SECRET = "test-secret-" * 6
+
+
+def token(algorithm="HS256", key=SECRET, **overrides) -> str:
+    claims = {"sub": "user-1", "email": "admin@example.com", "role": "authenticated",
+              "aud": "authenticated", "exp": int(time.time()) + 3600}
+    claims.update(overrides)
+    return jwt.encode({k: v for k, v in claims.items() if v is not None}, key, algorithm=algorithm)
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    """Local HS256 verification with a fresh cache; remote checks are recorded"""
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "token_cache", auth.TokenCache())
+    calls = []
+
+    async def verify_remotely(raw_token):
+        calls.append(raw_token)
+        return time.time() + 60, {"id": "remote-user", "email": None, "role": "authenticated"}
+
+    monkeypatch.setattr(auth, "_verify_remotely", verify_remotely)
+    return calls
+
+
+def test_valid_hs256_token_is_verified_locally(remote):
+    user = run(auth.verify_token(token()))
+    assert user == {"id": "user-1", "email": "admin@example.com", "role": "authenticated"}
+    assert remote == []
+
+
+def test_verified_token_is_cached(remote):
+    raw = token()
+    run(auth.verify_token(raw))
+    run(auth.verify_token(raw))
+    assert auth.token_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("claims, error", [
+    ({"aud": "anon"}, jwt.InvalidAudienceError),
+    ({"exp": int(time.time()) - 10}, jwt.ExpiredSignatureError),
+    ({"sub": None}, jwt.MissingRequiredClaimError),
+])
+def test_invalid_hs256_token_is_rejected(remote, claims, error):
+    with pytest.raises(error):
+        run(auth.verify_token(token(**claims)))
+    assert remote == []
+    assert auth.token_cache.stats()["size"] == 0
+
+
+def test_wrong_secret_is_rejected(remote):
+    with pytest.raises(jwt.InvalidSignatureError):
+        run(auth.verify_token(token(key="another-secret-" * 4)))
+
+
+@pytest.mark.parametrize("algorithm, key", [("none", None), ("HS512", SECRET)])
+def test_other_algorithms_fall_back_to_remote(remote, algorithm, key):
+    raw = token(algorithm=algorithm, key=key)
+    assert run(auth.verify_token(raw))["id"] == "remote-user"
+    assert remote == [raw]
+
+
+def test_cached_token_expires_with_its_exp(monkeypatch):
+    cache = auth.TokenCache()
+    now = time.time()
+    cache.put("token", now + 60, {"id": "user-1"})
+    assert cache.get("token") == {"id": "user-1"}
+
+    monkeypatch.setattr(auth.time, "time", lambda: now + 60)
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+    # Already-expired tokens are never stored
+    cache.put("token", now + 30, {"id": "user-1"})
+    assert cache.stats()["size"] == 0
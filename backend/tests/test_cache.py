@@ -0,0 +1,72 @@
+import asyncio
+
+from cache import TableCache
+from conftest import run
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TableCache(ttl=60)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return ["row"]
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_load("projects", None, loader) for _ in range(10)))
+        assert results == [["row"]] * 10
+        assert len(loads) == 1
+        # Served from the cache afterwards
+        assert await cache.get_or_load("projects", None, loader) == ["row"]
+        assert len(loads) == 1
+
+    run(scenario())
+
+
+def test_invalidation_during_a_load_keeps_its_result_out_of_the_cache():
+    cache = TableCache(ttl=60)
+    versions = iter(["before the write", "after the write"])
+    release = asyncio.Event()
+
+    async def loader():
+        value = next(versions)
+        if value == "before the write":
+            await release.wait()
+        return value
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_load("projects", None, loader))
+        await asyncio.sleep(0)
+        cache.invalidate("projects")
+
+        # A miss after the write starts its own load instead of joining the old one
+        assert await cache.get_or_load("projects", None, loader) == "after the write"
+        release.set()
+        assert await first == "before the write"
+        assert await cache.get_or_load("projects", None, loader) == "after the write"
+
+    run(scenario())
+
+
+def test_invalidated_load_is_not_stored():
+    cache = TableCache(ttl=60)
+    calls = []
+    release = asyncio.Event()
+
+    async def loader():
+        calls.append(1)
+        if len(calls) == 1:
+            await release.wait()
+        return len(calls)
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_load("projects", None, loader))
+        await asyncio.sleep(0)
+        cache.invalidate("projects")
+        release.set()
+        assert await first == 1
+        # The first result predates the write, so the next read loads again
+        assert await cache.get_or_load("projects", None, loader) == 2
+
+    run(scenario())
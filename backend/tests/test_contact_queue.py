@@ -0,0 +1,154 @@
+import asyncio
+import glob
+import json
+import os
+import subprocess
+
+import pytest
+
+import contact_queue
+import db
+from conftest import run
+from contact_queue import ContactQueue
+
+
+def message(i: int) -> dict:
+    return {"name": f"Sender {i}", "email": f"sender{i}@example.com", "subject": None, "message": "hello"}
+
+
+def journal_rows(path=None) -> list:
+    path = path or contact_queue.CONTACT_JOURNAL
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as journal:
+        return [json.loads(line) for line in journal]
+
+
+def remove_journals():
+    for path in glob.glob(contact_queue.CONTACT_JOURNAL + "*"):
+        os.remove(path)
+
+
+@pytest.fixture
+def inserts(monkeypatch):
+    """Rows inserted into contact_messages; set ``fail``/``hang`` to simulate an outage"""
+    monkeypatch.setattr(contact_queue, "CONTACT_RETRIES", 1)
+    monkeypatch.setattr(contact_queue, "CONTACT_BATCH_DELAY", 0.01)
+    state = {"rows": [], "fail": False, "hang": False, "gate": None}
+
+    async def insert(table, rows):
+        assert table == "contact_messages"
+        if state["hang"]:
+            await asyncio.Event().wait()
+        if state["gate"] is not None:
+            await state["gate"].wait()
+        if state["fail"]:
+            raise ConnectionError("database unreachable")
+        state["rows"].extend(rows)
+        return rows
+
+    monkeypatch.setattr(db, "insert", insert)
+    remove_journals()
+    yield state
+    remove_journals()
+
+
+def test_failed_batch_is_journaled_and_replayed_at_startup(inserts):
+    async def scenario():
+        inserts["fail"] = True
+        queue = ContactQueue()
+        for i in range(3):
+            queue.submit(message(i))
+        await queue.close(timeout=1)
+        assert inserts["rows"] == []
+        assert journal_rows() == [message(i) for i in range(3)]
+
+        # The next process replays the journal without waiting for a submit
+        inserts["fail"] = False
+        restarted = ContactQueue()
+        restarted.start()
+        await asyncio.sleep(0.05)
+        assert inserts["rows"] == [message(i) for i in range(3)]
+        assert not os.path.exists(contact_queue.CONTACT_JOURNAL)
+        assert restarted.stats()["journaled"] == 0
+        await restarted.close(timeout=1)
+
+    run(scenario())
+
+
+def test_close_journals_the_batch_being_written(inserts):
+    async def scenario():
+        inserts["hang"] = True
+        queue = ContactQueue()
+        for i in range(2):
+            queue.submit(message(i))
+        await asyncio.sleep(0.05)
+        assert queue.stats()["queued"] == 0
+
+        await queue.close(timeout=0.1)
+        assert journal_rows() == [message(0), message(1)]
+
+    run(scenario())
+
+
+def test_journal_is_replayed_once_the_database_is_back(inserts):
+    async def scenario():
+        inserts["fail"] = True
+        queue = ContactQueue()
+        queue.submit(message(0))
+        await asyncio.sleep(0.05)
+        assert queue.stats()["journaled"] == 1
+
+        inserts["fail"] = False
+        queue.submit(message(1))
+        await asyncio.sleep(0.05)
+        assert inserts["rows"] == [message(1), message(0)]
+        assert queue.stats()["journaled"] == 0
+        assert not os.path.exists(contact_queue.CONTACT_JOURNAL)
+        await queue.close(timeout=1)
+
+    run(scenario())
+
+
+def test_messages_journaled_during_a_replay_are_kept(inserts):
+    async def scenario():
+        ContactQueue()._append_journal([message(0), message(1)])
+        inserts["gate"] = asyncio.Event()
+        replaying = ContactQueue()
+        replaying.start()
+        await asyncio.sleep(0.05)
+
+        # Another worker journals a message while the replay is writing
+        ContactQueue()._append_journal([message(2)])
+        inserts["gate"].set()
+        await asyncio.sleep(0.05)
+        assert inserts["rows"] == [message(0), message(1)]
+        assert journal_rows() == [message(2)]
+        await replaying.close(timeout=1)
+
+        restarted = ContactQueue()
+        restarted.start()
+        await asyncio.sleep(0.05)
+        assert inserts["rows"] == [message(0), message(1), message(2)]
+        assert glob.glob(contact_queue.CONTACT_JOURNAL + "*.replay") == []
+        await restarted.close(timeout=1)
+
+    run(scenario())
+
+
+def test_replay_left_by_an_exited_worker_is_taken_over(inserts):
+    exited = subprocess.Popen(["true"])
+    exited.wait()
+    left_over = f"{contact_queue.CONTACT_JOURNAL}.{exited.pid}.replay"
+    with open(left_over, "w", encoding="utf-8") as journal:
+        journal.write(json.dumps(message(0)) + "\n")
+
+    async def scenario():
+        queue = ContactQueue()
+        queue.start()
+        await asyncio.sleep(0.05)
+        assert inserts["rows"] == [message(0)]
+        assert not os.path.exists(left_over)
+        await queue.close(timeout=1)
+
+    run(scenario())
@@ -0,0 +1,67 @@
+import asyncio
+import os
+
+from conftest import TEMP_DIR, run
+from content_versions import ContentVersions, FileVersionBackend
+
+
+def test_poll_applies_other_workers_changes_once():
+    path = os.path.join(TEMP_DIR, "content-versions-poll.json")
+
+    async def scenario():
+        seen_by_a, seen_by_b = [], []
+        a = ContentVersions(FileVersionBackend(path), poll_interval=3600)
+        b = ContentVersions(FileVersionBackend(path), poll_interval=3600)
+        await a.start(seen_by_a.append)
+        await b.start(seen_by_b.append)
+
+        a.publish(["projects", "skills"])
+        a.publish(["skills"])
+        await asyncio.sleep(0.05)
+        # One coalesced write, seen by the other worker on its next poll
+        assert a.stats()["published"] == 2
+        await b.poll()
+        assert seen_by_b == [{"projects", "skills"}]
+
+        # Nothing new: no further invalidation on either side
+        await a.poll()
+        await b.poll()
+        assert seen_by_a == []
+        assert seen_by_b == [{"projects", "skills"}]
+
+        b.publish(["about_me"])
+        await asyncio.sleep(0.05)
+        await a.poll()
+        assert seen_by_a == [{"about_me"}]
+
+        await a.close()
+        await b.close()
+
+    run(scenario())
+
+
+def test_first_poll_after_a_failed_start_invalidates_everything():
+    path = os.path.join(TEMP_DIR, "content-versions-unreadable.json")
+
+    async def scenario():
+        writer = ContentVersions(FileVersionBackend(path), poll_interval=3600)
+        await writer.start(lambda tables: None)
+        writer.publish(["projects"])
+        await asyncio.sleep(0.05)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("not json")
+        seen = []
+        reader = ContentVersions(FileVersionBackend(path), poll_interval=3600)
+        await reader.start(seen.append)
+        assert reader.stats()["errors"] == 1
+
+        writer.publish(["projects"])
+        await asyncio.sleep(0.05)
+        await reader.poll()
+        assert seen == [{"projects"}]
+
+        await writer.close()
+        await reader.close()
+
+    run(scenario())
@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+from starlette.responses import Response
+
+import http_cache
+from conftest import client, run
+
+
+def test_public_route_revalidates_with_etag(app):
+    async def scenario():
+        async with client(app) as c:
+            first = await c.get("/api/projects")
+            assert first.status_code == 200
+            assert first.headers["cache-control"].startswith("public, max-age=")
+            etag = first.headers["etag"]
+
+            again = await c.get("/api/projects", headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+
+    run(scenario())
+
+
+def test_admin_edit_changes_etag(app):
+    async def scenario():
+        async with client(app) as c:
+            before = await c.get("/api/projects")
+            project = before.json()[0]
+            project["title"] = "Renamed"
+            assert (await c.put(f"/api/admin/projects/{project['id']}", json=project)).status_code == 200
+
+            after = await c.get("/api/projects", headers={"If-None-Match": before.headers["etag"]})
+            assert after.status_code == 200
+            assert after.headers["etag"] != before.headers["etag"]
+            assert after.json()[0]["title"] == "Renamed"
+
+    run(scenario())
+
+
+def test_admin_routes_are_not_stored(app):
+    async def scenario():
+        async with client(app) as c:
+            response = await c.get("/api/admin/site-settings")
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == "no-store"
+            assert "etag" not in response.headers
+
+    run(scenario())
+
+
+def test_large_bodies_are_compressed_off_the_loop(monkeypatch):
+    body = b'{"rows": "' + b"x" * 100_000 + b'"}'
+    threaded = []
+    to_thread = asyncio.to_thread
+
+    async def spy(fn, *args):
+        threaded.append(fn)
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(http_cache.asyncio, "to_thread", spy)
+    app = http_cache.HTTPCacheMiddleware(Response(body, media_type="application/json"), [])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            response = await c.get("/", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.content == body
+            assert threaded == [http_cache.compress]
+
+    run(scenario())
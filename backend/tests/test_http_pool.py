@@ -0,0 +1,41 @@
+import time
+
+import httpx
+import pytest
+
+import http_pool
+
+
+@pytest.fixture
+def attempts(monkeypatch):
+    """A pooled client whose connections are always refused; records each attempt's timeouts"""
+    monkeypatch.setattr(http_pool, "HTTP_RETRIES", 5)
+    monkeypatch.setattr(http_pool, "HTTP_RETRY_BACKOFF", 0.01)
+    timeouts = []
+
+    def refuse(request):
+        timeouts.append(request.extensions["timeout"])
+        raise httpx.ConnectError("connection refused", request=request)
+
+    transport = http_pool.PooledTransport()
+    transport._transport = httpx.MockTransport(refuse)
+    with httpx.Client(transport=transport) as client:
+        yield timeouts, client
+
+
+def test_connection_errors_are_retried(attempts):
+    timeouts, client = attempts
+    with pytest.raises(httpx.ConnectError):
+        client.get("http://supabase.test/rest/v1/projects")
+    assert len(timeouts) == 6
+    assert timeouts[0]["read"] == http_pool.SERVICE_TIMEOUTS["rest"]
+
+
+def test_retries_stop_at_the_callers_deadline(attempts):
+    timeouts, client = attempts
+    started = time.monotonic()
+    with pytest.raises(httpx.ConnectError):
+        http_pool.run_with_deadline(started + 0.1, client.get, "http://supabase.test/rest/v1/projects")
+    assert time.monotonic() - started < 0.15
+    assert 1 < len(timeouts) < 6
+    assert all(timeout["read"] <= 0.1 and timeout["connect"] <= 0.1 for timeout in timeouts)
@@ -0,0 +1,148 @@
+import asyncio
+import os
+
+import pytest
+from prometheus_client import REGISTRY
+
+import db
+import main
+import snapshots
+from cache import stale_scope
+from conftest import TEMP_DIR, client, run
+from snapshots import SnapshotStore
+
+
+@pytest.fixture
+def store():
+    path = os.path.join(TEMP_DIR, "snapshots-test.json")
+    if os.path.exists(path):
+        os.remove(path)
+    return SnapshotStore(path)
+
+
+async def rows(value):
+    return value
+
+
+async def unavailable():
+    raise ConnectionError("database unreachable")
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_failed_query_serves_the_snapshot(store):
+    async def scenario():
+        assert await store.load("projects", None, lambda: rows([{"id": 1}])) == [{"id": 1}]
+
+        before = sample("snapshot_stale_served_total", table="projects", reason="error")
+        with stale_scope() as marks:
+            assert await store.load("projects", None, unavailable) == [{"id": 1}]
+        assert marks
+        assert store.stats()["served_stale"] == 1
+        assert sample("snapshot_stale_served_total", table="projects", reason="error") == before + 1
+
+    run(scenario())
+
+
+def test_failure_without_a_snapshot_propagates(store):
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await store.load("projects", None, unavailable)
+
+    run(scenario())
+
+
+def test_slow_query_serves_the_snapshot_and_refreshes_it(store, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_LATENCY_BUDGET", 0.05)
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return [{"id": 2}]
+
+    async def scenario():
+        await store.load("projects", None, lambda: rows([{"id": 1}]))
+        with stale_scope() as marks:
+            assert await store.load("projects", None, slow) == [{"id": 1}]
+        assert marks
+
+        # The overrunning query still finishes and updates the snapshot
+        await asyncio.sleep(0.3)
+        assert store.get("projects", None)["value"] == [{"id": 2}]
+
+    run(scenario())
+
+
+def test_stale_response_is_flagged_and_not_cached(app, monkeypatch):
+    async def scenario():
+        async with client(app) as c:
+            fresh = await c.get("/api/experience")
+            assert fresh.status_code == 200
+            assert "x-data-stale" not in fresh.headers
+
+            async def select(*args, **kwargs):
+                raise ConnectionError("database unreachable")
+
+            monkeypatch.setattr(db, "select", select)
+            main.cache.clear()
+            stale = await c.get("/api/experience")
+            assert stale.status_code == 200
+            assert stale.headers["x-data-stale"] == "true"
+            assert stale.headers["cache-control"] == "no-cache"
+            assert stale.json() == fresh.json()
+
+    run(scenario())
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    breaker = db.CircuitBreaker(failures=2, reset_after=0.05)
+    opened = sample("db_circuit_transitions_total", state="open")
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(db.CircuitOpen):
+        breaker.before_call()
+
+    run(asyncio.sleep(0.06))
+    assert breaker.state == "half-open"
+    # One trial call goes through; others are still rejected while it runs
+    breaker.before_call()
+    with pytest.raises(db.CircuitOpen):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    run(asyncio.sleep(0.06))
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+    assert breaker.stats()["rejected"] == 2
+    # Reopening after a failed trial is not a new transition
+    assert sample("db_circuit_transitions_total", state="open") == opened + 1
+
+
+def test_service_errors_do_not_trip_the_breaker(monkeypatch):
+    breaker = db.CircuitBreaker(failures=1, reset_after=60)
+    monkeypatch.setattr(db, "breaker", breaker)
+
+    def rejected():
+        raise db.PostgrestAPIError({"message": "permission denied", "code": "42501"})
+
+    def unreachable():
+        raise ConnectionError("connection refused")
+
+    async def scenario():
+        with pytest.raises(db.PostgrestAPIError):
+            await db.call(rejected)
+        assert breaker.state == "closed"
+        with pytest.raises(ConnectionError):
+            await db.call(unreachable)
+        assert breaker.state == "open"
+        with pytest.raises(db.CircuitOpen):
+            await db.call(rejected)
+
+    run(scenario())
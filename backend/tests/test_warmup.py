@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+import warmup as warmup_module
+from conftest import run
+from warmup import Warmup
+
+
+@pytest.fixture
+def database():
+    """A warm-up step against a database that is down until ``up`` is set"""
+    state = {"up": False, "calls": 0}
+
+    async def connect():
+        state["calls"] += 1
+        await asyncio.sleep(0.01)
+        if not state["up"]:
+            raise ConnectionError("database unreachable")
+
+    return state, connect
+
+
+def test_probes_share_one_retry_and_back_off(database, monkeypatch):
+    monkeypatch.setattr(warmup_module, "WARMUP_RETRY_BACKOFF", 0.1)
+    state, connect = database
+    warmup = Warmup(timeout=1)
+
+    async def scenario():
+        await warmup.run({"database": connect})
+        assert not warmup.ready
+        assert state["calls"] == 1
+
+        # Probes while the retry runs, and while it backs off, start nothing new
+        for _ in range(5):
+            warmup.retry_failed()
+        await asyncio.sleep(0.02)
+        for _ in range(5):
+            warmup.retry_failed()
+        assert state["calls"] == 2
+        assert warmup.steps["database"].startswith("failed")
+
+        state["up"] = True
+        await asyncio.sleep(0.1)
+        warmup.retry_failed()
+        await asyncio.sleep(0.02)
+        assert state["calls"] == 3
+        assert warmup.ready
+
+    run(scenario())
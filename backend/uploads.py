@@ -0,0 +1,190 @@
+"""Streaming, size-capped upload pipeline for ``/api/upload``.
+
+- ``UploadLimitMiddleware`` rejects a request body larger than
+  ``UPLOAD_MAX_BYTES`` (default 10 MB) with 413, either up front from
+  Content-Length or as soon as the streamed body crosses the limit.
+- ``store_upload`` copies the upload to a temporary file in fixed-size
+  chunks while hashing it, in a worker thread so the disk I/O and hashing
+  stay off the event loop. The content type is sniffed from the first
+  bytes only. The file is named after its SHA-256 so that re-uploading
+  the same file is a HEAD request with no transfer. New files stream
+  from disk to Supabase Storage.
+- Image uploads also get resized derivatives (see ``images.py``), returned
+  as ``variants``/``srcset`` in the response.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Optional, Tuple
+
+from fastapi import UploadFile
+
+import db
+from images import create_variants
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "portfolio-assets")
+
+SNIFF_BYTES = 512
+
+# (magic prefix, offset, content type, extension)
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png", ".png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg", ".jpg"),
+    (b"GIF87a", 0, "image/gif", ".gif"),
+    (b"GIF89a", 0, "image/gif", ".gif"),
+    (b"ftypavif", 4, "image/avif", ".avif"),
+    (b"%PDF-", 0, "application/pdf", ".pdf"),
+]
+
+# Names already known to exist in the bucket, so repeat uploads skip even the HEAD
+_known_objects = set()
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadLimitMiddleware:
+    """Cap the request body size of the upload route while it streams in"""
+
+    def __init__(self, app, path: str = "/api/upload", max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != self.path or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge()
+            return message
+
+        response_started = False
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # The form parser turns our exception into a generic 400; replace
+            # whatever response the app produces with a proper 413
+            if exceeded:
+                return
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = f'{{"detail":"File too large (max {self.max_bytes} bytes)"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def sniff_content_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """Detect ``(content_type, extension)`` from the first bytes of a file"""
+    for magic, offset, content_type, extension in MAGIC_NUMBERS:
+        if head[offset:offset + len(magic)] == magic:
+            return content_type, extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    text = head.lstrip().lower()
+    if text.startswith(b"<svg") or (text.startswith(b"<?xml") and b"<svg" in text):
+        return "image/svg+xml", ".svg"
+    return None
+
+
+def _spool(source: BinaryIO, spool: BinaryIO) -> Tuple[str, int, Optional[Tuple[str, str]]]:
+    """Runs in a worker thread: copy ``source`` to ``spool`` in chunks.
+
+    Returns the SHA-256 hex digest, the size and the sniffed
+    ``(content_type, extension)``.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    sniffed = None
+    source.seek(0)
+    while True:
+        chunk = source.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        if size == 0:
+            sniffed = sniff_content_type(chunk[:SNIFF_BYTES])
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            raise UploadTooLarge()
+        sha256.update(chunk)
+        spool.write(chunk)
+    spool.flush()
+    return sha256.hexdigest(), size, sniffed
+
+
+async def store_upload(file: UploadFile) -> dict:
+    """Stream an upload to storage under a content-hash name and return its public URL"""
+    if db.supabase is None:
+        raise RuntimeError("File uploads need Supabase Storage (set SUPABASE_URL)")
+    bucket = db.supabase.storage.from_(STORAGE_BUCKET)
+
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as spool:
+        try:
+            digest, size, sniffed = await asyncio.to_thread(_spool, file.file, spool)
+
+            if sniffed:
+                content_type, extension = sniffed
+            else:
+                content_type = file.content_type or "application/octet-stream"
+                extension = os.path.splitext(file.filename or "")[1].lower()
+            filename = f"{digest}{extension}"
+
+            deduplicated = filename in _known_objects or await db.call(bucket.exists, filename)
+            if not deduplicated:
+                # storage3 hands the open file to httpx, which streams it in chunks
+                await db.call(
+                    bucket.upload,
+                    path=filename,
+                    file=spool.name,
+                    # Identical content under the same name; a concurrent twin upload is harmless
+                    file_options={"content-type": content_type, "upsert": "true"},
+                    timeout=db.STORAGE_TIMEOUT,
+                )
+            _known_objects.add(filename)
+
+            variants = await create_variants(spool.name, filename, content_type, bucket, existing=deduplicated)
+        finally:
+            spool.close()
+            os.unlink(spool.name)
+
+    return {
+        "url": bucket.get_public_url(filename),
+        "path": filename,
+        "content_type": content_type,
+        "size": size,
+        "deduplicated": deduplicated,
+        **variants,
+    }
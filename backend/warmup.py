@@ -0,0 +1,113 @@
+"""One-shot startup warm-up and the readiness state behind ``/ready``.
+
+On a host that scales to zero, the first visitor after a cold start would
+otherwise pay for client construction, TLS handshakes and the first
+queries. ``Warmup.run`` is awaited from the application's startup hook, so
+the server only starts accepting connections once it is done. It runs
+every step concurrently: opening the database client, fetching the JWK
+set, and loading the public content into the cache. Running the reads in
+parallel also fills the HTTP connection pool with several live
+connections.
+
+A failed step is logged and does not block startup; the request that needs
+the data loads it as usual. The warm-up stops waiting after
+``WARMUP_TIMEOUT`` seconds (default 10). Steps that are still running
+carry on in the background and fill the cache when they finish.
+
+``/health`` only says the process is alive. ``/ready`` returns 503 while a
+step has failed or is still running. A call to it retries the failed steps
+in the background, so an instance that started during a database outage
+becomes ready once the database is back. Only one retry runs at a time,
+and after a failed one the next waits ``WARMUP_RETRY_BACKOFF`` seconds
+(default 1), doubling up to ``WARMUP_RETRY_MAX`` (default 60), however
+often the probe is called.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+WARMUP_RETRY_BACKOFF = float(os.getenv("WARMUP_RETRY_BACKOFF", "1"))
+WARMUP_RETRY_MAX = float(os.getenv("WARMUP_RETRY_MAX", "60"))
+
+
+class Warmup:
+    """Runs the startup steps once, concurrently, and records how they went"""
+
+    def __init__(self, timeout: float = WARMUP_TIMEOUT):
+        self.timeout = timeout
+        self.finished = False
+        self.duration_ms: Optional[float] = None
+        # Step name -> "ok", "failed: <error>" or "pending"
+        self.steps: Dict[str, str] = {}
+        self._step_functions: Dict[str, Callable[[], Awaitable]] = {}
+        self._run: Optional[asyncio.Task] = None
+        self._retry: Optional[asyncio.Task] = None
+        self._retry_delay = WARMUP_RETRY_BACKOFF
+        self._next_retry_at = 0.0
+        self._background = set()
+
+    @property
+    def ready(self) -> bool:
+        """Finished, and every step has succeeded"""
+        return self.finished and all(state == "ok" for state in self.steps.values())
+
+    async def _step(self, name: str, step: Callable[[], Awaitable]) -> None:
+        try:
+            await step()
+            self.steps[name] = "ok"
+        except Exception as e:
+            self.steps[name] = f"failed: {e}"
+            print(f"Warm-up step {name} failed: {e}")
+
+    def _keep(self, task: asyncio.Task) -> None:
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run_all(self, steps: Dict[str, Callable[[], Awaitable]]) -> None:
+        started = time.perf_counter()
+        self._step_functions = dict(steps)
+        self.steps = {name: "pending" for name in steps}
+        tasks = [asyncio.create_task(self._step(name, step)) for name, step in steps.items()]
+        _, pending = await asyncio.wait(tasks, timeout=self.timeout)
+        for task in pending:
+            self._keep(task)
+        if pending:
+            print(f"Warm-up: {len(pending)} step(s) still running after {self.timeout}s; continuing in the background")
+        self.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.finished = True
+        failed = sum(1 for state in self.steps.values() if state.startswith("failed"))
+        print(f"Warm-up finished in {self.duration_ms}ms ({len(steps) - failed - len(pending)} ok, {failed} failed)")
+
+    async def run(self, steps: Dict[str, Callable[[], Awaitable]]) -> None:
+        """Run ``steps`` (name -> coroutine function); later calls wait for the first run"""
+        if self._run is None:
+            self._run = asyncio.ensure_future(self._run_all(steps))
+        await asyncio.shield(self._run)
+
+    def retry_failed(self) -> None:
+        """Run the failed steps again in the background, unless a retry is running or backing off"""
+        if not self.finished or (self._retry is not None and not self._retry.done()):
+            return
+        if time.monotonic() < self._next_retry_at:
+            return
+        failed = [name for name, state in self.steps.items() if state.startswith("failed")]
+        if failed:
+            self._retry = asyncio.create_task(self._retry_steps(failed))
+
+    async def _retry_steps(self, names) -> None:
+        for name in names:
+            self.steps[name] = "pending"
+        await asyncio.gather(*(self._step(name, self._step_functions[name]) for name in names))
+        if any(self.steps[name].startswith("failed") for name in names):
+            self._next_retry_at = time.monotonic() + self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, WARMUP_RETRY_MAX)
+        else:
+            self._retry_delay = WARMUP_RETRY_BACKOFF
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "duration_ms": self.duration_ms, "steps": dict(self.steps)}
+
+
+warmup = Warmup()
@@ -1,7 +1,6 @@
 import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
-import axios from 'axios'
 import { FaCode, FaLaptopCode, FaRocket, FaUsers, FaLightbulb, FaCog, FaPalette, FaChartLine } from 'react-icons/fa'
 import { useData } from '../context/DataContext'
 
@@ -17,7 +16,7 @@ const iconMap = {
 }
 
 const About = () => {
-  const { settings } = useData()
+  const { settings, portfolio } = useData()
   const [aboutMe, setAboutMe] = useState(null)
   const [ref, inView] = useInView({
     triggerOnce: true,
@@ -25,17 +24,10 @@ const About = () => {
   })
 
   useEffect(() => {
-    const fetchAboutMe = async () => {
-      try {
-        const response = await axios.get('/api/about-me')
-        setAboutMe(response.data)
-      } catch (error) {
-        console.error('Error fetching about me:', error)
-      }
+    if (portfolio) {
+      setAboutMe(portfolio.about_me)
     }
-
-    fetchAboutMe()
-  }, [])
+  }, [portfolio])
 
   const containerVariants = {
     hidden: { opacity: 0 },
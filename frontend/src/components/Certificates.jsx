@@ -2,9 +2,10 @@ import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
 import { FaAward, FaExternalLinkAlt } from 'react-icons/fa'
-import axios from 'axios'
+import { useData } from '../context/DataContext'
 
 const Certificates = () => {
+    const { portfolio } = useData()
     const [certificates, setCertificates] = useState([])
     const [currentIndex, setCurrentIndex] = useState(0)
     const [ref, inView] = useInView({
@@ -13,16 +14,10 @@ const Certificates = () => {
     })
 
     useEffect(() => {
-        const fetchCertificates = async () => {
-            try {
-                const response = await axios.get('/api/certificates')
-                setCertificates(response.data)
-            } catch (error) {
-                console.error('Error fetching certificates:', error)
-            }
+        if (portfolio) {
+            setCertificates(portfolio.certificates)
         }
-        fetchCertificates()
-    }, [])
+    }, [portfolio])
 
     // Auto-play carousel
     useEffect(() => {
@@ -62,9 +62,13 @@ const Contact = () => {
       })
       setFormData({ name: '', email: '', subject: '', message: '' })
     } catch (error) {
+      // Rate-limited or busy responses carry a message meant for the visitor
+      const status = error.response?.status
       setStatus({
         type: 'error',
-        message: 'Something went wrong. Please try again later.',
+        message: (status === 429 || status === 503) && error.response.data?.detail
+          ? error.response.data.detail
+          : 'Something went wrong. Please try again later.',
       })
     } finally {
       setIsSubmitting(false)
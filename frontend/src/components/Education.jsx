@@ -2,9 +2,10 @@ import { useState, useEffect } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
 import { FaGraduationCap, FaCalendarAlt, FaUniversity } from 'react-icons/fa'
-import axios from 'axios'
+import { useData } from '../context/DataContext'
 
 const Education = () => {
+    const { portfolio } = useData()
     const [educationList, setEducationList] = useState([])
     const [selectedIndex, setSelectedIndex] = useState(0)
     const [ref, inView] = useInView({
@@ -13,16 +14,10 @@ const Education = () => {
     })
 
     useEffect(() => {
-        const fetchEducation = async () => {
-            try {
-                const response = await axios.get('/api/education')
-                setEducationList(response.data)
-            } catch (error) {
-                console.error('Error fetching education:', error)
-            }
+        if (portfolio) {
+            setEducationList(portfolio.education)
         }
-        fetchEducation()
-    }, [])
+    }, [portfolio])
 
     const selectedEducation = educationList[selectedIndex]
 
@@ -2,9 +2,10 @@ import { useState, useEffect } from 'react'
 import { motion, AnimatePresence } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
 import { FaBriefcase, FaCalendarAlt } from 'react-icons/fa'
-import axios from 'axios'
+import { useData } from '../context/DataContext'
 
 const Experience = () => {
+    const { portfolio } = useData()
     const [experiences, setExperiences] = useState([])
     const [selectedIndex, setSelectedIndex] = useState(0)
     const [ref, inView] = useInView({
@@ -13,16 +14,10 @@ const Experience = () => {
     })
 
     useEffect(() => {
-        const fetchExperiences = async () => {
-            try {
-                const response = await axios.get('/api/experience')
-                setExperiences(response.data)
-            } catch (error) {
-                console.error('Error fetching experience:', error)
-            }
+        if (portfolio) {
+            setExperiences(portfolio.experience)
         }
-        fetchExperiences()
-    }, [])
+    }, [portfolio])
 
     const selectedExperience = experiences[selectedIndex]
 
@@ -2,30 +2,25 @@ import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { HiMenu, HiX, HiSun, HiMoon } from 'react-icons/hi'
 import { useTheme } from '../context/ThemeContext'
-import axios from 'axios'
+import { useData } from '../context/DataContext'
 
 const Navbar = ({ scrolled }) => {
   const [isOpen, setIsOpen] = useState(false)
   const { isDark, toggleTheme } = useTheme()
   const [resumeUrl, setResumeUrl] = useState('/resume.pdf')
   const [logoUrl, setLogoUrl] = useState('/logo.jpg')
+  const { settings } = useData()
 
   useEffect(() => {
-    const fetchSettings = async () => {
-      try {
-        const response = await axios.get('/api/site-settings')
-        if (response.data.resume_url) {
-          setResumeUrl(response.data.resume_url)
-        }
-        if (response.data.logo_url) {
-          setLogoUrl(response.data.logo_url)
-        }
-      } catch (error) {
-        console.error('Error fetching resume URL:', error)
+    if (settings) {
+      if (settings.resume_url) {
+        setResumeUrl(settings.resume_url)
+      }
+      if (settings.logo_url) {
+        setLogoUrl(settings.logo_url)
       }
     }
-    fetchSettings()
-  }, [])
+  }, [settings])
 
   const navItems = [
     { name: 'About', href: '#about' },
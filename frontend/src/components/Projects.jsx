@@ -2,29 +2,22 @@ import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
 import { FaStar, FaGithub, FaExternalLinkAlt, FaClock, FaLightbulb } from 'react-icons/fa'
-import axios from 'axios'
 import { useData } from '../context/DataContext'
 
 const Projects = () => {
   const [projects, setProjects] = useState([])
   const [filter, setFilter] = useState('all')
-  const { settings } = useData()
+  const { settings, portfolio } = useData()
   const [ref, inView] = useInView({
     triggerOnce: true,
     threshold: 0.1,
   })
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        const projectsRes = await axios.get('/api/projects')
-        setProjects(projectsRes.data)
-      } catch (error) {
-        console.error('Error fetching data:', error)
-      }
+    if (portfolio) {
+      setProjects(portfolio.projects)
     }
-    fetchData()
-  }, [])
+  }, [portfolio])
 
   const filteredProjects = filter === 'featured'
     ? projects.filter(p => p.featured)
@@ -1,7 +1,7 @@
 import { useState, useEffect } from 'react'
 import { motion } from 'framer-motion'
 import { useInView } from 'react-intersection-observer'
-import axios from 'axios'
+import { useData } from '../context/DataContext'
 
 const HexagonSkill = ({ skill, index, isFlipped, onMouseEnter, onMouseLeave }) => {
   const proficiencyColor = skill.level >= 80 ? 'from-green-500 to-emerald-500' :
@@ -62,6 +62,7 @@ const HexagonSkill = ({ skill, index, isFlipped, onMouseEnter, onMouseLeave }) =
 }
 
 const Skills = () => {
+  const { portfolio } = useData()
   const [skills, setSkills] = useState([])
   const [categories, setCategories] = useState([])
   const [selectedCategory, setSelectedCategory] = useState('all')
@@ -103,20 +104,11 @@ const Skills = () => {
   }, [isPaused])
 
   useEffect(() => {
-    const fetchSkills = async () => {
-      try {
-        const [skillsRes, categoriesRes] = await Promise.all([
-          axios.get('/api/skills'),
-          axios.get('/api/skills/categories')
-        ])
-        setSkills(skillsRes.data)
-        setCategories(['all', ...categoriesRes.data.categories])
-      } catch (error) {
-        console.error('Error fetching skills:', error)
-      }
+    if (portfolio) {
+      setSkills(portfolio.skills)
+      setCategories(['all', ...portfolio.skill_categories])
     }
-    fetchSkills()
-  }, [])
+  }, [portfolio])
 
   const filteredSkills = selectedCategory === 'all'
     ? skills
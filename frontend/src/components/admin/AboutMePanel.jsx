@@ -15,7 +15,10 @@ const AboutMePanel = () => {
 
     const fetchAboutMe = async () => {
         try {
-            const response = await axios.get('/api/about-me')
+            const token = localStorage.getItem('adminToken')
+            const response = await axios.get('/api/admin/about-me', {
+                headers: { Authorization: `Bearer ${token}` }
+            })
             setAboutMe(response.data)
             setLoading(false)
         } catch (error) {
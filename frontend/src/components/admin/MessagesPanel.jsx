@@ -11,35 +11,63 @@ const MessagesPanel = ({ onStatsUpdate }) => {
   const [confirmModal, setConfirmModal] = useState(null)
   const [selectedMessage, setSelectedMessage] = useState(null)
   const [filter, setFilter] = useState('all') // all, unread, read
+  const [search, setSearch] = useState('')
+  const [nextCursor, setNextCursor] = useState(null)
 
   useEffect(() => {
-    fetchMessages()
-  }, [])
+    // Debounce search so typing doesn't fire a request per keystroke
+    const timeout = setTimeout(() => fetchMessages(), search ? 300 : 0)
+    return () => clearTimeout(timeout)
+  }, [filter, search])
 
-  const fetchMessages = async () => {
+  // Messages are filtered and paginated on the server; pass a cursor to load the next page
+  const fetchMessages = async (cursor = null) => {
     try {
       const token = localStorage.getItem('adminToken')
+      const params = {}
+      if (filter !== 'all') params.status = filter
+      if (search) params.q = search
+      if (cursor) params.cursor = cursor
       const response = await axios.get('/api/admin/messages', {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${token}` },
+        params
       })
-      // Ensure we always have an array
-      setMessages(Array.isArray(response.data) ? response.data : [])
+      const items = Array.isArray(response.data.items) ? response.data.items : []
+      setMessages(prev => cursor ? [...prev, ...items] : items)
+      setNextCursor(response.data.next_cursor || null)
       setLoading(false)
-      if (onStatsUpdate) onStatsUpdate()
+      if (onStatsUpdate && !cursor) onStatsUpdate()
     } catch (error) {
       console.error('Error fetching messages:', error)
-      setMessages([]) // Set empty array on error
+      if (!cursor) setMessages([]) // Set empty array on error
       setLoading(false)
     }
   }
 
+  // The list only carries headers; load the full message when it is opened
+  const openMessage = async (message) => {
+    setSelectedMessage(message)
+    try {
+      const token = localStorage.getItem('adminToken')
+      const response = await axios.get(`/api/admin/messages/${message.id}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      })
+      setSelectedMessage(current => current?.id === message.id ? response.data : current)
+    } catch (error) {
+      console.error('Error fetching message:', error)
+      toast.error('Failed to load message.')
+    }
+  }
+
   const markAsRead = async (messageId) => {
     try {
       const token = localStorage.getItem('adminToken')
       await axios.patch(`/api/admin/messages/${messageId}/read`, {}, {
         headers: { Authorization: `Bearer ${token}` }
       })
-      fetchMessages()
+      setMessages(prev => prev.map(msg => msg.id === messageId ? { ...msg, read: true } : msg))
+      setSelectedMessage(current => current?.id === messageId ? { ...current, read: true } : current)
+      if (onStatsUpdate) onStatsUpdate()
       toast.success('Message marked as read!')
     } catch (error) {
       console.error('Error marking message as read:', error)
@@ -63,7 +91,8 @@ const MessagesPanel = ({ onStatsUpdate }) => {
         headers: { Authorization: `Bearer ${token}` }
       })
       setSelectedMessage(null)
-      fetchMessages()
+      setMessages(prev => prev.filter(msg => msg.id !== messageId))
+      if (onStatsUpdate) onStatsUpdate()
       toast.success('Message deleted successfully!')
     } catch (error) {
       console.error('Error deleting message:', error)
@@ -73,12 +102,6 @@ const MessagesPanel = ({ onStatsUpdate }) => {
     }
   }
 
-  const filteredMessages = messages.filter(msg => {
-    if (filter === 'unread') return !msg.read
-    if (filter === 'read') return msg.read
-    return true
-  })
-
   if (loading) {
     return (
       <div className="text-center py-12">
@@ -94,6 +117,13 @@ const MessagesPanel = ({ onStatsUpdate }) => {
       <div className="flex items-center justify-between mb-6">
         <h2 className="text-3xl font-bold text-white">Contact Messages</h2>
         <div className="flex gap-2">
+          <input
+            type="search"
+            value={search}
+            onChange={(e) => setSearch(e.target.value)}
+            placeholder="Search messages..."
+            className="px-4 py-2 rounded-lg bg-gray-800 text-white placeholder-gray-500 focus:outline-none focus:ring-2 focus:ring-primary-500"
+          />
           {['all', 'unread', 'read'].map((filterType) => (
             <button
               key={filterType}
@@ -109,7 +139,7 @@ const MessagesPanel = ({ onStatsUpdate }) => {
         </div>
       </div>
 
-      {filteredMessages.length === 0 ? (
+      {messages.length === 0 ? (
         <div className="text-center py-12 bg-gray-800 rounded-lg">
           <FaEnvelope className="text-gray-600 text-6xl mx-auto mb-4" />
           <p className="text-gray-400">No messages found</p>
@@ -118,13 +148,13 @@ const MessagesPanel = ({ onStatsUpdate }) => {
         <div className="grid lg:grid-cols-2 gap-6">
           {/* Messages List */}
           <div className="space-y-4 max-h-[calc(100vh-300px)] overflow-y-auto pr-2">
-            {filteredMessages.map((message) => (
+            {messages.map((message) => (
               <motion.div
                 key={message.id}
                 initial={{ opacity: 0, x: -20 }}
                 animate={{ opacity: 1, x: 0 }}
                 whileHover={{ scale: 1.02 }}
-                onClick={() => setSelectedMessage(message)}
+                onClick={() => openMessage(message)}
                 className={`bg-gray-800 p-4 rounded-lg cursor-pointer transition-all ${selectedMessage?.id === message.id
                   ? 'ring-2 ring-primary-500'
                   : 'hover:bg-gray-700'
@@ -144,9 +174,19 @@ const MessagesPanel = ({ onStatsUpdate }) => {
                   </span>
                 </div>
                 <p className="text-sm text-gray-400 mb-1">{message.email}</p>
-                <p className="text-sm text-gray-500 mt-2 line-clamp-2">{message.message}</p>
+                {message.subject && (
+                  <p className="text-sm text-gray-500 mt-2 line-clamp-2">{message.subject}</p>
+                )}
               </motion.div>
             ))}
+            {nextCursor && (
+              <button
+                onClick={() => fetchMessages(nextCursor)}
+                className="w-full py-2 rounded-lg bg-gray-800 text-gray-300 hover:bg-gray-700 font-semibold transition-all"
+              >
+                Load more
+              </button>
+            )}
           </div>
 
           {/* Message Detail View */}
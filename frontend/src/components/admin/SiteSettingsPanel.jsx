@@ -16,7 +16,10 @@ const SiteSettingsPanel = () => {
 
     const fetchSettings = async () => {
         try {
-            const response = await axios.get('/api/site-settings')
+            const token = localStorage.getItem('adminToken')
+            const response = await axios.get('/api/admin/site-settings', {
+                headers: { Authorization: `Bearer ${token}` }
+            })
             setSettings(response.data)
             setLoading(false)
         } catch (error) {
@@ -30,7 +30,9 @@ const SkillCategoriesPanel = ({ onStatsUpdate }) => {
                 axios.get('/api/admin/skill-categories', {
                     headers: { Authorization: `Bearer ${token}` }
                 }),
-                axios.get('/api/skills') // Assuming skills still fetched from public endpoint
+                axios.get('/api/admin/skills', {
+                    headers: { Authorization: `Bearer ${token}` }
+                })
             ])
             setCategories(Array.isArray(categoriesRes.data) ? categoriesRes.data : [])
             setSkills(skillsRes.data)
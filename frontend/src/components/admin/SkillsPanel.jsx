@@ -46,7 +46,10 @@ const SkillsPanel = ({ onStatsUpdate, onTabChange }) => {
 
   const fetchCategories = async () => {
     try {
-      const response = await axios.get('/api/skill-categories')
+      const token = localStorage.getItem('adminToken')
+      const response = await axios.get('/api/admin/skill-categories', {
+        headers: { Authorization: `Bearer ${token}` }
+      })
       setCategories(response.data)
     } catch (error) {
       console.error('Error fetching categories:', error)
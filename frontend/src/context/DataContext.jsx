@@ -3,29 +3,118 @@ import axios from 'axios'
 
 const DataContext = createContext()
 
+// Portfolio sections to refetch when a table changes: [portfolio key, public
+// endpoint]. Which skills are shown depends on their category's visibility,
+// and categories are only listed while they have visible skills.
+const SKILL_SECTIONS = [['skills', '/api/skills'], ['skill_categories', '/api/skills/categories']]
+const SECTIONS = {
+  projects: [['projects', '/api/projects']],
+  experience: [['experience', '/api/experience']],
+  education: [['education', '/api/education']],
+  certificates: [['certificates', '/api/certificates']],
+  skills: SKILL_SECTIONS,
+  skill_categories: SKILL_SECTIONS,
+  site_settings: [['site_settings', '/api/site-settings']],
+  about_me: [['about_me', '/api/about-me']],
+}
+
+// After a change event the browser's cached copy is bypassed, so the
+// refetch sees the edit even within the response's max-age
+const FRESH = { headers: { 'Cache-Control': 'no-cache' } }
+
 export const DataProvider = ({ children }) => {
-  const [settings, setSettings] = useState(null)
+  const [portfolio, setPortfolio] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
   useEffect(() => {
-    const fetchSettings = async () => {
+    // One request for the whole public portfolio; sections read from it
+    const fetchPortfolio = async (fresh) => {
       try {
-        const response = await axios.get('/api/site-settings')
-        setSettings(response.data)
+        const response = await axios.get('/api/portfolio', fresh ? FRESH : undefined)
+        setPortfolio(response.data)
         setLoading(false)
       } catch (err) {
-        console.error('Error fetching site settings:', err)
+        console.error('Error fetching portfolio:', err)
         setError(err)
         setLoading(false)
       }
     }
 
-    fetchSettings()
+    // Refetch only the sections backed by the changed tables
+    const fetchSections = async (tables) => {
+      const sections = new Map()
+      tables.forEach((table) => (SECTIONS[table] || []).forEach(([key, url]) => sections.set(key, url)))
+      try {
+        const updates = await Promise.all(
+          [...sections].map(async ([key, url]) => {
+            try {
+              return [key, (await axios.get(url, FRESH)).data]
+            } catch (err) {
+              // Site settings and about me are absent rather than empty
+              if (err.response && err.response.status === 404) return [key, null]
+              throw err
+            }
+          })
+        )
+        if (updates.length) {
+          setPortfolio((current) => current && { ...current, ...Object.fromEntries(updates) })
+        }
+      } catch (err) {
+        console.error('Error refreshing portfolio:', err)
+        fetchPortfolio(true)
+      }
+    }
+
+    fetchPortfolio()
+
+    // Refetch when an admin edits content, once per burst of edits. A
+    // reset means events were missed, so everything is fetched again.
+    let refetchTimer = null
+    let changedTables = new Set()
+    let fullRefetch = false
+    const events = typeof EventSource !== 'undefined' ? new EventSource('/api/changes') : null
+    const scheduleRefetch = () => {
+      clearTimeout(refetchTimer)
+      refetchTimer = setTimeout(() => {
+        const tables = changedTables
+        const full = fullRefetch
+        changedTables = new Set()
+        fullRefetch = false
+        if (full) {
+          fetchPortfolio(true)
+        } else {
+          fetchSections(tables)
+        }
+      }, 500)
+    }
+    const onChange = (event) => {
+      try {
+        changedTables.add(JSON.parse(event.data).table)
+      } catch {
+        fullRefetch = true
+      }
+      scheduleRefetch()
+    }
+    const onReset = () => {
+      fullRefetch = true
+      scheduleRefetch()
+    }
+    if (events) {
+      events.addEventListener('change', onChange)
+      events.addEventListener('reset', onReset)
+    }
+
+    return () => {
+      clearTimeout(refetchTimer)
+      if (events) events.close()
+    }
   }, [])
 
+  const settings = portfolio ? portfolio.site_settings : null
+
   return (
-    <DataContext.Provider value={{ settings, loading, error }}>
+    <DataContext.Provider value={{ portfolio, settings, loading, error }}>
       {children}
     </DataContext.Provider>
   )